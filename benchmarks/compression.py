@@ -0,0 +1,71 @@
+"""
+Benchmark of orion.compression on long tracks.
+
+Run with `make benchmark`, or `python benchmarks/compression.py [days]` where
+days is how many days the mock track is repeated for each of three ships,
+default 300 (about 140k positions).
+"""
+
+import json
+import os
+import sys
+
+import pandas as pd
+from json_to_gdf import measure
+
+from orion import Orion
+from orion.compression import TrackCompressor, compress_track
+
+project_dir = os.path.join(os.path.dirname(__file__), os.pardir)
+
+SHIPS = 3
+CHUNK = 10_000
+
+
+def long_tracks(days: int) -> pd.DataFrame:
+    with open(f"{project_dir}/tests/mocks/ais_last24h.json") as f:
+        track = Orion(skip_auth=True).json_to_gdf(json.load(f), None)
+
+    frames = []
+    for ship in range(SHIPS):
+        for day in range(days):
+            frame = pd.DataFrame(track.drop(columns="geometry"))
+            frame["mmsi"] = 257000000 + ship
+            frame["msgtime"] += pd.Timedelta(days=day)
+            frame["longitude"] += 0.001 * ship
+            frames.append(frame)
+
+    return pd.concat(frames, ignore_index=True).sort_values("msgtime", kind="stable")
+
+
+def compress_chunks(frame: pd.DataFrame, max_error: float) -> pd.DataFrame:
+    compressor = TrackCompressor(max_error)
+    chunks = [
+        compressor.compress(frame.iloc[i : i + CHUNK])
+        for i in range(0, len(frame), CHUNK)
+    ]
+    return pd.concat([*chunks, compressor.flush()])
+
+
+def main(days: int) -> None:
+    frame = long_tracks(days)
+    rows = len(frame)
+
+    print(f"{rows:,} positions")
+    for max_error in [10, 100, 1000]:
+        kept = measure(
+            f"max_error {max_error} m, whole",
+            rows,
+            lambda: compress_track(frame, max_error),
+        )
+        chunked = measure(
+            f"max_error {max_error} m, chunks",
+            rows,
+            lambda: compress_chunks(frame, max_error),
+        )
+        assert sorted(chunked.index) == sorted(kept.index)
+        print(f"{'':<32} kept {len(kept) / rows:.1%}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 300)
@@ -0,0 +1,78 @@
+"""
+Benchmark of Orion.json_to_gdf against the implementation it replaced.
+
+Run with `make benchmark`, or `python benchmarks/json_to_gdf.py [repeat]` where
+repeat is how many times the mock track is repeated, default 5000 (about 800k
+positions).
+"""
+
+import json
+import os
+import sys
+import time
+from typing import Callable, List
+
+import geopandas
+import pandas as pd
+import pytz
+
+from orion import Orion
+from orion.types.ais import Ais
+from orion.types.batch import AisBatch
+
+project_dir = os.path.join(os.path.dirname(__file__), os.pardir)
+
+
+def json_to_gdf_before(_json: List[Ais]) -> geopandas.GeoDataFrame:
+    _gdf = geopandas.GeoDataFrame(_json)
+
+    _gdf.msgtime = pd.to_datetime(_gdf.msgtime)
+    _timezone = pytz.timezone("Europe/Berlin")
+    _gdf.msgtime = _gdf.msgtime.dt.tz_convert(_timezone)
+
+    _gdf.geometry = geopandas.points_from_xy(_gdf.longitude, _gdf.latitude)
+    _gdf.set_crs(epsg=4326, inplace=True)
+
+    _gdf = _gdf.sort_values(by="msgtime")
+
+    return _gdf
+
+
+def measure(name: str, rows: int, function: Callable[[], object]) -> object:
+    start = time.perf_counter()
+    result = function()
+    seconds = time.perf_counter() - start
+    print(f"{name:<32} {seconds:8.2f} s {rows / seconds:12,.0f} rows/s")
+    return result
+
+
+def main(repeat: int) -> None:
+    with open(f"{project_dir}/tests/mocks/ais_last24h.json") as f:
+        track = json.load(f)
+
+    descending = [dict(a) for a in track] * repeat
+    ascending = sorted(descending, key=lambda a: a["msgtime"])
+    rows = len(descending)
+    orion = Orion(skip_auth=True)
+
+    print(f"{rows:,} positions")
+    before = measure(
+        "before, unsorted input", rows, lambda: json_to_gdf_before(descending)
+    )
+    after = measure(
+        "after, unsorted input", rows, lambda: orion.json_to_gdf(descending)
+    )
+    pd.testing.assert_frame_equal(before, after)
+
+    measure("before, sorted input", rows, lambda: json_to_gdf_before(ascending))
+    measure("after, sorted input", rows, lambda: orion.json_to_gdf(ascending))
+    measure(
+        "after, sorted input, UTC", rows, lambda: orion.json_to_gdf(ascending, None)
+    )
+
+    batch = AisBatch.from_ais(ascending)
+    measure("after, AisBatch", rows, lambda: orion.json_to_gdf(batch))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
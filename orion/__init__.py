@@ -1,2 +1,5 @@
+from .async_client import AsyncOrion  # noqa F401
+from .async_historic import AsyncHistoricOrion  # noqa F401
 from .client import Orion  # noqa F401
+from .enrich import AisAccessor  # noqa F401
 from .historic import HistoricOrion  # noqa F401
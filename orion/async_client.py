@@ -0,0 +1,478 @@
+"""
+AsyncOrion, an asyncio version of Orion for the Barentswatch API.
+
+It has the same methods for fetching data as Orion, but they are coroutines,
+so one event loop can keep many requests in flight. The number of requests in
+flight is limited by `max_concurrency`. The helpers for working with the data,
+like json_to_gdf and ais_to_line, are shared with Orion through BaseOrion and
+are not async.
+
+Example:
+import asyncio
+from orion import AsyncOrion
+
+async def main():
+    async with AsyncOrion() as orion:
+        ais = await orion.get_multiple_ais([257055990, 257055930])
+
+asyncio.run(main())
+"""
+
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Type
+
+import httpx
+
+from orion.cache import TrackCache
+from orion.client import DEFAULT_WORKERS, BaseOrion
+from orion.stream import LIVE_AIS_SSE, AisStream
+from orion.token import AsyncTokenManager
+from orion.types.ais import Ais, MultipleAisResult
+from orion.types.batch import AisBatch
+from orion.urls import URLS
+from orion.utils.dates import format_date, parse_date, split_time_range
+
+_log_fmt = "%(asctime)s - %(module)s - %(levelname)s - %(message)s"
+logging.basicConfig(level=os.environ.get("LOGLEVEL", "INFO"), format=_log_fmt)
+logger = logging.getLogger(__name__)
+
+# Maximum number of requests in flight at the same time
+DEFAULT_CONCURRENCY = 32
+
+# Seconds before a request to the API times out
+DEFAULT_TIMEOUT = 60.0
+
+
+class AsyncOrion(BaseOrion):
+    """Asyncio interface to Barentswatch API
+
+    Credentials are handled the same way as in Orion. The token is fetched on
+    the first request, and refreshed before it expires or when a request comes
+    back as unauthorized. A cache is read and written in the event loop, the
+    queries to SQLite are short compared to the requests.
+
+    async with AsyncOrion(max_concurrency=100) as orion:
+        ais = await orion.get_ais_last_24H(257055990)
+
+    Args:
+            client_id (Optional[str]): id for your user at Barentswatch.
+                Use if not set in .env file.
+            client_secret (Optional[str]): secret for your user at Barentswatch.
+                Use if not set in .env file.
+            skip_auth (Optional[bool]): skip authentication. Useful for testing.
+            max_concurrency (int): maximum number of requests in flight.
+            token_file (Optional[str]): keep the token in this file, so it can be
+                reused by the next run. Use if not set as TOKEN_FILE in .env file.
+            cache (Optional[TrackCache]): keep the tracks from get_ais in a local
+                cache, and only fetch what is not in the cache.
+            enrich (bool): add jurisdiction and shipTypeTxt to every position.
+                Defaults to True.
+    """
+
+    def __init__(
+        self,
+        client_id: Optional[str] = None,
+        client_secret: Optional[str] = None,
+        skip_auth: Optional[bool] = False,
+        max_concurrency: int = DEFAULT_CONCURRENCY,
+        token_file: Optional[str] = None,
+        cache: Optional[TrackCache] = None,
+        enrich: bool = True,
+    ) -> None:
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.session = httpx.AsyncClient(timeout=DEFAULT_TIMEOUT)
+        self.tokens = AsyncTokenManager(self._fetch_token)
+        self.cache = cache
+        self.enrich = enrich
+
+        if skip_auth:
+            return
+        self._set_credentials(client_id, client_secret)
+
+        self.tokens = AsyncTokenManager(
+            self._fetch_token, self._token_store(token_file)
+        )
+
+    async def __aenter__(self) -> "AsyncOrion":
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        tb: object,
+    ) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """
+        Close the connections to the API
+        """
+        await self.session.aclose()
+
+    @property
+    def access(self) -> str:
+        """
+        The current token
+        """
+        return self.tokens.access
+
+    async def authenticate(self) -> None:
+        """
+        Authenticate with Barentswatch, fetching a new token
+        """
+        await self.tokens.refresh()
+
+    async def _fetch_token(self) -> Dict[str, object]:
+        """
+        Fetch a new token from Barentswatch
+
+        Returns:
+            Dict[str, object]: json with access_token and expires_in
+        """
+        body, auth = self._token_body()
+
+        response = await self.session.post(
+            URLS["TOKEN"],
+            content=body,
+            auth=auth,
+            headers={"Content-Type": "application/x-www-form-urlencoded"},
+        )
+        response.raise_for_status()
+
+        return response.json()
+
+    async def _request(  # type: ignore[misc]
+        self, method: str, url: str, **kwargs: Any
+    ) -> httpx.Response:
+        """
+        Send an authorized request, refreshing the token once if it has expired
+        """
+        async with self._semaphore:
+            token = await self.tokens.get()
+            response = await self.session.request(
+                method, url, headers={"Authorization": f"Bearer {token}"}, **kwargs
+            )
+
+            if response.status_code == httpx.codes.UNAUTHORIZED:
+                logger.info("Fetching new token as the previous token expired")
+                token = await self.tokens.refresh(token)
+                response = await self.session.request(
+                    method, url, headers={"Authorization": f"Bearer {token}"}, **kwargs
+                )
+
+            return response
+
+    def stream_ais(self, url: str = LIVE_AIS_SSE, **kwargs: object) -> AisStream:
+        """
+        Stream live AIS positions, with the token of this client
+
+        Args:
+            url (str): the feed. Defaults to LIVE_AIS_SSE.
+            **kwargs: the other arguments of AisStream
+
+        Returns:
+            AisStream: the stream, to be used with async with. The positions get
+                jurisdiction and shipTypeTxt when enrich is set.
+        """
+        if self.enrich:
+            kwargs.setdefault("decorate", self.add_jurisdiction_and_ship_type)
+        return AisStream(url, tokens=self.tokens, **kwargs)  # type: ignore[arg-type]
+
+    async def get_ais_last_24H(self, mmsi: int) -> List[Ais]:
+        """
+        Get AIS for a ship last 24 hour
+
+        Args:
+            mmsi (int): Maritime Mobile Service Identity (MMSI) is used as
+            an uinique identifer for a ship
+
+        Returns:
+            json: json of ais track
+        """
+
+        if not self.mmsi.is_valid_ship_mmsi(mmsi):
+            raise ValueError("Please provide a valid ship mmsi")
+
+        response = await self._request(
+            "GET", f"{URLS['HISTORIC_AIS']}/historic/trackslast24hours/{mmsi}"
+        )
+        return self.decorate_ais_response(response)
+
+    async def get_ais(
+        self,
+        mmsi: int,
+        fromDate: str,
+        toDate: str,
+        chunk: Optional[timedelta] = None,
+        workers: int = DEFAULT_WORKERS,
+    ) -> List[Ais]:
+        """
+        Get AIS for a ship in a give timeframe
+
+        Args:
+            mmsi (int): Maritime Mobile Service Identity (MMSI) is used as an uinique
+                identifer for a ship
+            fromDate (str):  start of timeframe example: 2021-07-21T00:00:00Z
+            toDate (str): end of timeframe example:  2021-07-23T18:00:00Z
+            chunk (timedelta, optional): split the timeframe into windows of this
+                length and fetch them concurrently. The track is then sorted by
+                msgtime and positions found in two windows are only kept once.
+                Defaults to None, the whole timeframe in one request.
+            workers (int, optional): Not used, the number of requests in flight
+                is limited by max_concurrency. Kept for the same signature as Orion.
+
+        When the client has a cache, only the parts of the timeframe that are not
+        in the cache are fetched, and the track is returned sorted by msgtime.
+
+        Returns:
+            json: json of ais track
+        """
+
+        if not self.mmsi.is_valid_ship_mmsi(mmsi):
+            raise ValueError("Please provide a valid ship mmsi")
+
+        if self.cache is not None:
+            ais = await self._get_ais_cached(mmsi, fromDate, toDate, chunk)
+        else:
+            ais = await self._fetch_ais(mmsi, fromDate, toDate, chunk)
+
+        return self._enriched(ais)
+
+    async def _get_ais_cached(
+        self,
+        mmsi: int,
+        fromDate: str,
+        toDate: str,
+        chunk: Optional[timedelta] = None,
+    ) -> List[Ais]:
+        """
+        Get AIS for a ship from the cache, fetching only the parts of the
+        timeframe that are not in the cache yet, see Orion._get_ais_cached
+        """
+        if self.cache is None:  # pragma: no cover
+            raise ValueError("No cache set on the client")
+
+        start = parse_date(fromDate)
+        end = parse_date(toDate)
+        # Positions for the last minutes may still come in, only the past is final
+        now = datetime.now(timezone.utc)
+
+        for gap_start, gap_end in self._cache_gaps(mmsi, start, end):
+            ais = await self._fetch_ais(
+                mmsi, format_date(gap_start), format_date(gap_end), chunk
+            )
+            self.cache.add(mmsi, gap_start, min(gap_end, now), ais)
+
+        return self.cache.get(mmsi, start, end)
+
+    async def _fetch_ais(
+        self,
+        mmsi: int,
+        fromDate: str,
+        toDate: str,
+        chunk: Optional[timedelta] = None,
+    ) -> List[Ais]:
+        """
+        Get AIS for a ship from the API, in one request or in windows of chunk
+        """
+        if chunk is None:
+            return await self._get_ais(mmsi, fromDate, toDate)
+
+        windows = split_time_range(parse_date(fromDate), parse_date(toDate), chunk)
+        tracks = await asyncio.gather(
+            *(
+                self._get_ais(mmsi, format_date(start), format_date(end))
+                for start, end in windows
+            )
+        )
+        return self.merge_tracks(tracks)
+
+    async def _get_ais(self, mmsi: int, fromDate: str, toDate: str) -> List[Ais]:
+        """
+        Get AIS for a ship in a give timeframe in one request, see get_ais. The
+        positions are not enriched.
+        """
+        response = await self._request(
+            "GET",
+            f"{URLS['HISTORIC_AIS']}/historic/tracks/{mmsi}/{fromDate}/{toDate}",
+        )
+        return self._ais_response(response)
+
+    async def get_multiple_ais(
+        self,
+        mmsis: List[int],
+        fromDate: Optional[str] = None,
+        toDate: Optional[str] = None,
+    ) -> List[Ais]:
+        """
+        Get AIS data from multiple ships in a give timeframe. All the ships are
+        requested at once, limited by max_concurrency.
+
+        Args:
+            mmsis (Array(int)): An array of MMSIs
+            fromDate (str, optional): The start of the timeframe,
+                if not given the function will get last 24H. Defaults to None.
+            toDate (str, optional): The end of the timeframe, if not given the
+                function will get last 24H. Defaults to None.
+
+        Returns:
+            Array: Json of combined AIS tracks
+        """
+        for mmsi in mmsis:
+            if not self.mmsi.is_valid_ship_mmsi(mmsi):
+                raise ValueError("Please provide a valid ship mmsi")
+
+        tracks = await asyncio.gather(
+            *(self._get_track(mmsi, fromDate, toDate) for mmsi in mmsis)
+        )
+        return [a for track in tracks for a in track]
+
+    async def get_ais_batch(
+        self,
+        mmsis: List[int],
+        fromDate: Optional[str] = None,
+        toDate: Optional[str] = None,
+    ) -> AisBatch:
+        """
+        Get AIS data from multiple ships in a give timeframe as columns, see
+        get_multiple_ais
+
+        Args:
+            mmsis (Array(int)): An array of MMSIs
+            fromDate (str, optional): The start of the timeframe,
+                if not given the function will get last 24H. Defaults to None.
+            toDate (str, optional): The end of the timeframe, if not given the
+                function will get last 24H. Defaults to None.
+
+        Each track is turned into columns as soon as it is fetched, without
+        combining the dicts of all the ships first.
+
+        Returns:
+            AisBatch: the positions of all the ships
+        """
+        for mmsi in mmsis:
+            if not self.mmsi.is_valid_ship_mmsi(mmsi):
+                raise ValueError("Please provide a valid ship mmsi")
+
+        async def fetch(mmsi: int) -> AisBatch:
+            return AisBatch.from_ais(await self._get_track(mmsi, fromDate, toDate))
+
+        return AisBatch.concat(await asyncio.gather(*(fetch(mmsi) for mmsi in mmsis)))
+
+    async def fetch_multiple_ais(
+        self,
+        mmsis: List[int],
+        fromDate: Optional[str] = None,
+        toDate: Optional[str] = None,
+        workers: int = DEFAULT_WORKERS,
+    ) -> MultipleAisResult:
+        """
+        Get AIS data from multiple ships, keeping the track of each ship separate
+        and reporting the ships that failed
+
+        Args:
+            mmsis (Array(int)): An array of MMSIs
+            fromDate (str, optional): The start of the timeframe,
+                if not given the function will get last 24H. Defaults to None.
+            toDate (str, optional): The end of the timeframe, if not given the
+                function will get last 24H. Defaults to None.
+            workers (int, optional): Not used, the number of requests in flight
+                is limited by max_concurrency. Kept for the same signature as Orion.
+
+        Returns:
+            MultipleAisResult: tracks per MMSI in the order given, and errors per
+                MMSI for the ships that could not be fetched
+        """
+        for mmsi in mmsis:
+            if not self.mmsi.is_valid_ship_mmsi(mmsi):
+                raise ValueError("Please provide a valid ship mmsi")
+
+        tracks = await asyncio.gather(
+            *(self._get_track(mmsi, fromDate, toDate) for mmsi in mmsis),
+            return_exceptions=True,
+        )
+
+        result = MultipleAisResult()
+        for mmsi, track in zip(mmsis, tracks):
+            if isinstance(track, (httpx.HTTPError, ValueError)):
+                logger.warning(f"Could not get AIS for {mmsi}: {track}")
+                result.errors[mmsi] = track
+            elif isinstance(track, BaseException):
+                raise track
+            else:
+                result.ais[mmsi] = track
+
+        return result
+
+    async def _get_track(
+        self, mmsi: int, fromDate: Optional[str], toDate: Optional[str]
+    ) -> List[Ais]:
+        if (not fromDate) or (not toDate):
+            return await self.get_ais_last_24H(mmsi)
+        return await self.get_ais(mmsi, fromDate, toDate)
+
+    async def get_mmsis_in_area(
+        self,
+        geometry: Dict[str, object],
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+    ) -> List[Dict[str, object]]:
+        """
+        Get AIS for ships in given area inside the timeframe
+
+        Areas larger than the limit of the API (MAX_API_AREA) are split into
+        tiles that are queried concurrently, and each ship is only returned once.
+
+        Args:
+            geometry (Dict[str, object]): GeoJSON geometry
+            from_date (datetime, optional): The start of the timeframe, if not given
+                the function will get last 24H. Defaults to None.
+            to_date (datetime, optional): The end of the timeframe, if not given
+                the function will get last 24H. Defaults to None.
+        """
+        bodies = self._area_bodies(geometry, from_date, to_date)
+
+        if len(bodies) == 1:
+            return await self._post_area(bodies[0])
+
+        responses = await asyncio.gather(*(self._post_area(b) for b in bodies))
+        return self.merge_area_responses(responses)
+
+    async def _post_area(self, body: Dict[str, object]) -> List[Dict[str, object]]:
+        response = await self._request(
+            "POST", f"{URLS['HISTORIC_AIS']}/historic/mmsiinarea/", json=body
+        )
+        response.raise_for_status()
+
+        return response.json()
+
+    async def get_mmsis_in_area_around_point(
+        self,
+        lat: float,
+        lon: float,
+        distance: int,
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+    ) -> List[Dict[str, object]]:
+        """
+        Get AIS data from ships inside the geometry in a give timeframe
+
+        Args:
+            lat (float): latitude
+            lon (float): longitude
+            distance (int): distance in meters
+            from_date (str, optional): The start of the timeframe,
+                if not given the function will get last 24H. Defaults to None.
+            to_date (str, optional): The end of the timeframe,
+                if not given the function will get last 24H. Defaults to None.
+
+        Returns:
+            Array: Json of combined AIS tracks
+        """
+        geometry = self.buffer_around_point(lat, lon, distance)
+
+        return await self.get_mmsis_in_area(geometry, from_date, to_date)
@@ -0,0 +1,323 @@
+"""
+AsyncHistoricOrion, an asyncio version of HistoricOrion for the Kystdatahuset API.
+
+Example:
+import asyncio
+from orion import AsyncHistoricOrion
+
+async def main():
+    async with AsyncHistoricOrion() as orion:
+        ais = await orion.get_ais(257055990, "2023-01-01T00:00:00Z", "2023-01-02T00:00:00Z")
+
+asyncio.run(main())
+"""  # noqa: E501
+
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import httpx
+import pandas as pd
+
+from orion.async_client import DEFAULT_CONCURRENCY, DEFAULT_TIMEOUT, AsyncOrion
+from orion.cache import TrackCache
+from orion.client import DEFAULT_WORKERS
+from orion.historic import DEFAULT_BATCH_SIZE, BaseHistoricOrion, positions_to_frame
+from orion.types.ais import Ais, MultipleAisResult
+from orion.types.batch import AisBatch
+from orion.urls import URLS
+
+_log_fmt = "%(asctime)s - %(module)s - %(levelname)s - %(message)s"
+logging.basicConfig(level=os.environ.get("LOGLEVEL", "INFO"), format=_log_fmt)
+logger = logging.getLogger(__name__)
+
+
+class AsyncHistoricOrion(BaseHistoricOrion, AsyncOrion):
+    """Asyncio interface to Kystdatahuset API
+
+    The API is open, so no credentials are needed.
+
+    async with AsyncHistoricOrion() as orion:
+        ais = await orion.get_ais_last_24H(257055990)
+
+    Args:
+            max_concurrency (int): maximum number of requests in flight.
+            cache (Optional[TrackCache]): keep the tracks from get_ais in a local
+                cache, and only fetch what is not in the cache.
+            enrich (bool): add jurisdiction and shipTypeTxt to every position.
+                Defaults to True.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = DEFAULT_CONCURRENCY,
+        cache: Optional[TrackCache] = None,
+        enrich: bool = True,
+    ) -> None:
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.session = httpx.AsyncClient(timeout=DEFAULT_TIMEOUT)
+        self.cache = cache
+        self.enrich = enrich
+
+    async def _request(  # type: ignore[misc]
+        self, method: str, url: str, **kwargs: Any
+    ) -> httpx.Response:
+        async with self._semaphore:
+            return await self.session.request(method, url, **kwargs)
+
+    async def get_ais_last_24H(self, mmsi: int) -> List[Ais]:
+        """
+        Get AIS for a ship last 24 hour
+
+        Args:
+            mmsi (int): Maritime Mobile Service Identity (MMSI) is used as
+            an uinique identifer for a ship
+
+        Returns:
+            json: json of ais track
+        """
+
+        if not self.mmsi.is_valid_ship_mmsi(mmsi):
+            raise ValueError("Please provide a valid ship mmsi")
+        now = datetime.now()
+        fromDate = now - timedelta(days=1)
+        return await self.get_ais(mmsi, fromDate.isoformat(), now.isoformat())
+
+    async def _get_ais(self, mmsi: int, fromDate: str, toDate: str) -> List[Ais]:
+        """
+        Get AIS for a ship in a give timeframe in one request, see get_ais. The
+        positions are not enriched.
+        """
+        response = await self._request(
+            "POST",
+            f"{URLS['KYSTDATAHUSET']}/ais/positions/for-mmsis-time",
+            json=self._ais_body([mmsi], fromDate, toDate),
+        )
+        return self._ais_response(response)
+
+    async def get_ais_for_mmsis(
+        self, mmsis: List[int], fromDate: str, toDate: str
+    ) -> Dict[int, List[Ais]]:
+        """
+        Get AIS for several ships in a give timeframe in one request
+
+        Args:
+            mmsis (List[int]): the MMSIs of the ships
+            fromDate (str):  start of timeframe example: 2021-07-21T00:00:00Z
+            toDate (str): end of timeframe example:  2021-07-23T18:00:00Z
+
+        Returns:
+            Dict[int, List[Ais]]: track per MMSI, in the order given. Ships
+                without positions get an empty track.
+        """
+        for mmsi in mmsis:
+            if not self.mmsi.is_valid_ship_mmsi(mmsi):
+                raise ValueError("Please provide a valid ship mmsi")
+
+        response = await self._request(
+            "POST",
+            f"{URLS['KYSTDATAHUSET']}/ais/positions/for-mmsis-time",
+            json=self._ais_body(mmsis, fromDate, toDate),
+        )
+        return self._tracks(mmsis, self.decorate_ais_response(response))
+
+    async def get_multiple_ais(
+        self,
+        mmsis: List[int],
+        fromDate: Optional[str] = None,
+        toDate: Optional[str] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> List[Ais]:
+        """
+        Get AIS data from multiple ships in a give timeframe. The ships are
+        fetched batch_size at a time, in one request per batch, and the batches
+        are requested at once, limited by max_concurrency. Each ship is only
+        fetched once, but the tracks are returned in the order of mmsis.
+
+        Args:
+            mmsis (Array(int)): An array of MMSIs
+            fromDate (str, optional): The start of the timeframe,
+                if not given the function will get last 24H. Defaults to None.
+            toDate (str, optional): The end of the timeframe, if not given the
+                function will get last 24H. Defaults to None.
+            batch_size (int, optional): Number of ships in each request.
+                Defaults to DEFAULT_BATCH_SIZE.
+
+        Returns:
+            Array: Json of combined AIS tracks
+        """
+        if self.cache is not None:
+            return await super().get_multiple_ais(mmsis, fromDate, toDate)
+
+        for mmsi in mmsis:
+            if not self.mmsi.is_valid_ship_mmsi(mmsi):
+                raise ValueError("Please provide a valid ship mmsi")
+
+        fromDate, toDate = self._timeframe(fromDate, toDate)
+        batches = await asyncio.gather(
+            *(
+                self.get_ais_for_mmsis(batch, fromDate, toDate)
+                for batch in self._batches(mmsis, batch_size)
+            )
+        )
+
+        tracks: Dict[int, List[Ais]] = {}
+        for batch in batches:
+            tracks.update(batch)
+        return [a for mmsi in mmsis for a in tracks[mmsi]]
+
+    async def fetch_multiple_ais(
+        self,
+        mmsis: List[int],
+        fromDate: Optional[str] = None,
+        toDate: Optional[str] = None,
+        workers: int = DEFAULT_WORKERS,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> MultipleAisResult:
+        """
+        Get AIS data from multiple ships, keeping the track of each ship separate
+        and reporting the ships that failed. The ships are fetched batch_size at
+        a time, in one request per batch.
+
+        Args:
+            mmsis (Array(int)): An array of MMSIs
+            fromDate (str, optional): The start of the timeframe,
+                if not given the function will get last 24H. Defaults to None.
+            toDate (str, optional): The end of the timeframe, if not given the
+                function will get last 24H. Defaults to None.
+            workers (int, optional): Not used, the number of requests in flight
+                is limited by max_concurrency. Kept for the same signature as
+                HistoricOrion.
+            batch_size (int, optional): Number of ships in each request.
+                Defaults to DEFAULT_BATCH_SIZE.
+
+        Returns:
+            MultipleAisResult: tracks per MMSI in the order given, and errors per
+                MMSI for the ships that could not be fetched. A ship given twice
+                has one track, see MultipleAisResult.combined.
+        """
+        if self.cache is not None:
+            return await super().fetch_multiple_ais(mmsis, fromDate, toDate)
+
+        for mmsi in mmsis:
+            if not self.mmsi.is_valid_ship_mmsi(mmsi):
+                raise ValueError("Please provide a valid ship mmsi")
+
+        fromDate, toDate = self._timeframe(fromDate, toDate)
+        batches = self._batches(mmsis, batch_size)
+        tracks = await asyncio.gather(
+            *(self.get_ais_for_mmsis(batch, fromDate, toDate) for batch in batches),
+            return_exceptions=True,
+        )
+
+        result = MultipleAisResult()
+        for batch, track in zip(batches, tracks):
+            if isinstance(track, (httpx.HTTPError, ValueError)):
+                logger.warning(f"Could not get AIS for {batch}: {track}")
+                result.errors.update({mmsi: track for mmsi in batch})
+            elif isinstance(track, BaseException):
+                raise track
+            else:
+                result.ais.update(track)
+
+        return result
+
+    async def get_ais_batch(
+        self,
+        mmsis: List[int],
+        fromDate: Optional[str] = None,
+        toDate: Optional[str] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> AisBatch:
+        """
+        Get AIS data from multiple ships in a give timeframe as columns, see
+        HistoricOrion.get_ais_batch. With a cache, see AsyncOrion.get_ais_batch.
+
+        Args:
+            mmsis (Array(int)): An array of MMSIs
+            fromDate (str, optional): The start of the timeframe,
+                if not given the function will get last 24H. Defaults to None.
+            toDate (str, optional): The end of the timeframe, if not given the
+                function will get last 24H. Defaults to None.
+            batch_size (int, optional): Number of ships in each request.
+                Defaults to DEFAULT_BATCH_SIZE.
+
+        Returns:
+            AisBatch: the positions of all the ships
+        """
+        if self.cache is not None:
+            return await super().get_ais_batch(mmsis, fromDate, toDate)
+
+        start, end = self._timeframe(fromDate, toDate)
+        frames = await asyncio.gather(
+            *(
+                self.get_ais_frame(batch, start, end)
+                for batch in self._batches(mmsis, batch_size)
+            )
+        )
+        return AisBatch.concat(AisBatch.from_frame(frame) for frame in frames)
+
+    async def get_ais_frame(  # type: ignore[no-any-unimported]
+        self, mmsis: List[int], fromDate: str, toDate: str, extra: bool = False
+    ) -> pd.DataFrame:
+        """
+        Get AIS for ships in a give timeframe as a dataframe, see
+        HistoricOrion.get_ais_frame
+
+        Args:
+            mmsis (List[int]): the MMSIs of the ships
+            fromDate (str):  start of timeframe example: 2021-07-21T00:00:00Z
+            toDate (str): end of timeframe example:  2021-07-23T18:00:00Z
+            extra (bool): keep calcSpeed, secPrevPoint and distPrevPoint.
+                Defaults to False.
+
+        Returns:
+            pd.DataFrame: one row per position
+        """
+        for mmsi in mmsis:
+            if not self.mmsi.is_valid_ship_mmsi(mmsi):
+                raise ValueError("Please provide a valid ship mmsi")
+
+        response = await self._request(
+            "POST",
+            f"{URLS['KYSTDATAHUSET']}/ais/positions/for-mmsis-time",
+            json=self._ais_body(mmsis, fromDate, toDate),
+        )
+        return positions_to_frame(self._positions(response), extra=extra)
+
+    async def get_mmsis_in_area(
+        self,
+        geometry: Dict[str, object],
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+        exact: bool = True,
+    ) -> List[Dict[str, object]]:
+        """
+        Get AIS for ships in given area inside the timeframe
+
+        Args:
+            geometry (Dict[str, object]): GeoJSON geometry
+            from_date (datetime, optional): The start of the timeframe in
+            ISO8601, if not given the function will get last 24H. Defaults to
+            None.
+            to_date (datetime, optional): The end of the timeframe in ISO8601
+            format, if not given the function will get last 24H. Defaults to
+            None.
+            exact (bool, optional): The API returns every position in the
+            bounding box of the geometry. Only keep the positions inside the
+            geometry. Defaults to True.
+        """
+        area = self._area_geometry(geometry)
+        body = self._area_body(area, from_date, to_date)
+
+        response = await self._request(
+            "POST",
+            f"{URLS['KYSTDATAHUSET']}/ais/positions/within-bbox-time",
+            json=body,
+        )
+        ais = self.decorate_area_response(response)
+        if exact:
+            ais = self.filter_in_area(ais, area)
+        return ais  # type: ignore[return-value]
@@ -0,0 +1,173 @@
+"""
+TrackCache, a local store of AIS tracks in a SQLite database.
+
+The cache keeps the positions of each ship, and the timeframes that have been
+fetched for it. When a timeframe is asked for again, only the parts that have
+not been fetched before need to be requested from the API.
+
+Example:
+from orion import Orion
+from orion.cache import TrackCache
+
+orion = Orion(cache=TrackCache("tracks.sqlite"))
+"""
+
+import json
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+from orion.types.ais import Ais
+from orion.utils.dates import parse_date
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS positions (
+    mmsi INTEGER NOT NULL,
+    msgtime REAL NOT NULL,
+    ais TEXT NOT NULL,
+    PRIMARY KEY (mmsi, msgtime)
+);
+CREATE TABLE IF NOT EXISTS intervals (
+    mmsi INTEGER NOT NULL,
+    start REAL NOT NULL,
+    end REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS intervals_mmsi ON intervals (mmsi, start);
+"""
+
+
+def _to_datetime(timestamp: float) -> datetime:
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc)
+
+
+class TrackCache:
+    """
+    Keeps AIS tracks per ship in a SQLite database. Use one database per API, the
+    positions from Barentswatch and Kystdatahuset have different fields.
+
+    Args:
+        path (str): path to the database file, created if it does not exist.
+            Use ":memory:" for a cache that only lives as long as the object.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.executescript(SCHEMA)
+
+    def close(self) -> None:
+        """
+        Close the database
+        """
+        with self._lock:
+            self._connection.close()
+
+    def missing(
+        self, mmsi: int, start: datetime, end: datetime
+    ) -> List[Tuple[datetime, datetime]]:
+        """Find the parts of a timeframe that are not in the cache
+
+        Args:
+            mmsi (int): mmsi number
+            start (datetime): start of the timeframe, timezone aware
+            end (datetime): end of the timeframe, timezone aware
+
+        Returns:
+            List[Tuple[datetime, datetime]]: start and end of each missing part
+        """
+        with self._lock:
+            stored = self._connection.execute(
+                "SELECT start, end FROM intervals "
+                "WHERE mmsi = ? AND end >= ? AND start <= ? ORDER BY start",
+                (mmsi, start.timestamp(), end.timestamp()),
+            ).fetchall()
+
+        gaps = []
+        cursor = start.timestamp()
+        for stored_start, stored_end in stored:
+            if stored_start > cursor:
+                gaps.append((_to_datetime(cursor), _to_datetime(stored_start)))
+            cursor = max(cursor, stored_end)
+
+        if cursor < end.timestamp():
+            gaps.append((_to_datetime(cursor), _to_datetime(end.timestamp())))
+
+        return gaps
+
+    def add(self, mmsi: int, start: datetime, end: datetime, ais: List[Ais]) -> None:
+        """Store the track of a ship, and mark the timeframe as fetched
+
+        Args:
+            mmsi (int): mmsi number
+            start (datetime): start of the timeframe that was fetched
+            end (datetime): end of the timeframe that was fetched
+            ais (List[Ais]): the track
+        """
+        rows = [
+            (mmsi, parse_date(a["msgtime"]).timestamp(), json.dumps(a)) for a in ais
+        ]
+
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO positions VALUES (?, ?, ?)", rows
+            )
+            if end > start:
+                self._add_interval(mmsi, start.timestamp(), end.timestamp())
+
+    def _add_interval(self, mmsi: int, start: float, end: float) -> None:
+        # merge with the intervals that overlap or touch the new one
+        overlapping = self._connection.execute(
+            "SELECT rowid, start, end FROM intervals "
+            "WHERE mmsi = ? AND end >= ? AND start <= ?",
+            (mmsi, start, end),
+        ).fetchall()
+
+        for rowid, stored_start, stored_end in overlapping:
+            start = min(start, stored_start)
+            end = max(end, stored_end)
+            self._connection.execute("DELETE FROM intervals WHERE rowid = ?", (rowid,))
+
+        self._connection.execute(
+            "INSERT INTO intervals VALUES (?, ?, ?)", (mmsi, start, end)
+        )
+
+    def get(self, mmsi: int, start: datetime, end: datetime) -> List[Ais]:
+        """Get the track of a ship from the cache
+
+        Args:
+            mmsi (int): mmsi number
+            start (datetime): start of the timeframe
+            end (datetime): end of the timeframe
+
+        Returns:
+            List[Ais]: the track, sorted by msgtime
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT ais FROM positions "
+                "WHERE mmsi = ? AND msgtime BETWEEN ? AND ? ORDER BY msgtime",
+                (mmsi, start.timestamp(), end.timestamp()),
+            ).fetchall()
+
+        return [json.loads(row[0]) for row in rows]
+
+    def clear(self, mmsi: Optional[int] = None) -> None:
+        """Remove tracks from the cache
+
+        Args:
+            mmsi (Optional[int]): only remove this ship. Defaults to None, all ships.
+        """
+        with self._lock, self._connection:
+            if mmsi is None:
+                self._connection.execute("DELETE FROM positions")
+                self._connection.execute("DELETE FROM intervals")
+            else:
+                self._connection.execute(
+                    "DELETE FROM positions WHERE mmsi = ?", (mmsi,)
+                )
+                self._connection.execute(
+                    "DELETE FROM intervals WHERE mmsi = ?", (mmsi,)
+                )
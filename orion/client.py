@@ -15,20 +15,37 @@ import logging
 import math
 import os
 import urllib.parse
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Union
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 
 import dotenv
 import geopandas
+import httpx
+import numpy as np
+import numpy.typing as npt
 import pandas as pd
-import pytz
 import requests
+import shapely
 from requests.auth import HTTPBasicAuth
-from shapely.geometry import LineString, Point
+from shapely.geometry import LineString
 
+from orion.cache import TrackCache
 from orion.mmsi import MmsiMixin
-from orion.types.ais import Ais
+from orion.projection import apply_in_local_crs
+from orion.spatial import BUFFER_RESOLUTION, buffer_points, tile_geometry
+from orion.token import TokenManager, TokenStore
+from orion.tracks import points_to_tracks
+from orion.types.ais import Ais, MultipleAisResult
+from orion.types.batch import AisBatch
 from orion.urls import URLS
+from orion.utils.dates import (
+    format_date,
+    parse_date,
+    parse_msgtimes,
+    round_time_range,
+    split_time_range,
+)
 from orion.vessel_codes import VesselCodeMixin
 
 project_dir = os.path.join(os.path.dirname(__file__), os.pardir)
@@ -41,33 +58,78 @@ logger = logging.getLogger(__name__)
 
 CLIENT_ID = os.getenv("CLIENT_ID", None)
 CLIENT_SECRET = os.getenv("CLIENT_SECRET", None)
+TOKEN_FILE = os.getenv("TOKEN_FILE", None)
 
+# Number of concurrent requests used when fetching AIS for several ships
+DEFAULT_WORKERS = 8
 
-class Orion(MmsiMixin, VesselCodeMixin):
-    """Interface to Barentswatch API
+# Largest area in km^2 the API accepts in get_mmsis_in_area
+MAX_API_AREA = 500
 
-    The CLIENT_ID and CLIENT_SECRET should be exposed as environment variables called
-    `CLIENT_ID` and `CLIENT_SECRET` or passed as parameters
-    when creating an instance of the class.
+# Timezone of msgtime in the GeoDataFrames from json_to_gdf
+DEFAULT_TIMEZONE = "Europe/Berlin"
 
-    orion = Orion(client_id="myclientid", client_secret="myclientsecret")
+# A response from the API, sent by Orion or AsyncOrion
+Response = Union[requests.models.Response, httpx.Response]
+
+
+def records_to_frame(  # type: ignore[no-any-unimported]
+    records: List[Ais],
+) -> pd.DataFrame:
+    """Turn a list of dicts into a dataframe, one column at a time
+
+    Numeric columns are made with NumPy directly instead of going through the
+    type inference pandas does for each value. Columns are in the order the
+    keys first appear, like pd.DataFrame(records).
 
     Args:
-            client_id (Optional[str]): id for your user at Barentswatch.
-                Use if not set in .env file.
-            client_secret (Optional[str]): secret for your user at Barentswatch.
-                Use if not set in .env file.
-            skip_auth (Optional[bool]): skip authentication. Useful for testing.
+        records (List[Ais]): the dicts
+
+    Returns:
+        pd.DataFrame: one row per dict
     """
+    if not records:
+        return pd.DataFrame()
 
-    def __init__(
-        self,
-        client_id: Optional[str] = None,
-        client_secret: Optional[str] = None,
-        skip_auth: Optional[bool] = False,
+    keys = list(records[0])
+    if len(set().union(*records)) > len(keys):
+        keys = list(dict.fromkeys(k for r in records for k in r))
+
+    columns = {}
+    for key in keys:
+        try:
+            values = [r[key] for r in records]  # type: ignore[literal-required]
+        except KeyError:
+            values = [r.get(key) for r in records]  # type: ignore[misc]
+        column = None
+        if isinstance(values[0], (int, float)) and not isinstance(values[0], bool):
+            column = np.array(values)
+        if column is None or column.dtype.kind not in "if":
+            column = pd.Series(values).to_numpy()
+        columns[key] = column
+
+    return pd.DataFrame(columns)
+
+
+class BaseOrion(MmsiMixin, VesselCodeMixin):
+    """
+    The parts of the clients that don't send requests, shared by Orion and
+    AsyncOrion: the credentials, decoding the responses and the helpers for
+    working with the data
+    """
+
+    cache: Optional[TrackCache] = None
+    enrich: bool = True
+
+    # Smallest step of the dates sent to the API, see format_date
+    time_resolution = timedelta(seconds=1)
+
+    def _set_credentials(
+        self, client_id: Optional[str], client_secret: Optional[str]
     ) -> None:
-        if skip_auth:
-            return
+        """
+        Set the client id and secret, falling back to the environment variables
+        """
         self.client_id = client_id or CLIENT_ID
         self.client_secret = client_secret or CLIENT_SECRET
 
@@ -84,51 +146,22 @@ class Orion(MmsiMixin, VesselCodeMixin):
         if type(self.client_secret) == str:  # pragma: no cover
             self.client_secret = urllib.parse.quote_plus(self.client_secret)
 
-        self.authenticate_session = requests.Session()  # Session for tokens
-        self.authenticate()
-        self.access = ""
-
-        self.session = requests.Session()
-        self.session.auth = self.auth  # type: ignore
-        self.session.hooks["response"].append(self.reauth)
-
-    def reauth(  # type: ignore
-        self, response: requests.models.Response, *args, **kwargs
-    ) -> requests.models.Response:
-        if response.status_code != requests.codes.unauthorized:
-            return response
-        logger.info("Fetching new token as the previous token expired")
-
-        if response.request.headers.get("REATTEMPT"):  # pragma: no cover
-            response.raise_for_status()
-
-        self.authenticate()
-        request = response.request
-        request.headers["REATTEMPT"] = "1"
-        if self.session.auth:
-            authenticated_request = self.auth(request)
-            response = self.session.send(authenticated_request)  # type: ignore
-            return response
-
-        raise ValueError(  # pragma: no cover
-            "No session object found. Please authenticate first."
-        )
-
-    def auth(
-        self,
-        request: Union[requests.models.Request, requests.models.PreparedRequest],
-    ) -> requests.models.Request:
+    def _token_store(self, token_file: Optional[str]) -> Optional[TokenStore]:
         """
-        Set the authentication token on every request
+        The store for the token of this client id, when a token file is set
         """
+        token_file = token_file or TOKEN_FILE
+        if not token_file:
+            return None
+        return TokenStore(token_file, self.client_id or "")
 
-        request.headers["Authorization"] = f"Bearer {self.access}"
-
-        return request  # type: ignore
-
-    def authenticate(self) -> None:
+    def _token_body(self) -> Tuple[str, Tuple[str, str]]:
         """
-        Authenticate with Barentswatch
+        The body of the request for a new token from Barentswatch
+
+        Returns:
+            Tuple[str, Tuple[str, str]]: the body, and the client id and client
+                secret to authenticate the request with
         """
         if not hasattr(self, "client_id") or not hasattr(self, "client_secret"):
             raise ValueError("Please provide a client id and client secret")
@@ -136,129 +169,105 @@ class Orion(MmsiMixin, VesselCodeMixin):
         if not self.client_id or not self.client_secret:  # pragma: no cover
             raise ValueError("Please provide a client id and client secret")
 
-        Headers = {"Content-Type": "application/x-www-form-urlencoded"}
-
         body = f"grant_type=client_credentials&client_id={self.client_id}&client_secret={self.client_secret}"  # noqa: E501
+        return body, (self.client_id, self.client_secret)
 
-        try:
-            response = self.authenticate_session.post(
-                URLS["TOKEN"],
-                data=body,
-                auth=HTTPBasicAuth(self.client_id, self.client_secret),
-                headers=Headers,
-            )
-            response.raise_for_status()
-            data = response.json()
-
-            self.access = data["access_token"]
-
-        except requests.exceptions.HTTPError as err:  # pragma: no cover
-            raise err
-
-    def get_ais_last_24H(self, mmsi: int) -> List[Ais]:
+    def merge_tracks(self, tracks: Iterable[List[Ais]]) -> List[Ais]:
         """
-        Get AIS for a ship last 24 hour
+        Merge tracks into one, sorted by msgtime. Positions with the same mmsi and
+        msgtime are only kept once.
 
         Args:
-            mmsi (int): Maritime Mobile Service Identity (MMSI) is used as
-            an uinique identifer for a ship
+            tracks (Iterable[List[Ais]]): the tracks to merge
 
         Returns:
-            json: json of ais track
+            List[Ais]: the merged track
         """
+        merged: Dict[Tuple[int, datetime], Ais] = {}
+        for track in tracks:
+            for a in track:
+                merged.setdefault((a["mmsi"], parse_date(a["msgtime"])), a)
 
-        if not self.mmsi.is_valid_ship_mmsi(mmsi):
-            raise ValueError("Please provide a valid ship mmsi")
+        return [merged[key] for key in sorted(merged, key=lambda key: key[1])]
 
-        try:
-            response = self.session.get(
-                f"{URLS['HISTORIC_AIS']}/historic/trackslast24hours/{mmsi}"
-            )
-            return self.decorate_ais_response(response)
-        except requests.exceptions.HTTPError as err:  # pragma: no cover
-            raise err
+    def decorate_ais_response(  # type: ignore[no-any-unimported]
+        self, response: Response
+    ) -> List[Ais]:
+        return self._enriched(self._ais_response(response))
 
-    def get_ais(self, mmsi: int, fromDate: str, toDate: str) -> List[Ais]:
+    def _ais_response(  # type: ignore[no-any-unimported]
+        self, response: Response
+    ) -> List[Ais]:
         """
-        Get AIS for a ship in a give timeframe
-
-        Args:
-            mmsi (int): Maritime Mobile Service Identity (MMSI) is used as an uinique
-                identifer for a ship
-            fromDate (str):  start of timeframe example: 2021-07-21T00:00:00Z
-            toDate (str): end of timeframe example:  2021-07-23T18:00:00Z
-
-        Returns:
-            json: json of ais track
+        The positions in a response, as the API returns them
         """
-
-        if not self.mmsi.is_valid_ship_mmsi(mmsi):
-            raise ValueError("Please provide a valid ship mmsi")
-
-        try:
-            response = self.session.get(
-                f"{URLS['HISTORIC_AIS']}/historic/tracks/{mmsi}/{fromDate}/{toDate}"
-            )
-            return self.decorate_ais_response(response)
-        except requests.exceptions.HTTPError as err:  # pragma: no cover
-            raise err
-
-    def decorate_ais_response(  # type: ignore[no-any-unimported]
-        self, response: requests.models.Response
-    ) -> List[Ais]:
         response.raise_for_status()
-        ais = response.json()
+        return response.json()
 
-        ais = self.add_jurisdiction_and_ship_type(ais)
+    def _enriched(self, ais: List[Ais]) -> List[Ais]:
+        """
+        Add jurisdiction and shipTypeTxt to the positions when enrich is set
+        """
+        if self.enrich:
+            ais = self.add_jurisdiction_and_ship_type(ais)
         return ais
 
-    def get_multiple_ais(
-        self,
-        mmsis: List[int],
-        fromDate: Optional[str] = None,
-        toDate: Optional[str] = None,
-    ) -> List[Ais]:
+    def _cache_gaps(
+        self, mmsi: int, start: datetime, end: datetime
+    ) -> List[Tuple[datetime, datetime]]:
         """
-        Get AIS data from multiple ships in a give timeframe
-
-        Args:
-            mmsis (Array(int)): An array of MMSIs
-            fromDate (datetime, optional): The start of the timeframe,
-                if not given the function will get last 24H. Defaults to None.
-            toDate (_type_, optional): The end of the timeframe, if not given the
-                function will get last 24H. Defaults to None.
-
-        Returns:
-            Array: Json of combined AIS tracks
+        The parts of a timeframe that are not in the cache, widened to dates the
+        API can be asked for, so the whole gap is fetched before it is marked as
+        cached
         """
-        ais = []
-
-        for mmsi in mmsis:
-            if not self.mmsi.is_valid_ship_mmsi(mmsi):
-                raise ValueError("Please provide a valid ship mmsi")
-
-            if (not fromDate) or (not toDate):
-                ais.extend(self.get_ais_last_24H(mmsi))
-            else:
-                ais.extend(self.get_ais(mmsi, fromDate, toDate))
+        if self.cache is None:  # pragma: no cover
+            raise ValueError("No cache set on the client")
 
-        return ais
+        return [
+            round_time_range(gap_start, gap_end, self.time_resolution)
+            for gap_start, gap_end in self.cache.missing(mmsi, start, end)
+        ]
 
-    def get_mmsis_in_area(
+    def _area_bodies(
         self,
         geometry: Dict[str, object],
         from_date: Optional[str] = None,
         to_date: Optional[str] = None,
     ) -> List[Dict[str, object]]:
         """
-        Get AIS for ships in given area inside the timeframe
+        The bodies of the requests for ships in an area, one per tile when the
+        area is larger than the limit of the API
+        """
+        body = self._area_body(geometry, from_date, to_date)
+        tiles = tile_geometry(body["polygon"], MAX_API_AREA)  # type: ignore[arg-type]
+
+        return [{**body, "polygon": tile} for tile in tiles]
+
+    def merge_area_responses(
+        self, responses: Iterable[List[Dict[str, object]]]
+    ) -> List[Dict[str, object]]:
+        """
+        Merge the responses from several areas, keeping each ship only once,
+        as it was in the first area it was found in
 
         Args:
-            geometry (Dict[str, object]): GeoJSON geometry
-            from_date (datetime, optional): The start of the timeframe, if not given
-                the function will get last 24H. Defaults to None.
-            to_date (datetime, optional): The end of the timeframe, if not given
-                the function will get last 24H. Defaults to None.
+            responses (Iterable[List[Dict[str, object]]]): responses from
+                get_mmsis_in_area, ships with an mmsi or MMSIs
+
+        Returns:
+            List[Dict[str, object]]: the ships in all the areas
+        """
+        merged: Dict[object, Dict[str, object]] = {}
+        for response in responses:
+            for ship in response:
+                mmsi = ship.get("mmsi") if isinstance(ship, dict) else ship
+                merged.setdefault(mmsi, ship)
+
+        return list(merged.values())
+
+    def _area_geometry(self, geometry: Dict[str, object]) -> Dict[str, object]:
+        """
+        The GeoJSON geometry of an area, the first feature of a FeatureCollection
         """
         # Check if features is present, if so pick the first one
         if "features" in geometry and len(geometry["features"]) > 0:  # type: ignore
@@ -267,33 +276,33 @@ class Orion(MmsiMixin, VesselCodeMixin):
         if "coordinates" not in geometry:
             raise ValueError("Geometry does not contain coordinates")
 
+        return geometry
+
+    def _area_body(
+        self,
+        geometry: Dict[str, object],
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+    ) -> Dict[str, object]:
+        """
+        The body of the request for ships in an area, see get_mmsis_in_area
+        """
+        geometry = self._area_geometry(geometry)
+
         if from_date is None or to_date is None:
             _from_date = datetime.now() - timedelta(days=1)
             _to_date = datetime.now()
             from_date = _from_date.strftime("%Y-%m-%dT%H:%M:%SZ")
             to_date = _to_date.strftime("%Y-%m-%dT%H:%M:%SZ")
 
-        body = {
+        return {
             "msgtimefrom": f"{from_date}",
             "msgtimeto": f"{to_date}",
             "polygon": geometry,
         }
 
-        try:
-            self.session.headers["Content-Type"] = "application/json"
-            response = self.session.post(
-                f"{URLS['HISTORIC_AIS']}/historic/mmsiinarea/",
-                json=body,
-            )
-            response.raise_for_status()
-
-            return response.json()
-
-        except requests.exceptions.HTTPError as err:  # pragma: no cover
-            raise err
-
     def buffer_around_point(  # type: ignore[no-any-unimported]
-        self, lat: float, lon: float, distance: int
+        self, lat: float, lon: float, distance: int, geodesic: bool = False
     ) -> geopandas.GeoDataFrame:
         """
         Create a buffer around a point
@@ -302,23 +311,49 @@ class Orion(MmsiMixin, VesselCodeMixin):
             lat (float): latitude
             lon (float): longitude
             distance (int): distance in meters
+            geodesic (bool): make a geodesic circle instead of buffering in
+                EPSG:23032, see orion.spatial.buffer_points. Defaults to False.
 
         Returns:
             str: GeoJSON geometry
         """
 
-        point = Point(lon, lat)
-        geo_point = geopandas.GeoSeries(point)
-        geo_point = geo_point.set_crs(epsg=4326)
+        buffered = buffer_points([lon], [lat], distance, geodesic=geodesic)[0]
 
-        geo_point_buffered = (
-            geo_point.to_crs(epsg=23032).buffer(distance).to_crs(epsg=4326)
-        )
+        return json.loads(shapely.to_geojson(buffered))
+
+    def buffer_around_points(  # type: ignore[no-any-unimported]
+        self,
+        lats: npt.ArrayLike,
+        lons: npt.ArrayLike,
+        distance: npt.ArrayLike,
+        geodesic: bool = False,
+    ) -> geopandas.GeoSeries:
+        """
+        Create buffers around many points at once, see
+        orion.spatial.buffer_points
+
+        Args:
+            lats (ArrayLike): latitude of each point
+            lons (ArrayLike): longitude of each point
+            distance (ArrayLike): distance in meters, one for all points or one
+                per point
+            geodesic (bool): make geodesic circles instead of buffering in
+                EPSG:23032. Defaults to False.
+
+        Returns:
+            GeoSeries: the buffers in EPSG:4326, in the order of the points
+        """
+        buffered = buffer_points(lons, lats, distance, geodesic=geodesic)
 
-        return json.loads(geo_point_buffered.to_json())["features"][0]["geometry"]
+        return geopandas.GeoSeries(buffered, crs=4326)
 
     def buffer_around_gdf(  # type: ignore[no-any-unimported]
-        self, gpd: geopandas.GeoDataFrame, distance: int, column: Optional[str] = None
+        self,
+        gpd: geopandas.GeoDataFrame,
+        distance: int,
+        column: Optional[str] = None,
+        local_crs: bool = False,
     ) -> geopandas.GeoDataFrame:
         """
         Create a buffer around a geopandas dataframe
@@ -326,6 +361,9 @@ class Orion(MmsiMixin, VesselCodeMixin):
         Args:
             gpd (geopandas): geopandas dataframe
             distance (int): distance in meters
+            local_crs (bool): buffer each geometry in its UTM zone instead of
+                EPSG:23032, which is more accurate outside southern Norway, see
+                orion.projection.apply_in_local_crs. Defaults to False.
 
         Returns:
             geopandas: geopands dataframe with buffer
@@ -333,60 +371,52 @@ class Orion(MmsiMixin, VesselCodeMixin):
 
         geo_column = column or "geometry"
 
+        if local_crs:
+            geometries = gpd[geo_column].to_crs(epsg=4326).to_numpy()
+            buffered = apply_in_local_crs(
+                geometries,
+                lambda g: shapely.buffer(g, distance, quad_segs=BUFFER_RESOLUTION),
+            )
+            gpd[geo_column] = geopandas.GeoSeries(buffered, index=gpd.index, crs=4326)
+            return gpd
+
         gpd[geo_column] = (
             gpd[geo_column].to_crs(epsg=23032).buffer(distance).to_crs(epsg=4326)
         )
         return gpd
 
-    def get_mmsis_in_area_around_point(
-        self,
-        lat: float,
-        lon: float,
-        distance: int,
-        from_date: Optional[str] = None,
-        to_date: Optional[str] = None,
-    ) -> List[Dict[str, object]]:
-        """
-        Get AIS data from ships inside the geometry in a give timeframe
-
-        Args:
-            lat (float): latitude
-            lon (float): longitude
-            distance (int): distance in meters
-            from_date (str, optional): The start of the timeframe,
-                if not given the function will get last 24H. Defaults to None.
-            to_date (str, optional): The end of the timeframe,
-                if not given the function will get last 24H. Defaults to None.
-
-        Returns:
-            Array: Json of combined AIS tracks
-        """
-        geometry = self.buffer_around_point(lat, lon, distance)
-
-        return self.get_mmsis_in_area(geometry, from_date, to_date)
-
     def json_to_gdf(  # type: ignore[no-any-unimported]
-        self, _json: Dict[str, object]
+        self,
+        _json: Union[List[Ais], AisBatch],
+        tz: Optional[str] = DEFAULT_TIMEZONE,
     ) -> geopandas.GeoDataFrame:
         """
-        Transforms a json response from NAIS to a GeoDataFrame
+        Transforms a json response from NAIS to a GeoDataFrame, sorted by msgtime
 
         Args:
-            _json ([dict]): array of dicts, json response from NAIS
+            _json ([dict]): array of dicts, json response from NAIS, or an
+                AisBatch
+            tz (Optional[str]): convert msgtime to this timezone. None keeps
+                msgtime in UTC. Defaults to DEFAULT_TIMEZONE.
         Returns:
             GeoDataFrame: a GeoDataFrame with geometry column and crs
         """
 
-        _gdf = geopandas.GeoDataFrame(_json)
+        if isinstance(_json, AisBatch):
+            _gdf = _json.to_gdf(tz)
+        else:
+            _frame = records_to_frame(_json)
 
-        _gdf.msgtime = pd.to_datetime(_gdf.msgtime)
-        _timezone = pytz.timezone("Europe/Berlin")
-        _gdf.msgtime = _gdf.msgtime.dt.tz_convert(_timezone)
+            _msgtime = parse_msgtimes(_frame.msgtime.to_numpy())
+            _frame["msgtime"] = _msgtime.tz_convert(tz) if tz else _msgtime
 
-        _gdf.geometry = geopandas.points_from_xy(_gdf.longitude, _gdf.latitude)
-        _gdf.set_crs(epsg=4326, inplace=True)
+            _geometry = geopandas.points_from_xy(
+                _frame.longitude.to_numpy(), _frame.latitude.to_numpy()
+            )
+            _gdf = geopandas.GeoDataFrame(_frame, geometry=_geometry, crs=4326)
 
-        _gdf = _gdf.sort_values(by="msgtime")
+        if not _gdf.msgtime.is_monotonic_increasing:
+            _gdf = _gdf.sort_values(by="msgtime")
 
         return _gdf
 
@@ -408,17 +438,24 @@ class Orion(MmsiMixin, VesselCodeMixin):
         return _g.explore(column="speedOverGround", cmap="plasma")
 
     def merge_points_to_line(  # type: ignore[no-any-unimported]
-        self, _gdf: geopandas.GeoDataFrame, simplify: Optional[int] = None
+        self,
+        _gdf: geopandas.GeoDataFrame,
+        simplify: Optional[int] = None,
+        local_crs: bool = False,
     ) -> geopandas.GeoDataFrame:
         """Creates a line for all the points in the geodataframe
 
         Args:
             _gdf (GeoDataFrame): the gdf with all the points
+            simplify (int, optional): simplify the line, threshold given in meter.
+                Defaults to None.
+            local_crs (bool): simplify in the UTM zone of the line instead of
+                EPSG:23032. Defaults to False.
 
         Returns:
             GeoSeries: dataframe with one line
         """
-        lineStringObj = LineString([[a.x, a.y] for a in _gdf.geometry.values])
+        lineStringObj = LineString(shapely.get_coordinates(_gdf.geometry.values))
 
         line_df = pd.DataFrame()
         line_df["Attrib"] = [
@@ -436,43 +473,105 @@ class Orion(MmsiMixin, VesselCodeMixin):
 
         gs = gdf["geometry"]
 
-        if simplify is not None:
+        if simplify is not None and local_crs:
+            simplified = apply_in_local_crs(
+                gs.to_numpy(), lambda g: shapely.simplify(g, simplify)
+            )
+            gs = geopandas.GeoSeries(simplified, index=gs.index, crs=4326)
+        elif simplify is not None:
             gs = gs.to_crs(epsg=23032).simplify(simplify).to_crs(epsg=4326)
 
         return gs.to_json()
 
     def ais_to_line(  # type: ignore[no-any-unimported]
-        self, ais: Dict[str, object], simplify: Optional[int] = None
+        self,
+        ais: Union[List[Ais], AisBatch],
+        simplify: Optional[int] = None,
+        local_crs: bool = False,
     ) -> geopandas.GeoDataFrame:
         """Creates a line for all the points in the ais json
 
         Args:
-            ais (Dict[str, object]): ais json
+            ais (Union[List[Ais], AisBatch]): ais json, or an AisBatch
             simplify (int, optional): simplify the line, threshold given in meter.
                 Defaults to None.
+            local_crs (bool): simplify in the UTM zone of the line instead of
+                EPSG:23032. Defaults to False.
 
         Returns:
             GeoDataFrame: dataframe with one line
         """
         _gdf = self.json_to_gdf(ais)
-        return self.merge_points_to_line(_gdf, simplify=simplify)
+        return self.merge_points_to_line(_gdf, simplify=simplify, local_crs=local_crs)
 
-    def calculate_radius_in_meters_from_km2(self, area: float) -> float:
-        """
-        Calculate the radius of a circle with a given area
+    def points_to_tracks(  # type: ignore[no-any-unimported]
+        self,
+        _gdf: geopandas.GeoDataFrame,
+        max_gap: Optional[timedelta] = None,
+        simplify: Optional[float] = None,
+        local_crs: bool = False,
+    ) -> geopandas.GeoDataFrame:
+        """Creates one line per ship for the points in the geodataframe, see
+        orion.tracks.points_to_tracks
 
         Args:
-            area (float): area of the circle in km^2
+            _gdf (GeoDataFrame): the gdf with all the points
+            max_gap (timedelta, optional): start a new line for the ship when
+                there is more than max_gap between two points. Defaults to None.
+            simplify (float, optional): simplify the lines, threshold given in
+                meter. Defaults to None.
+            local_crs (bool): simplify each line in its UTM zone instead of
+                EPSG:23032. Defaults to False.
 
         Returns:
-            float: radius in meters
+            GeoDataFrame: dataframe with one line per ship
         """
-        area_in_meters = area * 1000000
+        return points_to_tracks(
+            _gdf, max_gap=max_gap, simplify=simplify, local_crs=local_crs
+        )
 
-        return math.sqrt(area_in_meters / math.pi)
+    def ais_to_tracks(  # type: ignore[no-any-unimported]
+        self,
+        ais: Union[List[Ais], AisBatch],
+        max_gap: Optional[timedelta] = None,
+        simplify: Optional[float] = None,
+        local_crs: bool = False,
+    ) -> geopandas.GeoDataFrame:
+        """Creates one line per ship for the points in the ais json
 
-    def max_api_radius(self) -> float:
-        return self.calculate_radius_in_meters_from_km2(500)
+        Args:
+            ais (Union[List[Ais], AisBatch]): ais json, or an AisBatch
+            max_gap (timedelta, optional): start a new line for the ship when
+                there is more than max_gap between two points. Defaults to None.
+            simplify (float, optional): simplify the lines, threshold given in
+                meter. Defaults to None.
+            local_crs (bool): simplify each line in its UTM zone instead of
+                EPSG:23032. Defaults to False.
+
+        Returns:
+            GeoDataFrame: dataframe with one line per ship
+        """
+        _gdf = self.json_to_gdf(ais)
+        return self.points_to_tracks(
+            _gdf, max_gap=max_gap, simplify=simplify, local_crs=local_crs
+        )
+
+    def calculate_radius_in_meters_from_km2(self, area: float) -> float:
+        """
+        Calculate the radius of a circle with a given area
+
+        Args:
+            area (float): area of the circle in km^2
+
+        Returns:
+            float: radius in meters
+        """
+        area_in_meters = area * 1000000
+
+        return math.sqrt(area_in_meters / math.pi)
+
+    def max_api_radius(self) -> float:
+        return self.calculate_radius_in_meters_from_km2(MAX_API_AREA)
 
     def add_jurisdiction_and_ship_type(
         self,
@@ -485,11 +584,484 @@ class Orion(MmsiMixin, VesselCodeMixin):
             ais (List[Ais]): the ais track from NAIS
         """
 
-        for a in ais:
-            if "shipType" in a:
-                a["shipTypeTxt"] = self.ais_vessel_codes.get_vessel_type_name(
-                    a["shipType"]
-                )
-            a["jurisdiction"] = self.mmsi.get_jurisdiction_name(a["mmsi"])
+        jurisdictions = self.mmsi.get_jurisdiction_names([a["mmsi"] for a in ais])
+        for a, jurisdiction in zip(ais, jurisdictions):
+            a["jurisdiction"] = jurisdiction
+
+        with_type = [a for a in ais if "shipType" in a]
+        ship_types = self.ais_vessel_codes.get_vessel_type_names(
+            [a["shipType"] for a in with_type]
+        )
+        for a, ship_type in zip(with_type, ship_types):
+            a["shipTypeTxt"] = ship_type
 
         return ais
+
+
+class Orion(BaseOrion):
+    """Interface to Barentswatch API
+
+    The CLIENT_ID and CLIENT_SECRET should be exposed as environment variables called
+    `CLIENT_ID` and `CLIENT_SECRET` or passed as parameters
+    when creating an instance of the class.
+
+    orion = Orion(client_id="myclientid", client_secret="myclientsecret")
+
+    Args:
+            client_id (Optional[str]): id for your user at Barentswatch.
+                Use if not set in .env file.
+            client_secret (Optional[str]): secret for your user at Barentswatch.
+                Use if not set in .env file.
+            skip_auth (Optional[bool]): skip authentication. Useful for testing.
+            token_file (Optional[str]): keep the token in this file, so it can be
+                reused by the next run. Use if not set as TOKEN_FILE in .env file.
+            cache (Optional[TrackCache]): keep the tracks from get_ais in a local
+                cache, and only fetch what is not in the cache.
+            enrich (bool): add jurisdiction and shipTypeTxt to every position.
+                Set to False to get the positions as the API returns them, the
+                columns can be added later with the `ais` dataframe accessor,
+                see orion.enrich. Defaults to True.
+    """
+
+    def __init__(
+        self,
+        client_id: Optional[str] = None,
+        client_secret: Optional[str] = None,
+        skip_auth: Optional[bool] = False,
+        token_file: Optional[str] = None,
+        cache: Optional[TrackCache] = None,
+        enrich: bool = True,
+    ) -> None:
+        self.tokens = TokenManager(self._fetch_token)
+        self.cache = cache
+        self.enrich = enrich
+
+        if skip_auth:
+            return
+        self._set_credentials(client_id, client_secret)
+
+        self.authenticate_session = requests.Session()  # Session for tokens
+        self.tokens = TokenManager(self._fetch_token, self._token_store(token_file))
+        self.tokens.get()
+
+        self.session = requests.Session()
+        self.session.auth = self.auth  # type: ignore
+        self.session.hooks["response"].append(self.reauth)
+
+    def reauth(  # type: ignore
+        self, response: requests.models.Response, *args, **kwargs
+    ) -> requests.models.Response:
+        if response.status_code != requests.codes.unauthorized:
+            return response
+        logger.info("Fetching new token as the previous token expired")
+
+        if response.request.headers.get("REATTEMPT"):  # pragma: no cover
+            response.raise_for_status()
+
+        # Only one thread refreshes the token, the others reuse the new one
+        expired = response.request.headers.get("Authorization", "")
+        self.tokens.refresh(expired.removeprefix("Bearer "))
+        request = response.request
+        request.headers["REATTEMPT"] = "1"
+        if self.session.auth:
+            authenticated_request = self.auth(request)
+            response = self.session.send(authenticated_request)  # type: ignore
+            return response
+
+        raise ValueError(  # pragma: no cover
+            "No session object found. Please authenticate first."
+        )
+
+    def auth(
+        self,
+        request: Union[requests.models.Request, requests.models.PreparedRequest],
+    ) -> requests.models.Request:
+        """
+        Set the authentication token on every request, refreshing the token
+        first if it is about to expire
+        """
+
+        request.headers["Authorization"] = f"Bearer {self.tokens.get()}"
+
+        return request  # type: ignore
+
+    @property
+    def access(self) -> str:
+        """
+        The current token
+        """
+        return self.tokens.access
+
+    def authenticate(self) -> None:
+        """
+        Authenticate with Barentswatch, fetching a new token
+        """
+        self.tokens.refresh()
+
+    def _fetch_token(self) -> Dict[str, object]:
+        """
+        Fetch a new token from Barentswatch
+
+        Returns:
+            Dict[str, object]: json with access_token and expires_in
+        """
+        Headers = {"Content-Type": "application/x-www-form-urlencoded"}
+
+        body, (client_id, client_secret) = self._token_body()
+
+        try:
+            response = self.authenticate_session.post(
+                URLS["TOKEN"],
+                data=body,
+                auth=HTTPBasicAuth(client_id, client_secret),
+                headers=Headers,
+            )
+            response.raise_for_status()
+
+            return response.json()
+
+        except requests.exceptions.HTTPError as err:  # pragma: no cover
+            raise err
+
+    def get_ais_last_24H(self, mmsi: int) -> List[Ais]:
+        """
+        Get AIS for a ship last 24 hour
+
+        Args:
+            mmsi (int): Maritime Mobile Service Identity (MMSI) is used as
+            an uinique identifer for a ship
+
+        Returns:
+            json: json of ais track
+        """
+
+        if not self.mmsi.is_valid_ship_mmsi(mmsi):
+            raise ValueError("Please provide a valid ship mmsi")
+
+        try:
+            response = self.session.get(
+                f"{URLS['HISTORIC_AIS']}/historic/trackslast24hours/{mmsi}"
+            )
+            return self.decorate_ais_response(response)
+        except requests.exceptions.HTTPError as err:  # pragma: no cover
+            raise err
+
+    def get_ais(
+        self,
+        mmsi: int,
+        fromDate: str,
+        toDate: str,
+        chunk: Optional[timedelta] = None,
+        workers: int = DEFAULT_WORKERS,
+    ) -> List[Ais]:
+        """
+        Get AIS for a ship in a give timeframe
+
+        Args:
+            mmsi (int): Maritime Mobile Service Identity (MMSI) is used as an uinique
+                identifer for a ship
+            fromDate (str):  start of timeframe example: 2021-07-21T00:00:00Z
+            toDate (str): end of timeframe example:  2021-07-23T18:00:00Z
+            chunk (timedelta, optional): split the timeframe into windows of this
+                length and fetch them concurrently. The track is then sorted by
+                msgtime and positions found in two windows are only kept once.
+                Defaults to None, the whole timeframe in one request.
+            workers (int, optional): number of windows fetched at the same time.
+                Defaults to DEFAULT_WORKERS.
+
+        When the client has a cache, only the parts of the timeframe that are not
+        in the cache are fetched, and the track is returned sorted by msgtime.
+
+        Returns:
+            json: json of ais track
+        """
+
+        if not self.mmsi.is_valid_ship_mmsi(mmsi):
+            raise ValueError("Please provide a valid ship mmsi")
+
+        if self.cache is not None:
+            ais = self._get_ais_cached(mmsi, fromDate, toDate, chunk, workers)
+        else:
+            ais = self._fetch_ais(mmsi, fromDate, toDate, chunk, workers)
+
+        return self._enriched(ais)
+
+    def _get_ais_cached(
+        self,
+        mmsi: int,
+        fromDate: str,
+        toDate: str,
+        chunk: Optional[timedelta] = None,
+        workers: int = DEFAULT_WORKERS,
+    ) -> List[Ais]:
+        """
+        Get AIS for a ship from the cache, fetching only the parts of the
+        timeframe that are not in the cache yet. The cache keeps the positions
+        as the API returns them, without jurisdiction and shipTypeTxt.
+        """
+        if self.cache is None:  # pragma: no cover
+            raise ValueError("No cache set on the client")
+
+        start = parse_date(fromDate)
+        end = parse_date(toDate)
+        # Positions for the last minutes may still come in, only the past is final
+        now = datetime.now(timezone.utc)
+
+        for gap_start, gap_end in self._cache_gaps(mmsi, start, end):
+            ais = self._fetch_ais(
+                mmsi, format_date(gap_start), format_date(gap_end), chunk, workers
+            )
+            self.cache.add(mmsi, gap_start, min(gap_end, now), ais)
+
+        return self.cache.get(mmsi, start, end)
+
+    def _fetch_ais(
+        self,
+        mmsi: int,
+        fromDate: str,
+        toDate: str,
+        chunk: Optional[timedelta] = None,
+        workers: int = DEFAULT_WORKERS,
+    ) -> List[Ais]:
+        """
+        Get AIS for a ship from the API, in one request or in windows of chunk
+        """
+        if chunk is None:
+            return self._get_ais(mmsi, fromDate, toDate)
+
+        windows = split_time_range(parse_date(fromDate), parse_date(toDate), chunk)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            tracks = executor.map(
+                lambda window: self._get_ais(
+                    mmsi, format_date(window[0]), format_date(window[1])
+                ),
+                windows,
+            )
+            return self.merge_tracks(tracks)
+
+    def _get_ais(self, mmsi: int, fromDate: str, toDate: str) -> List[Ais]:
+        """
+        Get AIS for a ship in a give timeframe in one request, see get_ais. The
+        positions are not enriched.
+        """
+        try:
+            response = self.session.get(
+                f"{URLS['HISTORIC_AIS']}/historic/tracks/{mmsi}/{fromDate}/{toDate}"
+            )
+            return self._ais_response(response)
+        except requests.exceptions.HTTPError as err:  # pragma: no cover
+            raise err
+
+    def get_multiple_ais(
+        self,
+        mmsis: List[int],
+        fromDate: Optional[str] = None,
+        toDate: Optional[str] = None,
+        workers: Optional[int] = None,
+    ) -> List[Ais]:
+        """
+        Get AIS data from multiple ships in a give timeframe
+
+        Args:
+            mmsis (Array(int)): An array of MMSIs
+            fromDate (datetime, optional): The start of the timeframe,
+                if not given the function will get last 24H. Defaults to None.
+            toDate (_type_, optional): The end of the timeframe, if not given the
+                function will get last 24H. Defaults to None.
+            workers (int, optional): Fetch the ships concurrently with this many
+                requests in flight. Ships that fail are logged and left out
+                instead of aborting the batch. Defaults to None, one ship at a time.
+
+        Returns:
+            Array: Json of combined AIS tracks
+        """
+        if workers is not None:
+            result = self.fetch_multiple_ais(mmsis, fromDate, toDate, workers)
+            return result.combined(mmsis)
+
+        ais = []
+
+        for mmsi in mmsis:
+            if not self.mmsi.is_valid_ship_mmsi(mmsi):
+                raise ValueError("Please provide a valid ship mmsi")
+
+            if (not fromDate) or (not toDate):
+                ais.extend(self.get_ais_last_24H(mmsi))
+            else:
+                ais.extend(self.get_ais(mmsi, fromDate, toDate))
+
+        return ais
+
+    def get_ais_batch(
+        self,
+        mmsis: List[int],
+        fromDate: Optional[str] = None,
+        toDate: Optional[str] = None,
+        workers: Optional[int] = None,
+    ) -> AisBatch:
+        """
+        Get AIS data from multiple ships in a give timeframe as columns, see
+        get_multiple_ais
+
+        Args:
+            mmsis (Array(int)): An array of MMSIs
+            fromDate (str, optional): The start of the timeframe,
+                if not given the function will get last 24H. Defaults to None.
+            toDate (str, optional): The end of the timeframe, if not given the
+                function will get last 24H. Defaults to None.
+            workers (int, optional): Fetch the ships concurrently with this many
+                requests in flight. Ships that fail are logged and left out.
+                Defaults to None, one ship at a time.
+
+        Each track is turned into columns as soon as it is fetched, so only the
+        dicts of the ships being fetched are kept at the same time.
+
+        Returns:
+            AisBatch: the positions of all the ships
+        """
+        for mmsi in mmsis:
+            if not self.mmsi.is_valid_ship_mmsi(mmsi):
+                raise ValueError("Please provide a valid ship mmsi")
+
+        def fetch(mmsi: int) -> AisBatch:
+            if (not fromDate) or (not toDate):
+                return AisBatch.from_ais(self.get_ais_last_24H(mmsi))
+            return AisBatch.from_ais(self.get_ais(mmsi, fromDate, toDate))
+
+        if workers is None:
+            return AisBatch.concat(fetch(mmsi) for mmsi in mmsis)
+
+        batches = []
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {mmsi: executor.submit(fetch, mmsi) for mmsi in mmsis}
+
+            for mmsi, future in futures.items():
+                try:
+                    batches.append(future.result())
+                except (requests.exceptions.RequestException, ValueError) as err:
+                    logger.warning(f"Could not get AIS for {mmsi}: {err}")
+
+        return AisBatch.concat(batches)
+
+    def fetch_multiple_ais(
+        self,
+        mmsis: List[int],
+        fromDate: Optional[str] = None,
+        toDate: Optional[str] = None,
+        workers: int = DEFAULT_WORKERS,
+    ) -> MultipleAisResult:
+        """
+        Get AIS data from multiple ships concurrently, keeping the track of each
+        ship separate and reporting the ships that failed
+
+        Args:
+            mmsis (Array(int)): An array of MMSIs
+            fromDate (str, optional): The start of the timeframe,
+                if not given the function will get last 24H. Defaults to None.
+            toDate (str, optional): The end of the timeframe, if not given the
+                function will get last 24H. Defaults to None.
+            workers (int, optional): Number of requests in flight at the same time.
+                Defaults to DEFAULT_WORKERS.
+
+        Returns:
+            MultipleAisResult: tracks per MMSI in the order given, and errors per
+                MMSI for the ships that could not be fetched. A ship given twice
+                has one track, see MultipleAisResult.combined.
+        """
+        for mmsi in mmsis:
+            if not self.mmsi.is_valid_ship_mmsi(mmsi):
+                raise ValueError("Please provide a valid ship mmsi")
+
+        def fetch(mmsi: int) -> List[Ais]:
+            if (not fromDate) or (not toDate):
+                return self.get_ais_last_24H(mmsi)
+            return self.get_ais(mmsi, fromDate, toDate)
+
+        result = MultipleAisResult()
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {mmsi: executor.submit(fetch, mmsi) for mmsi in mmsis}
+
+            for mmsi, future in futures.items():
+                try:
+                    result.ais[mmsi] = future.result()
+                except (requests.exceptions.RequestException, ValueError) as err:
+                    logger.warning(f"Could not get AIS for {mmsi}: {err}")
+                    result.errors[mmsi] = err
+
+        return result
+
+    def get_mmsis_in_area(
+        self,
+        geometry: Dict[str, object],
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+        workers: int = DEFAULT_WORKERS,
+    ) -> List[Dict[str, object]]:
+        """
+        Get AIS for ships in given area inside the timeframe
+
+        Areas larger than the limit of the API (MAX_API_AREA) are split into
+        tiles that are queried concurrently, and each ship is only returned once.
+
+        Args:
+            geometry (Dict[str, object]): GeoJSON geometry
+            from_date (datetime, optional): The start of the timeframe, if not given
+                the function will get last 24H. Defaults to None.
+            to_date (datetime, optional): The end of the timeframe, if not given
+                the function will get last 24H. Defaults to None.
+            workers (int, optional): Number of tiles queried at the same time.
+                Defaults to DEFAULT_WORKERS.
+        """
+        bodies = self._area_bodies(geometry, from_date, to_date)
+
+        if len(bodies) == 1:
+            return self._post_area(bodies[0])
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return self.merge_area_responses(executor.map(self._post_area, bodies))
+
+    def _post_area(self, body: Dict[str, object]) -> List[Dict[str, object]]:
+        """
+        Get the ships in one area that is within the limit of the API
+        """
+        try:
+            self.session.headers["Content-Type"] = "application/json"
+            response = self.session.post(
+                f"{URLS['HISTORIC_AIS']}/historic/mmsiinarea/",
+                json=body,
+            )
+            response.raise_for_status()
+
+            return response.json()
+
+        except requests.exceptions.HTTPError as err:  # pragma: no cover
+            raise err
+
+    def get_mmsis_in_area_around_point(
+        self,
+        lat: float,
+        lon: float,
+        distance: int,
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+    ) -> List[Dict[str, object]]:
+        """
+        Get AIS data from ships inside the geometry in a give timeframe
+
+        Args:
+            lat (float): latitude
+            lon (float): longitude
+            distance (int): distance in meters
+            from_date (str, optional): The start of the timeframe,
+                if not given the function will get last 24H. Defaults to None.
+            to_date (str, optional): The end of the timeframe,
+                if not given the function will get last 24H. Defaults to None.
+
+        Returns:
+            Array: Json of combined AIS tracks
+        """
+        geometry = self.buffer_around_point(lat, lon, distance)
+
+        return self.get_mmsis_in_area(geometry, from_date, to_date)
@@ -0,0 +1,242 @@
+"""
+Compression of AIS tracks that keeps the time of each position.
+
+Positions are dropped when the ship's position at that time can be found from
+the kept positions before and after it, within a maximum error. The error is
+the synchronized Euclidean distance (SED): the distance between where the ship
+was and where it would be if it moved in a straight line at constant speed
+between the kept positions. The track can be fed in time ordered chunks, so
+tracks of several months don't have to fit in memory.
+
+Example:
+from orion.compression import TrackCompressor
+
+compressor = TrackCompressor(max_error=50)
+for chunk in chunks:
+    store(compressor.compress(chunk))
+store(compressor.flush())
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Meters per degree of latitude, on a sphere with the mean radius of the earth
+METERS_PER_DEGREE = 6_371_008.8 * np.pi / 180
+
+# Positions kept back before the last one is kept regardless of the error
+DEFAULT_MAX_WINDOW = 1000
+
+
+# Candidate points checked at once when looking for the next kept position,
+# doubled each time up to MAX_BLOCK
+FIRST_BLOCK = 8
+MAX_BLOCK = 256
+
+
+@dataclass
+class _TrackState:  # type: ignore[no-any-unimported]
+    """
+    The kept position the current line starts from, and the positions since
+    then that have not been decided on
+    """
+
+    anchor: np.ndarray
+    times: np.ndarray = field(default_factory=lambda: np.zeros(0))
+    longitudes: np.ndarray = field(default_factory=lambda: np.zeros(0))
+    latitudes: np.ndarray = field(default_factory=lambda: np.zeros(0))
+    # the row of the last undecided position, kept if the next chunk starts a
+    # new line from it
+    last_row: Optional[pd.DataFrame] = None  # type: ignore[no-any-unimported]
+
+
+class TrackCompressor:
+    """
+    Compresses AIS tracks of many ships, one chunk at a time
+
+    Every position that is dropped is within max_error meters of where the
+    ship would be at that time, moving in a straight line between the kept
+    positions around it. The first and last position of each ship are kept.
+
+    Args:
+        max_error (float): the largest error allowed, in meters
+        max_window (int): keep a position after this many undecided positions,
+            to bound the work per position. Defaults to DEFAULT_MAX_WINDOW.
+    """
+
+    def __init__(self, max_error: float, max_window: int = DEFAULT_MAX_WINDOW) -> None:
+        if max_error < 0:
+            raise ValueError("max_error must be zero or more")
+
+        self.max_error = max_error
+        self.max_window = max_window
+        self._tracks: Dict[int, _TrackState] = {}
+
+    def compress(  # type: ignore[no-any-unimported]
+        self, frame: pd.DataFrame
+    ) -> pd.DataFrame:
+        """Compress the next chunk of positions
+
+        The positions of each ship must be sorted by msgtime, and come after the
+        positions in earlier chunks. The last position of each ship is held
+        back until it is known whether it is kept, so the result can contain
+        rows from earlier chunks.
+
+        Args:
+            frame (pd.DataFrame): positions with mmsi, msgtime, longitude and
+                latitude columns, e.g. from json_to_gdf
+
+        Returns:
+            pd.DataFrame: the rows that are kept, sorted by msgtime
+        """
+        seconds = frame["msgtime"].to_numpy(dtype="datetime64[ns]").view("int64") / 1e9
+        longitudes = frame["longitude"].to_numpy(dtype="float64")
+        latitudes = frame["latitude"].to_numpy(dtype="float64")
+
+        kept: List[int] = []
+        carried: List[pd.DataFrame] = []  # type: ignore[no-any-unimported]
+
+        groups = frame.groupby("mmsi", sort=False).indices
+        for mmsi, positions in groups.items():
+            track = self._tracks.get(mmsi)
+            if track is None:
+                first = positions[0]
+                anchor = [seconds[first], longitudes[first], latitudes[first]]
+                track = self._tracks[mmsi] = _TrackState(anchor=np.array(anchor))
+                kept.append(first)
+                positions = positions[1:]
+
+            # The anchor, the undecided positions and the new ones, with -1 as
+            # the row of the positions from earlier chunks
+            held = 1 + len(track.times)
+            times = np.concatenate([track.anchor[:1], track.times, seconds[positions]])
+            lons = np.concatenate(
+                [track.anchor[1:2], track.longitudes, longitudes[positions]]
+            )
+            lats = np.concatenate(
+                [track.anchor[2:], track.latitudes, latitudes[positions]]
+            )
+            rows = np.concatenate([np.full(held, -1), positions])
+
+            start = 0
+            while True:
+                step = self._next_anchor(times[start:], lons[start:], lats[start:])
+                if step is None:
+                    break
+                start += step
+
+                # A position from an earlier chunk can only be kept when it
+                # was the last one, as the next decides on it
+                if rows[start] >= 0:
+                    kept.append(rows[start])
+                elif track.last_row is not None:
+                    carried.append(track.last_row)
+
+            track.anchor = np.array([times[start], lons[start], lats[start]])
+            track.times = times[start + 1 :]
+            track.longitudes = lons[start + 1 :]
+            track.latitudes = lats[start + 1 :]
+            track.last_row = frame.iloc[[rows[-1]]] if len(track.times) else None
+
+        return self._result(frame.iloc[kept], carried)
+
+    def flush(self) -> pd.DataFrame:  # type: ignore[no-any-unimported]
+        """Keep the last position of each ship, and forget the ships
+
+        Returns:
+            pd.DataFrame: the last rows that were held back, sorted by msgtime
+        """
+        carried = [
+            track.last_row
+            for track in self._tracks.values()
+            if len(track.times) and track.last_row is not None
+        ]
+        self._tracks.clear()
+
+        if not carried:
+            return pd.DataFrame()
+        return self._result(carried[0].iloc[:0], carried)
+
+    def _next_anchor(
+        self, times: np.ndarray, longitudes: np.ndarray, latitudes: np.ndarray
+    ) -> Optional[int]:
+        """
+        Find the next position to keep, after the anchor at index 0
+
+        A position is kept when the line from the anchor to the position after
+        it is more than max_error from a position in between, or when it is
+        max_window positions after the anchor. The candidates for the position
+        after it are checked a block at a time, against all the positions in
+        between at once.
+
+        Returns:
+            Optional[int]: index of the position to keep, None if it is not
+                known yet
+        """
+        anchor_time, anchor_lon, anchor_lat = times[0], longitudes[0], latitudes[0]
+        scale = METERS_PER_DEGREE * np.cos(np.radians(anchor_lat))
+        last = min(self.max_window, len(times) - 1)
+
+        candidate, size = 2, FIRST_BLOCK
+        while candidate <= last:
+            end = min(candidate + size, last + 1)
+
+            # Seconds, and meters east and north, from the anchor
+            elapsed = times[:end] - anchor_time
+            xs = (longitudes[:end] - anchor_lon) * scale
+            ys = (latitudes[:end] - anchor_lat) * METERS_PER_DEGREE
+
+            between = np.arange(1, end - 1)[:, None]
+            candidates = np.arange(candidate, end)
+            duration = elapsed[candidates]
+            ratio = np.divide(
+                elapsed[between],
+                duration,
+                out=np.zeros((len(between), len(candidates))),
+                where=duration > 0,
+            )
+            errors = (xs[between] - ratio * xs[candidates]) ** 2 + (
+                ys[between] - ratio * ys[candidates]
+            ) ** 2
+
+            exceeds = ((errors > self.max_error**2) & (between < candidates)).any(0)
+            if exceeds.any():
+                return int(candidates[np.argmax(exceeds)]) - 1
+
+            candidate, size = end, min(2 * size, MAX_BLOCK)
+
+        if self.max_window < len(times):
+            return self.max_window
+        return None
+
+    def _result(  # type: ignore[no-any-unimported]
+        self, rows: pd.DataFrame, carried: List[pd.DataFrame]
+    ) -> pd.DataFrame:
+        result = pd.concat([*carried, rows]) if carried else rows
+        return result.sort_values("msgtime", kind="stable")
+
+
+def compress_track(  # type: ignore[no-any-unimported]
+    frame: pd.DataFrame, max_error: float, max_window: int = DEFAULT_MAX_WINDOW
+) -> pd.DataFrame:
+    """Compress the tracks in a frame in one go, see TrackCompressor
+
+    Args:
+        frame (pd.DataFrame): positions with mmsi, msgtime, longitude and
+            latitude columns, sorted by msgtime for each ship
+        max_error (float): the largest error allowed, in meters
+        max_window (int): keep a position after this many undecided positions.
+            Defaults to DEFAULT_MAX_WINDOW.
+
+    Returns:
+        pd.DataFrame: the rows that are kept, sorted by msgtime
+    """
+    compressor = TrackCompressor(max_error, max_window)
+    compressed = compressor.compress(frame)
+    rest = compressor.flush()
+
+    if rest.empty:
+        return compressed
+    return pd.concat([compressed, rest]).sort_values("msgtime", kind="stable")
@@ -0,0 +1,285 @@
+"""
+Traffic density, AIS positions counted in square or hexagonal cells.
+
+The positions are projected and binned straight from the coordinate columns,
+without making a shapely point per position. A DensityGrid can be fed one
+chunk of positions at a time, so more positions than fit in memory can be
+aggregated, e.g. one day at a time.
+
+Example:
+from orion.density import DensityGrid
+
+grid = DensityGrid(cell_size=1000, shape="hex", jurisdictions=["NO"])
+for frame in frames:
+    grid.add(frame)
+cells = grid.to_gdf()  # count, vessels and seconds per cell
+"""
+
+from datetime import timedelta
+from typing import Iterable, List, Optional, Union
+
+import geopandas
+import numpy as np
+import pandas as pd
+import shapely
+
+from orion.enrich import MMSI, VESSEL_CODES
+from orion.projection import transform_xy
+from orion.spatial import METRIC_CRS
+
+SHAPES = ("square", "hex")
+
+# The time a ship is counted in a cell is at most this long, also when the next
+# position is later
+DEFAULT_MAX_GAP = timedelta(minutes=30)
+
+# Cell columns and rows are packed in one integer, BITS bits each, with OFFSET
+# added to make them positive
+BITS = 31
+OFFSET = 1 << (BITS - 1)
+
+# A cell and a ship seen in it
+PAIR = np.dtype([("cell", "int64"), ("mmsi", "int64")])
+
+
+def _pack(columns: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    return ((columns + OFFSET) << BITS) | (rows + OFFSET)
+
+
+def _unpack(keys: np.ndarray) -> np.ndarray:
+    rows = (keys & ((1 << BITS) - 1)) - OFFSET
+    return np.column_stack([(keys >> BITS) - OFFSET, rows])
+
+
+class DensityGrid:
+    """
+    Counts AIS positions in square or hexagonal cells, chunk by chunk
+
+    For each cell it counts the positions, the ships, and the seconds ships
+    spent there. The time from a position to the next position of the same
+    ship, at most max_gap, is counted in the cell of the position. Chunks must
+    therefore come in time order for each ship.
+
+    Args:
+        cell_size (float): side of the squares, or distance between the
+            centers of the hexagons, in meters
+        shape (str): "square" or "hex". Defaults to "square".
+        crs (int): EPSG code of the metric projection the cells are made in.
+            Defaults to METRIC_CRS.
+        ship_types (Optional[List[str]]): only count ships with these ship
+            type names, e.g. ["Fishing"]. The positions need a shipType column.
+            Defaults to None, all ships.
+        jurisdictions (Optional[List[str]]): only count ships from these
+            jurisdictions, e.g. ["NO"]. Defaults to None, all ships.
+        max_gap (timedelta): count at most this long from one position.
+            Defaults to DEFAULT_MAX_GAP.
+    """
+
+    def __init__(
+        self,
+        cell_size: float,
+        shape: str = "square",
+        crs: int = METRIC_CRS,
+        ship_types: Optional[List[str]] = None,
+        jurisdictions: Optional[List[str]] = None,
+        max_gap: timedelta = DEFAULT_MAX_GAP,
+    ) -> None:
+        if shape not in SHAPES:
+            raise ValueError(f"shape must be one of {SHAPES}")
+        if cell_size <= 0:
+            raise ValueError("cell_size must be positive")
+
+        self.cell_size = cell_size
+        self.shape = shape
+        self.crs = crs
+        self.ship_types = ship_types
+        self.jurisdictions = jurisdictions
+        self.max_gap = max_gap
+
+        self._counts = pd.Series(dtype="int64")
+        self._seconds = pd.Series(dtype="float64")
+        # The (cell, mmsi) pairs seen so far, sorted and unique. This grows
+        # with the number of different pairs, 16 bytes each, not with the
+        # number of positions
+        self._vessels = np.empty(0, dtype=PAIR)
+        # The last position of each ship, counted when the next one comes
+        self._last = pd.DataFrame(
+            {"msgtime": pd.Series(dtype="int64"), "cell": pd.Series(dtype="int64")}
+        )
+
+    def cells(self, longitudes: np.ndarray, latitudes: np.ndarray) -> np.ndarray:
+        """The cell of each position
+
+        Args:
+            longitudes (np.ndarray): longitude of each position
+            latitudes (np.ndarray): latitude of each position
+
+        Returns:
+            np.ndarray: one integer per cell, see cell_polygons
+        """
+        x, y = transform_xy(longitudes, latitudes, 4326, self.crs)
+
+        if self.shape == "square":
+            columns = np.floor(x / self.cell_size).astype("int64")
+            rows = np.floor(y / self.cell_size).astype("int64")
+            return _pack(columns, rows)
+
+        # The centers of the hexagons are on two rectangular grids, the
+        # second moved half a cell, and each position is in the nearest one
+        width, height = self.cell_size, self.cell_size * np.sqrt(3)
+        x1, y1 = np.round(x / width), np.round(y / height)
+        x2, y2 = np.floor(x / width), np.floor(y / height)
+        first = (x - x1 * width) ** 2 + (y - y1 * height) ** 2 <= (
+            x - (x2 + 0.5) * width
+        ) ** 2 + (y - (y2 + 0.5) * height) ** 2
+
+        columns = np.where(first, 2 * x1, 2 * x2 + 1).astype("int64")
+        rows = np.where(first, 2 * y1, 2 * y2 + 1).astype("int64")
+        return _pack(columns, rows)
+
+    def cell_polygons(self, cells: np.ndarray) -> np.ndarray:
+        """The polygons of cells, in the projection of the grid
+
+        Args:
+            cells (np.ndarray): cells from the cells method
+
+        Returns:
+            np.ndarray: one shapely polygon per cell
+        """
+        columns, rows = _unpack(np.asarray(cells, dtype="int64")).T
+
+        if self.shape == "square":
+            return shapely.box(
+                columns * self.cell_size,
+                rows * self.cell_size,
+                (columns + 1) * self.cell_size,
+                (rows + 1) * self.cell_size,
+            )
+
+        center_x = columns * self.cell_size / 2
+        center_y = rows * self.cell_size * np.sqrt(3) / 2
+        radius = self.cell_size / np.sqrt(3)
+        angles = np.radians(np.arange(30, 390, 60))
+
+        corners = np.stack(
+            [
+                center_x[:, None] + radius * np.cos(angles),
+                center_y[:, None] + radius * np.sin(angles),
+            ],
+            axis=-1,
+        )
+        return shapely.polygons(corners)
+
+    def _mask(  # type: ignore[no-any-unimported]
+        self, frame: pd.DataFrame
+    ) -> np.ndarray:
+        # Positions without coordinates have no cell
+        mask = (
+            frame["longitude"].notna().to_numpy() & frame["latitude"].notna().to_numpy()
+        )
+        if self.ship_types is not None:
+            if "shipType" not in frame:
+                raise ValueError("Filtering on ship type needs a shipType column")
+            names = VESSEL_CODES.get_vessel_type_names(frame["shipType"].to_numpy())
+            mask &= np.isin(names, self.ship_types)
+        if self.jurisdictions is not None:
+            names = MMSI.get_jurisdiction_names(frame["mmsi"].to_numpy())
+            mask &= np.isin(names, self.jurisdictions)
+        return mask
+
+    def add(self, frame: pd.DataFrame) -> None:  # type: ignore[no-any-unimported]
+        """Count a chunk of positions
+
+        Args:
+            frame (pd.DataFrame): positions with mmsi, msgtime, longitude and
+                latitude columns, e.g. from json_to_gdf. The positions of each
+                ship must come after the ones in earlier chunks.
+        """
+        frame = frame[self._mask(frame)]
+        mmsi = frame["mmsi"].to_numpy(dtype="int64")
+        msgtime = frame["msgtime"].to_numpy(dtype="datetime64[ns]").view("int64")
+        cells = self.cells(frame["longitude"].to_numpy(), frame["latitude"].to_numpy())
+
+        counts = pd.Series(cells).value_counts()
+        self._counts = self._counts.add(counts, fill_value=0).astype("int64")
+
+        # The pairs of the chunk are made unique first, so only those are
+        # merged with the pairs of the earlier chunks
+        pairs = np.empty(len(cells), dtype=PAIR)
+        pairs["cell"], pairs["mmsi"] = cells, mmsi
+        self._vessels = np.unique(np.concatenate([self._vessels, np.unique(pairs)]))
+
+        # Time from each position to the next of the same ship, starting from
+        # the last position of the ship in the earlier chunks
+        last = self._last[self._last.index.isin(mmsi)]
+        mmsi = np.concatenate([last.index.to_numpy(dtype="int64"), mmsi])
+        msgtime = np.concatenate([last["msgtime"].to_numpy(), msgtime])
+        cells = np.concatenate([last["cell"].to_numpy(), cells])
+
+        order = np.lexsort((msgtime, mmsi))
+        mmsi, msgtime, cells = mmsi[order], msgtime[order], cells[order]
+
+        has_next = np.zeros(len(mmsi), dtype=bool)
+        has_next[:-1] = mmsi[:-1] == mmsi[1:]
+        elapsed = np.minimum(np.diff(msgtime), pd.Timedelta(self.max_gap).value)
+        seconds = pd.Series(elapsed[has_next[:-1]] / 1e9).groupby(
+            cells[:-1][has_next[:-1]]
+        )
+        self._seconds = self._seconds.add(seconds.sum(), fill_value=0)
+
+        new_last = pd.DataFrame(
+            {"msgtime": msgtime[~has_next], "cell": cells[~has_next]},
+            index=mmsi[~has_next],
+        )
+        self._last = pd.concat(
+            [self._last[~self._last.index.isin(new_last.index)], new_last]
+        )
+
+    def to_gdf(self) -> geopandas.GeoDataFrame:  # type: ignore[no-any-unimported]
+        """The counts of all chunks so far
+
+        Returns:
+            geopandas.GeoDataFrame: one row per cell with positions, with cell,
+                count, vessels, seconds and the cell polygon in the projection
+                of the grid, sorted by cell
+        """
+        vessels = pd.Series(self._vessels["cell"], dtype="int64").value_counts()
+
+        cells = np.sort(self._counts.index.to_numpy(dtype="int64"))
+        frame = pd.DataFrame(
+            {
+                "cell": cells,
+                "count": self._counts.reindex(cells).to_numpy(),
+                "vessels": vessels.reindex(cells, fill_value=0).to_numpy(),
+                "seconds": self._seconds.reindex(cells, fill_value=0.0).to_numpy(),
+            }
+        )
+        return geopandas.GeoDataFrame(
+            frame, geometry=self.cell_polygons(cells), crs=self.crs
+        )
+
+
+def density(  # type: ignore[no-any-unimported]
+    frames: Union[pd.DataFrame, Iterable[pd.DataFrame]],
+    cell_size: float,
+    shape: str = "square",
+    **kwargs: object,
+) -> geopandas.GeoDataFrame:
+    """Count positions in cells, see DensityGrid
+
+    Args:
+        frames (Union[pd.DataFrame, Iterable[pd.DataFrame]]): positions, or
+            chunks of positions in time order
+        cell_size (float): side of the squares, or distance between the
+            centers of the hexagons, in meters
+        shape (str): "square" or "hex". Defaults to "square".
+        **kwargs: the other arguments of DensityGrid
+
+    Returns:
+        geopandas.GeoDataFrame: one row per cell with count, vessels, seconds
+            and the cell polygon
+    """
+    grid = DensityGrid(cell_size, shape, **kwargs)  # type: ignore[arg-type]
+    for frame in [frames] if isinstance(frames, pd.DataFrame) else frames:
+        grid.add(frame)
+    return grid.to_gdf()
@@ -0,0 +1,232 @@
+"""
+Ships that meet, found from the AIS positions of a whole fleet.
+
+The positions are first interpolated to the same times, see
+orion.interpolate.resample. Each position is then put in a cube of a grid
+around the earth with the side of the cube the distance asked for, or
+MIN_CELL for shorter distances, so two ships can only be that close when they
+are at the same time in the same or neighbouring cubes. Only those pairs are
+compared, with NumPy and without a Python loop per ship or per pair.
+
+Example:
+from datetime import timedelta
+
+from orion import Orion
+from orion.encounters import find_encounters
+
+orion = Orion()
+gdf = orion.json_to_gdf(orion.get_multiple_ais(mmsis, from_date, to_date))
+encounters = find_encounters(gdf, distance=200, min_duration=timedelta(minutes=30))
+"""
+
+import itertools
+from datetime import timedelta
+from typing import Optional, Tuple
+
+import geopandas
+import numpy as np
+import pandas as pd
+
+from orion.interpolate import resample
+from orion.kinematics import EARTH_RADIUS
+from orion.utils.dates import nanoseconds_to_datetimes
+
+DEFAULT_INTERVAL = timedelta(minutes=1)
+DEFAULT_MAX_GAP = timedelta(minutes=10)
+
+# Bits available for the time step and the three grid coordinates of a cube
+KEY_BITS = 62
+
+# Smallest side of a cube in meters. Smaller cubes would leave the keys room for
+# too few steps, so shorter distances use cubes this big and only keep the pairs
+# that are close enough
+MIN_CELL = 50.0
+
+# Neighbouring cubes, each pair of cubes only once
+NEIGHBOURS = np.array(
+    [offset for offset in itertools.product([-1, 0, 1], repeat=3) if offset > (0, 0, 0)]
+)
+
+
+def _to_xyz(longitudes: np.ndarray, latitudes: np.ndarray) -> np.ndarray:
+    """Points on a sphere the size of the earth, in meters from its center"""
+    lons, lats = np.radians(longitudes), np.radians(latitudes)
+    return EARTH_RADIUS * np.column_stack(
+        [np.cos(lats) * np.cos(lons), np.cos(lats) * np.sin(lons), np.sin(lats)]
+    )
+
+
+def _to_lonlat(xyz: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Longitude and latitude of points given in meters from the center"""
+    x, y, z = xyz[:, 0], xyz[:, 1], xyz[:, 2]
+    return np.degrees(np.arctan2(y, x)), np.degrees(np.arctan2(z, np.hypot(x, y)))
+
+
+def _pack(steps: np.ndarray, cells: np.ndarray, cell_bits: int) -> np.ndarray:
+    """One integer per step and cube, the same for the same step and cube"""
+    key = steps
+    for axis in range(3):
+        key = (key << cell_bits) | (cells[:, axis] + (1 << (cell_bits - 1)))
+    return key
+
+
+def _pairs_in_cubes(keys: np.ndarray, shift: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Pairs (i, j) of positions where keys[j] equals keys[i] + shift
+
+    keys must be sorted. Each cube is looked up once, not once per position.
+    """
+    first = np.flatnonzero(np.append(True, keys[1:] != keys[:-1]))
+    cubes = keys[first]
+    sizes = np.diff(np.append(first, len(keys)))
+
+    # Moving to a neighbouring cube adds the same number to every key, so the
+    # neighbours are sorted too, which makes them faster to look up
+    found = np.minimum(np.searchsorted(cubes, cubes + shift), len(cubes) - 1)
+    has_neighbour = cubes[found] == cubes + shift
+    cube, neighbour = np.flatnonzero(has_neighbour), found[has_neighbour]
+
+    # Every position in the cube with every position in the neighbour
+    counts = sizes[cube] * sizes[neighbour]
+    nth = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    neighbour_sizes = np.repeat(sizes[neighbour], counts)
+    i = np.repeat(first[cube], counts) + nth // neighbour_sizes
+    j = np.repeat(first[neighbour], counts) + nth % neighbour_sizes
+
+    if shift == 0:
+        i, j = i[j > i], j[j > i]
+    return i, j
+
+
+def _close_pairs(
+    steps: np.ndarray, xyz: np.ndarray, distance: float
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Pairs of positions at the same step that are at most distance apart
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: index of the first and
+            second position of each pair, and the distance between them
+    """
+    cell = max(distance, MIN_CELL)
+    cells = np.floor(xyz / cell).astype("int64")
+
+    # Enough bits for every cube from one side of the earth to the other
+    cell_bits = int(np.ceil(np.log2(2 * (EARTH_RADIUS / cell + 2))))
+    step_bits = KEY_BITS - 3 * cell_bits
+
+    firsts, seconds, distances = [], [], []
+
+    # The keys only have room for this many steps, so go through them in chunks
+    chunk = 1 << step_bits
+    chunk_ids = (steps - steps.min()) // chunk if len(steps) else steps
+    for chunk_id in np.unique(chunk_ids):
+        index = np.flatnonzero(chunk_ids == chunk_id)
+        step = steps[index] - steps[index].min()
+
+        keys = _pack(step, cells[index], cell_bits)
+        order = np.argsort(keys)
+        index, keys = index[order], keys[order]
+
+        for x, y, z in [(0, 0, 0), *NEIGHBOURS]:
+            shift = (x << 2 * cell_bits) + (y << cell_bits) + z
+            i, j = _pairs_in_cubes(keys, shift)
+            i, j = index[i], index[j]
+            pair_distances = np.linalg.norm(xyz[i] - xyz[j], axis=1)
+            close = pair_distances <= distance
+
+            firsts.append(i[close])
+            seconds.append(j[close])
+            distances.append(pair_distances[close])
+
+    if not firsts:
+        empty = np.zeros(0, dtype="int64")
+        return empty, empty, np.zeros(0)
+    return np.concatenate(firsts), np.concatenate(seconds), np.concatenate(distances)
+
+
+def find_encounters(  # type: ignore[no-any-unimported]
+    frame: pd.DataFrame,
+    distance: float,
+    min_duration: timedelta = timedelta(0),
+    interval: timedelta = DEFAULT_INTERVAL,
+    max_gap: Optional[timedelta] = DEFAULT_MAX_GAP,
+) -> geopandas.GeoDataFrame:
+    """Find when ships were within a distance of each other
+
+    Args:
+        frame (pd.DataFrame): positions with mmsi, msgtime, longitude and
+            latitude columns, in any order, e.g. from json_to_gdf
+        distance (float): how close the ships must be, in meters. Any positive
+            distance works, also those shorter than MIN_CELL.
+        min_duration (timedelta): how long they must be that close. Defaults
+            to 0, any encounter.
+        interval (timedelta): compare the positions of the ships this often.
+            Defaults to DEFAULT_INTERVAL.
+        max_gap (Optional[timedelta]): don't interpolate between positions of
+            a ship more than max_gap apart. Defaults to DEFAULT_MAX_GAP.
+
+    Returns:
+        geopandas.GeoDataFrame: one row per encounter with mmsi and otherMmsi
+            (the higher one), start and end, the closest distance in meters,
+            closestTime and a point between the ships at that time, sorted by
+            start
+    """
+    if distance <= 0:
+        raise ValueError("distance must be positive")
+
+    positions = resample(frame, interval, max_gap, geometry=False)
+    step_length = pd.Timedelta(interval).value
+    steps = positions["msgtime"].to_numpy(dtype="datetime64[ns]").view("int64")
+    steps = steps // step_length
+    mmsi = positions["mmsi"].to_numpy()
+    xyz = _to_xyz(positions["longitude"].to_numpy(), positions["latitude"].to_numpy())
+
+    i, j, pair_distances = _close_pairs(steps, xyz, distance)
+    first = np.minimum(mmsi[i], mmsi[j])
+    other = np.maximum(mmsi[i], mmsi[j])
+    pair_steps = steps[i]
+
+    order = np.lexsort((pair_steps, other, first))
+    i, j, first, other = i[order], j[order], first[order], other[order]
+    pair_steps, pair_distances = pair_steps[order], pair_distances[order]
+
+    # An encounter ends when the pair is not close at the next step
+    starts = np.ones(len(first), dtype=bool)
+    starts[1:] = (
+        (first[1:] != first[:-1])
+        | (other[1:] != other[:-1])
+        | (np.diff(pair_steps) != 1)
+    )
+    ends = np.ones(len(first), dtype=bool)
+    ends[:-1] = starts[1:]
+    ids = np.cumsum(starts) - 1
+    start_index = np.flatnonzero(starts)
+    end_index = np.flatnonzero(ends)
+
+    # The closest step of each encounter is the first when sorted by distance
+    by_distance = np.lexsort((pair_distances, ids))
+    closest = by_distance[np.searchsorted(ids[by_distance], ids[start_index])]
+
+    duration = (pair_steps[end_index] - pair_steps[start_index]) * step_length
+    keep = duration >= pd.Timedelta(min_duration).value
+    start_index, end_index, closest = start_index[keep], end_index[keep], closest[keep]
+
+    longitude, latitude = _to_lonlat((xyz[i[closest]] + xyz[j[closest]]) / 2)
+    tz = positions["msgtime"].dt.tz
+
+    encounters = geopandas.GeoDataFrame(
+        {
+            "mmsi": first[start_index],
+            "otherMmsi": other[start_index],
+            "start": nanoseconds_to_datetimes(
+                pair_steps[start_index] * step_length, tz
+            ),
+            "end": nanoseconds_to_datetimes(pair_steps[end_index] * step_length, tz),
+            "distance": pair_distances[closest],
+            "closestTime": nanoseconds_to_datetimes(
+                pair_steps[closest] * step_length, tz
+            ),
+        },
+        geometry=geopandas.points_from_xy(longitude, latitude),
+        crs=4326,
+    )
+    return encounters.sort_values(["start", "mmsi", "otherMmsi"], ignore_index=True)
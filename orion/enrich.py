@@ -0,0 +1,94 @@
+"""
+Enrichment of AIS dataframes with jurisdiction and ship type.
+
+The columns are categoricals, so each jurisdiction and ship type name is stored
+once instead of once per position. Nothing is computed until the columns are
+asked for, through the `ais` accessor that is registered on pandas dataframes
+when orion is imported.
+
+Example:
+import orion
+
+gdf = orion.HistoricOrion().get_mmsis_in_area_frame(geometry)
+gdf.ais.jurisdiction  # categorical column, computed on access
+gdf = gdf.ais.enrich()  # copy with jurisdiction and shipTypeTxt columns
+"""
+
+from typing import Optional
+
+import pandas as pd
+
+from orion.mmsi import Mmsi, MmsiMixin
+from orion.vessel_codes import AisVesselCodes, VesselCodeMixin
+
+# The lookup tables the clients use
+MMSI = MmsiMixin.mmsi
+VESSEL_CODES = VesselCodeMixin.ais_vessel_codes
+
+
+def enrich_frame(  # type: ignore[no-any-unimported]
+    frame: pd.DataFrame,
+    mmsi: Optional[Mmsi] = None,
+    vessel_codes: Optional[AisVesselCodes] = None,
+) -> pd.DataFrame:
+    """Add jurisdiction and shipTypeTxt as categorical columns
+
+    shipTypeTxt is only added when the frame has a shipType column, the
+    positions from Kystdatahuset don't have one.
+
+    Args:
+        frame (pd.DataFrame): positions with a mmsi column
+        mmsi (Optional[Mmsi]): jurisdictions to use. Defaults to None, the
+            standard list.
+        vessel_codes (Optional[AisVesselCodes]): vessel types to use. Defaults
+            to None, the standard list.
+
+    Returns:
+        pd.DataFrame: a copy of the frame with the new columns
+    """
+    mmsi = mmsi or MMSI
+    vessel_codes = vessel_codes or VESSEL_CODES
+
+    frame = frame.copy()
+    frame["jurisdiction"] = mmsi.get_jurisdiction_categorical(frame["mmsi"].to_numpy())
+    if "shipType" in frame:
+        frame["shipTypeTxt"] = vessel_codes.get_vessel_type_categorical(
+            frame["shipType"].to_numpy()
+        )
+
+    return frame
+
+
+@pd.api.extensions.register_dataframe_accessor("ais")
+class AisAccessor:
+    """
+    Jurisdiction and ship type of the positions in a dataframe, computed from
+    the mmsi and shipType columns when asked for.
+    """
+
+    def __init__(self, frame: pd.DataFrame) -> None:  # type: ignore[no-any-unimported]
+        if "mmsi" not in frame:
+            raise AttributeError("The dataframe must have a mmsi column")
+        self._frame = frame
+
+    @property
+    def jurisdiction(self) -> pd.Series:  # type: ignore[no-any-unimported]
+        """The jurisdiction of each position, as a categorical"""
+        values = MMSI.get_jurisdiction_categorical(self._frame["mmsi"].to_numpy())
+        return pd.Series(values, index=self._frame.index, name="jurisdiction")
+
+    @property
+    def ship_type(self) -> pd.Series:  # type: ignore[no-any-unimported]
+        """The ship type name of each position, as a categorical"""
+        if "shipType" not in self._frame:
+            raise AttributeError("The dataframe must have a shipType column")
+
+        values = VESSEL_CODES.get_vessel_type_categorical(
+            self._frame["shipType"].to_numpy()
+        )
+        return pd.Series(values, index=self._frame.index, name="shipTypeTxt")
+
+    def enrich(self) -> pd.DataFrame:  # type: ignore[no-any-unimported]
+        """A copy of the dataframe with jurisdiction and shipTypeTxt columns,
+        see enrich_frame"""
+        return enrich_frame(self._frame)
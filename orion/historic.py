@@ -16,15 +16,22 @@ Contributed by havard.gulldahl@nrk.no
 import logging
 import os
 from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from itertools import compress
+from typing import Dict, List, Optional, Tuple
 
 import dotenv
+import numpy as np
+import pandas as pd
 import requests
 from shapely.geometry import shape
 
-from orion.client import Orion
-from orion.types.ais import Ais
+from orion.cache import TrackCache
+from orion.client import DEFAULT_WORKERS, BaseOrion, Orion, Response
+from orion.spatial import points_in_geometry
+from orion.types.ais import Ais, MultipleAisResult
+from orion.types.batch import AisBatch
 from orion.urls import URLS
 
 project_dir = os.path.join(os.path.dirname(__file__), os.pardir)
@@ -38,7 +45,7 @@ logger = logging.getLogger(__name__)
 
 # named tuple to pythonly deal with position array/list that some endpoints
 # of the API return. Mypy throws an error that's not an error, so we ignore it.
-Position = namedtuple( # type: ignore[misc]
+Position = namedtuple(  # type: ignore[misc]
     typename="Position",
     field_names=[
         "mmsi",
@@ -52,34 +59,94 @@ Position = namedtuple( # type: ignore[misc]
 )
 
 
+# Number of MMSIs sent in each request by get_multiple_ais
+DEFAULT_BATCH_SIZE = 50
+
+
+# the extra elements of the position arrays, see HistoricOrion._ais_response
+EXTRA_FIELDS = {7: "calcSpeed", 8: "secPrevPoint", 9: "distPrevPoint"}
+
+
 def dateformatter(dt: datetime) -> str:
     "Format dates the way kystdatahuset likes them: YYYYMMDDHHmm"
     return dt.strftime("%Y%m%d%H%M")
 
 
-class HistoricOrion(Orion):
-    """Interface to Kystdatahuset API
+def positions_to_frame(  # type: ignore[no-any-unimported]
+    data: List[List[object]], swap_lat_lon: bool = False, extra: bool = False
+) -> pd.DataFrame:
+    """Turn the position arrays from Kystdatahuset into a dataframe
 
-    orion = HistoricOrion()
+    The arrays are turned into one column per element, so no objects are made
+    per position. msgtime is parsed to UTC datetimes in one go.
 
-    See swagger/openapi docs
-    https://kystdatahuset.no/webservices/swagger/ui/index
+    Args:
+        data (List[List[object]]): the data array from the API
+        swap_lat_lon (bool): the latitude comes before the longitude in the
+            arrays, as the bbox endpoint returns them. Defaults to False.
+        extra (bool): keep calcSpeed, secPrevPoint and distPrevPoint.
+            Defaults to False.
 
+    Returns:
+        pd.DataFrame: one row per position, with the columns of Position
     """
+    fields: List[str] = list(Position._fields)
+    names = list(fields)
+    if swap_lat_lon:
+        names[2], names[3] = names[3], names[2]
+
+    indices = dict(enumerate(names))
+    if extra:
+        indices.update(EXTRA_FIELDS)
+
+    columns = list(zip(*data)) if data else [()] * (max(indices) + 1)
+    frame = pd.DataFrame(
+        {
+            name: np.asarray(columns[i], dtype="int64" if i == 0 else "float64")
+            for i, name in indices.items()
+            if i != 1
+        }
+    )
 
-    def __init__(
-        self,
-    ) -> None:
-        self.session = requests.Session()
+    msgtime = pd.Series(columns[1], dtype="object")
+    try:
+        frame.insert(
+            1, "msgtime", pd.to_datetime(msgtime, format="%Y-%m-%dT%H:%M:%S", utc=True)
+        )
+    except ValueError:
+        frame.insert(1, "msgtime", pd.to_datetime(msgtime, utc=True))
 
-    def decorate_ais_response(  # type: ignore[no-any-unimported]
-        self, response: requests.models.Response
-    ) -> List[Ais]:
+    return frame[fields + list(frame.columns[6:])]
+
+
+class BaseHistoricOrion(BaseOrion):
+    """
+    The parts of the Kystdatahuset clients that don't send requests, shared by
+    HistoricOrion and AsyncHistoricOrion
+    """
+
+    # Kystdatahuset only takes whole minutes, see dateformatter
+    time_resolution = timedelta(minutes=1)
+
+    def _positions(  # type: ignore[no-any-unimported]
+        self, response: Response
+    ) -> List[List[object]]:
+        """
+        The position arrays in a response from Kystdatahuset
+        """
         response.raise_for_status()
         resp = response.json()
         if resp.get("success") is False:
             raise ValueError(resp.get("msg"))
 
+        return resp.get("data")
+
+    def _ais_response(  # type: ignore[no-any-unimported]
+        self, response: Response
+    ) -> List[Ais]:
+        """
+        The positions in a response, as dicts without enrichment
+        """
         # The data object of the WebServiceResponse will be an rray of arrays
         # where the elements of the inner array are (in order):
         # [0] MMSI number, AIS user id -- int
@@ -93,16 +160,145 @@ class HistoricOrion(Orion):
         # [8] sec_prevpoint -- int
         # [9] dist_prevpoint -- int
         ais: List[Ais] = []
-        for data in resp.get("data"):
+        for data in self._positions(response):
             # we only need the first 6 elements
             pos: Ais = Ais(Position(*data[:6])._asdict())
             # patch the msgtime, it is in utc
             pos["msgtime"] += "Z"
             # append to list
             ais.append(pos)
-        ais = self.add_jurisdiction_and_ship_type(ais)
         return ais
 
+    def _timeframe(
+        self, fromDate: Optional[str], toDate: Optional[str]
+    ) -> Tuple[str, str]:
+        """
+        The timeframe to fetch, the last 24H if fromDate or toDate is missing
+        """
+        if fromDate and toDate:
+            return fromDate, toDate
+
+        now = datetime.now()
+        return (now - timedelta(days=1)).isoformat(), now.isoformat()
+
+    def _tracks(self, mmsis: List[int], ais: List[Ais]) -> Dict[int, List[Ais]]:
+        """
+        Split the positions of several ships into a track per MMSI, in the order
+        of mmsis. Ships without positions get an empty track.
+        """
+        tracks: Dict[int, List[Ais]] = {mmsi: [] for mmsi in mmsis}
+        for a in ais:
+            tracks.setdefault(a["mmsi"], []).append(a)
+        return tracks
+
+    def _batches(self, mmsis: List[int], batch_size: int) -> List[List[int]]:
+        """
+        Split the MMSIs into batches, each MMSI only once
+        """
+        unique = list(dict.fromkeys(mmsis))
+        return [unique[i : i + batch_size] for i in range(0, len(unique), batch_size)]
+
+    def _ais_body(
+        self, mmsis: List[int], fromDate: str, toDate: str
+    ) -> Dict[str, object]:
+        """
+        The body of the request for the tracks of ships, see get_ais
+        """
+        start_date = datetime.fromisoformat(fromDate.replace("Z", "+00:00"))
+        end_date = datetime.fromisoformat(toDate.replace("Z", "+00:00"))
+
+        return {
+            "MmsiIds": mmsis,
+            "Start": dateformatter(start_date),
+            "End": dateformatter(end_date),
+        }
+
+    def filter_in_area(self, ais: List[Ais], geometry: Dict[str, object]) -> List[Ais]:
+        """
+        Only keep the positions inside a geometry
+
+        Args:
+            ais (List[Ais]): the positions
+            geometry (Dict[str, object]): GeoJSON geometry
+
+        Returns:
+            List[Ais]: the positions inside the geometry
+        """
+        longitudes = np.fromiter((a["longitude"] for a in ais), "float64", len(ais))
+        latitudes = np.fromiter((a["latitude"] for a in ais), "float64", len(ais))
+        inside = points_in_geometry(geometry, longitudes, latitudes)
+
+        return list(compress(ais, inside))
+
+    def _area_body(
+        self,
+        geometry: Dict[str, object],
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+    ) -> Dict[str, object]:
+        """
+        The body of the request for ships in an area, see get_mmsis_in_area
+        """
+        geometry = self._area_geometry(geometry)
+
+        if from_date is None or to_date is None:
+            from_date = dateformatter(datetime.now() - timedelta(days=1))
+            to_date = dateformatter(datetime.now())
+        else:
+            from_date = dateformatter(datetime.fromisoformat(from_date))
+            to_date = dateformatter(datetime.fromisoformat(to_date))
+
+        # convert geojson geometry to a box of coordinates
+        # get the bounding box
+
+        geom = shape(geometry)
+        # Create a rectangle from the bounding box
+
+        return {
+            "Start": from_date,
+            "End": to_date,
+            "Bbox": ",".join(str(s) for s in geom.bounds),
+        }
+
+    def decorate_area_response(  # type: ignore[no-any-unimported]
+        self, response: Response
+    ) -> List[Ais]:
+        # There is a BUG in kystdatahuset API
+        # They return latitude and longitude in the
+        # wrong order according to their docs
+        ais: List[Ais] = []
+        for msg in self._positions(response):
+            # fix order in returned array
+            msg[2], msg[3] = msg[3], msg[2]
+            # we only need the first 6 elements
+            ais.append(Ais(Position(*msg[:6])._asdict()))
+        return ais
+
+
+class HistoricOrion(BaseHistoricOrion, Orion):
+    """Interface to Kystdatahuset API
+
+    orion = HistoricOrion()
+
+    See swagger/openapi docs
+    https://kystdatahuset.no/webservices/swagger/ui/index
+
+    Args:
+            cache (Optional[TrackCache]): keep the tracks from get_ais in a local
+                cache, and only fetch what is not in the cache.
+            enrich (bool): add jurisdiction and shipTypeTxt to every position.
+                Defaults to True.
+    """
+
+    def __init__(
+        self,
+        cache: Optional[TrackCache] = None,
+        enrich: bool = True,
+    ) -> None:
+        self.session = requests.Session()
+        self.cache = cache
+        self.enrich = enrich
+
     def get_ais_last_24H(self, mmsi: int) -> List[Ais]:
         """
         Get AIS for a ship last 24 hour
@@ -121,44 +317,227 @@ class HistoricOrion(Orion):
         fromDate = now - timedelta(days=1)
         return self.get_ais(mmsi, fromDate.isoformat(), now.isoformat())
 
-    def get_ais(self, mmsi: int, fromDate: str, toDate: str) -> List[Ais]:
+    def _get_ais(self, mmsi: int, fromDate: str, toDate: str) -> List[Ais]:
+        """
+        Get AIS for a ship in a give timeframe in one request, see get_ais. The
+        positions are not enriched.
+        """
+        endpoint = f"{URLS['KYSTDATAHUSET']}/ais/positions/for-mmsis-time"
+        data = self._ais_body([mmsi], fromDate, toDate)
+
+        try:
+            response = self.session.post(url=endpoint, json=data)
+            return self._ais_response(response)
+        except requests.exceptions.HTTPError as err:  # pragma: no cover
+            raise err
+
+    def get_ais_for_mmsis(
+        self, mmsis: List[int], fromDate: str, toDate: str
+    ) -> Dict[int, List[Ais]]:
         """
-        Get AIS for a ship in a give timeframe
+        Get AIS for several ships in a give timeframe in one request
 
         Args:
-            mmsi (int): Maritime Mobile Service Identity (MMSI) is used as an uinique
-                identifer for a ship
+            mmsis (List[int]): the MMSIs of the ships
             fromDate (str):  start of timeframe example: 2021-07-21T00:00:00Z
             toDate (str): end of timeframe example:  2021-07-23T18:00:00Z
 
         Returns:
-            json: json of ais track
+            Dict[int, List[Ais]]: track per MMSI, in the order given. Ships
+                without positions get an empty track.
         """
+        for mmsi in mmsis:
+            if not self.mmsi.is_valid_ship_mmsi(mmsi):
+                raise ValueError("Please provide a valid ship mmsi")
 
-        if not self.mmsi.is_valid_ship_mmsi(mmsi):
-            raise ValueError("Please provide a valid ship mmsi")
+        endpoint = f"{URLS['KYSTDATAHUSET']}/ais/positions/for-mmsis-time"
+        data = self._ais_body(mmsis, fromDate, toDate)
+
+        try:
+            response = self.session.post(url=endpoint, json=data)
+            return self._tracks(mmsis, self.decorate_ais_response(response))
+        except requests.exceptions.HTTPError as err:  # pragma: no cover
+            raise err
 
-        start_date = datetime.fromisoformat(fromDate.replace('Z', '+00:00'))
-        end_date = datetime.fromisoformat(toDate.replace('Z', '+00:00'))
+    def get_multiple_ais(
+        self,
+        mmsis: List[int],
+        fromDate: Optional[str] = None,
+        toDate: Optional[str] = None,
+        workers: Optional[int] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> List[Ais]:
+        """
+        Get AIS data from multiple ships in a give timeframe. The ships are
+        fetched batch_size at a time, in one request per batch. Each ship is
+        only fetched once, but the tracks are returned in the order of mmsis, so
+        a ship given twice is in the result twice.
+
+        Args:
+            mmsis (Array(int)): An array of MMSIs
+            fromDate (str, optional): The start of the timeframe,
+                if not given the function will get last 24H. Defaults to None.
+            toDate (str, optional): The end of the timeframe, if not given the
+                function will get last 24H. Defaults to None.
+            workers (int, optional): Fetch the batches concurrently with this many
+                requests in flight. Ships that fail are logged and left out
+                instead of aborting the batch. Defaults to None, one at a time.
+            batch_size (int, optional): Number of ships in each request.
+                Defaults to DEFAULT_BATCH_SIZE.
+
+        Returns:
+            Array: Json of combined AIS tracks
+        """
+        if workers is not None:
+            result = self.fetch_multiple_ais(
+                mmsis, fromDate, toDate, workers, batch_size
+            )
+            return result.combined(mmsis)
+
+        if self.cache is not None:
+            return super().get_multiple_ais(mmsis, fromDate, toDate)
+
+        fromDate, toDate = self._timeframe(fromDate, toDate)
+
+        tracks: Dict[int, List[Ais]] = {}
+        for batch in self._batches(mmsis, batch_size):
+            tracks.update(self.get_ais_for_mmsis(batch, fromDate, toDate))
+
+        return [a for mmsi in mmsis for a in tracks[mmsi]]
+
+    def fetch_multiple_ais(
+        self,
+        mmsis: List[int],
+        fromDate: Optional[str] = None,
+        toDate: Optional[str] = None,
+        workers: int = DEFAULT_WORKERS,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> MultipleAisResult:
+        """
+        Get AIS data from multiple ships concurrently, keeping the track of each
+        ship separate and reporting the ships that failed. The ships are fetched
+        batch_size at a time, in one request per batch.
+
+        Args:
+            mmsis (Array(int)): An array of MMSIs
+            fromDate (str, optional): The start of the timeframe,
+                if not given the function will get last 24H. Defaults to None.
+            toDate (str, optional): The end of the timeframe, if not given the
+                function will get last 24H. Defaults to None.
+            workers (int, optional): Number of requests in flight at the same time.
+                Defaults to DEFAULT_WORKERS.
+            batch_size (int, optional): Number of ships in each request.
+                Defaults to DEFAULT_BATCH_SIZE.
+
+        Returns:
+            MultipleAisResult: tracks per MMSI in the order given, and errors per
+                MMSI for the ships that could not be fetched. A ship given twice
+                has one track, see MultipleAisResult.combined.
+        """
+        if self.cache is not None:
+            return super().fetch_multiple_ais(mmsis, fromDate, toDate, workers)
+
+        for mmsi in mmsis:
+            if not self.mmsi.is_valid_ship_mmsi(mmsi):
+                raise ValueError("Please provide a valid ship mmsi")
+
+        fromDate, toDate = self._timeframe(fromDate, toDate)
+        batches = self._batches(mmsis, batch_size)
+        result = MultipleAisResult()
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(self.get_ais_for_mmsis, batch, fromDate, toDate)
+                for batch in batches
+            ]
+
+            for batch, future in zip(batches, futures):
+                try:
+                    result.ais.update(future.result())
+                except (requests.exceptions.RequestException, ValueError) as err:
+                    logger.warning(f"Could not get AIS for {batch}: {err}")
+                    result.errors.update({mmsi: err for mmsi in batch})
+
+        return result
+
+    def get_ais_batch(
+        self,
+        mmsis: List[int],
+        fromDate: Optional[str] = None,
+        toDate: Optional[str] = None,
+        workers: Optional[int] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> AisBatch:
+        """
+        Get AIS data from multiple ships in a give timeframe as columns. The
+        position arrays from the API are turned straight into columns, without
+        making a dict per position. Each ship is only fetched once, a ship given
+        twice is in the batch once. With a cache, see Orion.get_ais_batch.
+
+        Args:
+            mmsis (Array(int)): An array of MMSIs
+            fromDate (str, optional): The start of the timeframe,
+                if not given the function will get last 24H. Defaults to None.
+            toDate (str, optional): The end of the timeframe, if not given the
+                function will get last 24H. Defaults to None.
+            workers (int, optional): Fetch the batches concurrently with this many
+                requests in flight. Defaults to None, one at a time.
+            batch_size (int, optional): Number of ships in each request.
+                Defaults to DEFAULT_BATCH_SIZE.
+
+        Returns:
+            AisBatch: the positions of all the ships
+        """
+        if self.cache is not None:
+            return super().get_ais_batch(mmsis, fromDate, toDate, workers)
+
+        start, end = self._timeframe(fromDate, toDate)
+        batches = self._batches(mmsis, batch_size)
+
+        def fetch(batch: List[int]) -> AisBatch:
+            return AisBatch.from_frame(self.get_ais_frame(batch, start, end))
+
+        if workers is None:
+            return AisBatch.concat(fetch(batch) for batch in batches)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return AisBatch.concat(executor.map(fetch, batches))
+
+    def get_ais_frame(  # type: ignore[no-any-unimported]
+        self, mmsis: List[int], fromDate: str, toDate: str, extra: bool = False
+    ) -> pd.DataFrame:
+        """
+        Get AIS for ships in a give timeframe as a dataframe, see positions_to_frame
+
+        Args:
+            mmsis (List[int]): the MMSIs of the ships
+            fromDate (str):  start of timeframe example: 2021-07-21T00:00:00Z
+            toDate (str): end of timeframe example:  2021-07-23T18:00:00Z
+            extra (bool): keep calcSpeed, secPrevPoint and distPrevPoint.
+                Defaults to False.
+
+        Returns:
+            pd.DataFrame: one row per position
+        """
+        for mmsi in mmsis:
+            if not self.mmsi.is_valid_ship_mmsi(mmsi):
+                raise ValueError("Please provide a valid ship mmsi")
 
         endpoint = f"{URLS['KYSTDATAHUSET']}/ais/positions/for-mmsis-time"
-        data = {
-            "MmsiIds": [mmsi],
-            "Start": dateformatter(start_date),
-            "End": dateformatter(end_date),
-        }
+        data = self._ais_body(mmsis, fromDate, toDate)
 
         try:
             response = self.session.post(url=endpoint, json=data)
-            return self.decorate_ais_response(response)
+            return positions_to_frame(self._positions(response), extra=extra)
         except requests.exceptions.HTTPError as err:  # pragma: no cover
             raise err
 
-    def get_mmsis_in_area(
+    def get_mmsis_in_area(  # type: ignore[override]
         self,
         geometry: Dict[str, object],
         from_date: Optional[str] = None,
         to_date: Optional[str] = None,
+        exact: bool = True,
     ) -> List[Dict[str, object]]:
         """
         Get AIS for ships in given area inside the timeframe
@@ -171,32 +550,12 @@ class HistoricOrion(Orion):
             to_date (datetime, optional): The end of the timeframe in ISO8601
             format, if not given the function will get last 24H. Defaults to
             None.
+            exact (bool, optional): The API returns every position in the
+            bounding box of the geometry. Only keep the positions inside the
+            geometry. Defaults to True.
         """
-        # Check if features is present, if so pick the first one
-        if "features" in geometry and len(geometry["features"]) > 0:  # type: ignore
-            geometry = geometry["features"][0]["geometry"]  # type: ignore
-
-        if "coordinates" not in geometry:
-            raise ValueError("Geometry does not contain coordinates")
-
-        if from_date is None or to_date is None:
-            from_date = dateformatter(datetime.now() - timedelta(days=1))
-            to_date = dateformatter(datetime.now())
-        else:
-            from_date = dateformatter(datetime.fromisoformat(from_date))
-            to_date = dateformatter(datetime.fromisoformat(to_date))
-
-        # convert geojson geometry to a box of coordinates
-        # get the bounding box
-
-        geom = shape(geometry)
-        # Create a rectangle from the bounding box
-
-        body = {
-            "Start": from_date,
-            "End": to_date,
-            "Bbox": ",".join(str(s) for s in geom.bounds),
-        }
+        area = self._area_geometry(geometry)
+        body = self._area_body(area, from_date, to_date)
 
         endpoint = f"{URLS['KYSTDATAHUSET']}/ais/positions/within-bbox-time"
         try:
@@ -205,22 +564,59 @@ class HistoricOrion(Orion):
                 url=endpoint,
                 json=body,
             )
-            response.raise_for_status()
-            resp = response.json()
-            if resp.get("success") is False:
-                raise ValueError(resp.get("msg"))
+        except requests.exceptions.HTTPError as err:  # pragma: no cover
+            raise err
+
+        ais = self.decorate_area_response(response)
+        return self.filter_in_area(ais, area) if exact else ais
+
+    def get_mmsis_in_area_frame(  # type: ignore[no-any-unimported]
+        self,
+        geometry: Dict[str, object],
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+        extra: bool = False,
+        exact: bool = True,
+    ) -> pd.DataFrame:
+        """
+        Get AIS for ships in given area inside the timeframe as a dataframe,
+        see positions_to_frame
+
+        Args:
+            geometry (Dict[str, object]): GeoJSON geometry
+            from_date (datetime, optional): The start of the timeframe in
+            ISO8601, if not given the function will get last 24H. Defaults to
+            None.
+            to_date (datetime, optional): The end of the timeframe in ISO8601
+            format, if not given the function will get last 24H. Defaults to
+            None.
+            extra (bool): keep calcSpeed, secPrevPoint and distPrevPoint.
+                Defaults to False.
+            exact (bool, optional): The API returns every position in the
+            bounding box of the geometry. Only keep the positions inside the
+            geometry. Defaults to True.
 
+        Returns:
+            pd.DataFrame: one row per position
+        """
+        area = self._area_geometry(geometry)
+        body = self._area_body(area, from_date, to_date)
+
+        endpoint = f"{URLS['KYSTDATAHUSET']}/ais/positions/within-bbox-time"
+        try:
+            self.session.headers["Content-Type"] = "application/json"
+            response = self.session.post(url=endpoint, json=body)
         except requests.exceptions.HTTPError as err:  # pragma: no cover
             raise err
 
-        else:
-            # There is a BUG in kystdatahuset API
-            # They return latitude and longitude in the
-            # wrong order according to their docs
-            ais: List[Ais] = []
-            for msg in resp.get("data"):
-                # fix order in returned array
-                msg[2], msg[3] = msg[3], msg[2]
-                # we only need the first 6 elements
-                ais.append(Ais(Position(*msg[:6])._asdict()))
-            return ais
+        # The bbox endpoint returns latitude before longitude
+        frame = positions_to_frame(
+            self._positions(response), swap_lat_lon=True, extra=extra
+        )
+        if not exact:
+            return frame
+
+        inside = points_in_geometry(
+            area, frame.longitude.to_numpy(), frame.latitude.to_numpy()
+        )
+        return frame[inside].reset_index(drop=True)
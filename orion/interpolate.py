@@ -0,0 +1,257 @@
+"""
+Positions of many ships at the same times, interpolated from their AIS
+positions.
+
+The positions are sorted by ship and time once, and the position before each
+asked for time is found for all ships and times in one sort, so there is no
+Python loop per ship or per time. Positions are interpolated linearly between
+the position before and after, and not extrapolated before the first or after
+the last position of a ship.
+
+Example:
+from datetime import timedelta
+
+from orion import Orion
+from orion.interpolate import resample, snapshot
+
+orion = Orion()
+gdf = orion.json_to_gdf(orion.get_multiple_ais(mmsis, from_date, to_date))
+frames = resample(gdf, timedelta(minutes=1), max_gap=timedelta(minutes=30))
+now = snapshot(gdf, "2023-01-01T12:00:00Z")
+"""
+
+from datetime import timedelta
+from typing import Optional, Tuple, Union
+
+import geopandas
+import numpy as np
+import numpy.typing as npt
+import pandas as pd
+
+from orion.utils.dates import nanoseconds_to_datetimes
+
+
+def _sorted_positions(  # type: ignore[no-any-unimported]
+    frame: pd.DataFrame,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """mmsi, msgtime in nanoseconds, longitude and latitude, sorted by mmsi and
+    msgtime"""
+    mmsi = frame["mmsi"].to_numpy()
+    msgtime = frame["msgtime"].to_numpy(dtype="datetime64[ns]").view("int64")
+    order = np.lexsort((msgtime, mmsi))
+
+    return (
+        mmsi[order],
+        msgtime[order],
+        frame["longitude"].to_numpy(dtype="float64")[order],
+        frame["latitude"].to_numpy(dtype="float64")[order],
+    )
+
+
+def _last_at_or_before(
+    ships: np.ndarray,
+    times: np.ndarray,
+    query_ships: np.ndarray,
+    query_times: np.ndarray,
+) -> np.ndarray:
+    """Index of the last position of the same ship at or before each query
+
+    The positions must be sorted by ship and time. The positions and queries
+    are sorted together, with positions before queries at the same time, so the
+    position before a query is the last position before it in that order.
+
+    Returns:
+        np.ndarray: index into the positions, -1 when the ship has no position
+            at or before the query time
+    """
+    count = len(ships)
+    is_query = np.repeat([False, True], [count, len(query_ships)])
+    order = np.lexsort(
+        (
+            is_query,
+            np.concatenate([times, query_times]),
+            np.concatenate([ships, query_ships]),
+        )
+    )
+
+    # The positions come in their own order, so the running maximum of their
+    # index is the last position seen
+    seen = np.maximum.accumulate(np.where(order < count, order, -1))
+    before = np.empty(len(query_ships), dtype="int64")
+    before[order[is_query[order]] - count] = seen[is_query[order]]
+
+    other_ship = ships[np.maximum(before, 0)] != query_ships
+    before[other_ship] = -1
+    return before
+
+
+def _interpolate(  # type: ignore[no-any-unimported]
+    frame: pd.DataFrame,
+    query_ships: np.ndarray,
+    query_times: np.ndarray,
+    max_gap: Optional[timedelta],
+    geometry: bool = True,
+) -> pd.DataFrame:
+    """The position of each ship at each time, leaving out the ones that can't
+    be interpolated"""
+    ships, times, lons, lats = _sorted_positions(frame)
+    before = _last_at_or_before(ships, times, query_ships, query_times)
+    after = np.minimum(before + 1, len(ships) - 1)
+
+    exact = (before >= 0) & (times[np.maximum(before, 0)] == query_times)
+    between = (
+        (before >= 0)
+        & ~exact
+        & (before + 1 < len(ships))
+        & (ships[after] == query_ships)
+    )
+    if max_gap is not None:
+        gap = times[after] - times[np.maximum(before, 0)]
+        between &= gap <= pd.Timedelta(max_gap).value
+
+    keep = exact | between
+    before, after = before[keep], after[keep]
+    query_ships, query_times = query_ships[keep], query_times[keep]
+
+    duration = times[after] - times[before]
+    fraction = np.where(
+        duration > 0, (query_times - times[before]) / np.maximum(duration, 1), 0.0
+    )
+    fraction[exact[keep]] = 0.0
+
+    # Go the short way around when crossing the antimeridian
+    lon_step = (lons[after] - lons[before] + 180) % 360 - 180
+    longitude = lons[before] + fraction * lon_step
+    longitude = np.where(longitude >= 180, longitude - 360, longitude)
+    longitude = np.where(longitude < -180, longitude + 360, longitude)
+    latitude = lats[before] + fraction * (lats[after] - lats[before])
+
+    positions = pd.DataFrame(
+        {
+            "mmsi": query_ships,
+            "msgtime": nanoseconds_to_datetimes(query_times, frame["msgtime"].dt.tz),
+            "longitude": longitude,
+            "latitude": latitude,
+        }
+    )
+    if not geometry:
+        return positions
+    return geopandas.GeoDataFrame(
+        positions,
+        geometry=geopandas.points_from_xy(longitude, latitude),
+        crs=4326,
+    )
+
+
+def _nanoseconds(  # type: ignore[no-any-unimported]
+    times: npt.ArrayLike, frame: pd.DataFrame
+) -> np.ndarray:
+    """Times as nanoseconds since the epoch in UTC. Times without a timezone
+    are taken to be in the timezone of msgtime."""
+    index = pd.DatetimeIndex(times)
+    if index.tz is None and frame["msgtime"].dt.tz is not None:
+        index = index.tz_localize(frame["msgtime"].dt.tz)
+
+    return index.to_numpy(dtype="datetime64[ns]").view("int64")
+
+
+def positions_at(  # type: ignore[no-any-unimported]
+    frame: pd.DataFrame,
+    times: npt.ArrayLike,
+    max_gap: Optional[timedelta] = None,
+) -> geopandas.GeoDataFrame:
+    """Where every ship was at the given times
+
+    Args:
+        frame (pd.DataFrame): positions with mmsi, msgtime, longitude and
+            latitude columns, in any order, e.g. from json_to_gdf
+        times (ArrayLike): the times to find the ships at
+        max_gap (Optional[timedelta]): don't interpolate between positions
+            more than max_gap apart. Defaults to None, no limit.
+
+    Returns:
+        geopandas.GeoDataFrame: mmsi, msgtime, longitude, latitude and point
+            geometry in EPSG:4326, sorted by mmsi and msgtime. Ships are left
+            out at times before their first or after their last position, and
+            in gaps longer than max_gap.
+    """
+    query_times = np.unique(_nanoseconds(times, frame))
+    ships = np.unique(frame["mmsi"].to_numpy())
+
+    return _interpolate(
+        frame,
+        np.repeat(ships, len(query_times)),
+        np.tile(query_times, len(ships)),
+        max_gap,
+    )
+
+
+def resample(  # type: ignore[no-any-unimported]
+    frame: pd.DataFrame,
+    interval: Union[timedelta, str],
+    max_gap: Optional[timedelta] = None,
+    geometry: bool = True,
+) -> pd.DataFrame:
+    """Positions of every ship at a fixed interval
+
+    The times are multiples of the interval since the epoch, so all ships get
+    positions at the same times, and each ship only between its first and last
+    position.
+
+    Args:
+        frame (pd.DataFrame): positions with mmsi, msgtime, longitude and
+            latitude columns, in any order, e.g. from json_to_gdf
+        interval (Union[timedelta, str]): time between the positions, e.g.
+            timedelta(minutes=1) or "1min"
+        max_gap (Optional[timedelta]): don't interpolate between positions
+            more than max_gap apart. Defaults to None, no limit.
+        geometry (bool): add point geometries. Defaults to True, False returns
+            a plain dataframe, which is faster for many positions.
+
+    Returns:
+        pd.DataFrame: GeoDataFrame with mmsi, msgtime, longitude, latitude and
+            point geometry in EPSG:4326, sorted by mmsi and msgtime
+    """
+    step = pd.Timedelta(interval).value
+    if step <= 0:
+        raise ValueError("interval must be positive")
+
+    ships, times, _, _ = _sorted_positions(frame)
+    if not len(ships):
+        return _interpolate(frame, ships, times, max_gap, geometry)
+
+    starts = np.flatnonzero(np.append(True, ships[1:] != ships[:-1]))
+    ends = np.append(starts[1:], len(ships)) - 1
+
+    # The first and last step inside the time span of each ship
+    first = -(-times[starts] // step)
+    last = times[ends] // step
+    counts = np.maximum(last - first + 1, 0)
+
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    query_times = (np.repeat(first, counts) + offsets) * step
+
+    return _interpolate(
+        frame, np.repeat(ships[starts], counts), query_times, max_gap, geometry
+    )
+
+
+def snapshot(  # type: ignore[no-any-unimported]
+    frame: pd.DataFrame,
+    time: Union[str, pd.Timestamp],
+    max_gap: Optional[timedelta] = None,
+) -> geopandas.GeoDataFrame:
+    """Where every ship was at one time, see positions_at
+
+    Args:
+        frame (pd.DataFrame): positions with mmsi, msgtime, longitude and
+            latitude columns, in any order
+        time (Union[str, pd.Timestamp]): the time
+        max_gap (Optional[timedelta]): don't interpolate between positions
+            more than max_gap apart. Defaults to None, no limit.
+
+    Returns:
+        geopandas.GeoDataFrame: one row per ship that has a position at that
+            time, sorted by mmsi
+    """
+    return positions_at(frame, [pd.Timestamp(time)], max_gap)
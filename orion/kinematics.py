@@ -0,0 +1,164 @@
+"""
+Distance, time, speed and heading between the positions of each ship.
+
+The positions are sorted by ship and time once, and every column is computed
+for all ships at once with NumPy, without a Python loop per position or a
+groupby apply. The column names follow the extra fields from Kystdatahuset, see
+HistoricOrion.get_ais_frame(extra=True).
+
+Example:
+from orion import Orion
+from orion.kinematics import add_kinematics
+
+orion = Orion()
+gdf = add_kinematics(orion.json_to_gdf(orion.get_multiple_ais(mmsis, start, end)))
+gdf = gdf[~gdf.jump]
+"""
+
+import numpy as np
+import numpy.typing as npt
+import pandas as pd
+
+# Mean radius of the earth in meters
+EARTH_RADIUS = 6_371_008.8
+
+# Meters per second in one knot
+KNOT = 1852 / 3600
+
+# Positions that need a higher speed than this, in knots, are flagged as jumps
+DEFAULT_MAX_SPEED = 50.0
+
+
+def haversine(
+    lon1: npt.ArrayLike, lat1: npt.ArrayLike, lon2: npt.ArrayLike, lat2: npt.ArrayLike
+) -> np.ndarray:
+    """Great circle distance between points, on a sphere
+
+    Args:
+        lon1 (ArrayLike): longitude of the first points
+        lat1 (ArrayLike): latitude of the first points
+        lon2 (ArrayLike): longitude of the second points
+        lat2 (ArrayLike): latitude of the second points
+
+    Returns:
+        np.ndarray: distance in meters
+    """
+    lon1, lat1, lon2, lat2 = map(np.radians, (lon1, lat1, lon2, lat2))
+
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def bearing(
+    lon1: npt.ArrayLike, lat1: npt.ArrayLike, lon2: npt.ArrayLike, lat2: npt.ArrayLike
+) -> np.ndarray:
+    """Initial bearing from the first points to the second points
+
+    Args:
+        lon1 (ArrayLike): longitude of the first points
+        lat1 (ArrayLike): latitude of the first points
+        lon2 (ArrayLike): longitude of the second points
+        lat2 (ArrayLike): latitude of the second points
+
+    Returns:
+        np.ndarray: bearing in degrees clockwise from north, 0 to 360
+    """
+    lon1, lat1, lon2, lat2 = map(np.radians, (lon1, lat1, lon2, lat2))
+
+    x = np.sin(lon2 - lon1) * np.cos(lat2)
+    y = np.cos(lat1) * np.sin(lat2) - np.sin(lat1) * np.cos(lat2) * np.cos(lon2 - lon1)
+    return np.degrees(np.arctan2(x, y)) % 360
+
+
+def add_kinematics(  # type: ignore[no-any-unimported]
+    frame: pd.DataFrame, max_speed: float = DEFAULT_MAX_SPEED
+) -> pd.DataFrame:
+    """Add the movement since the previous position of the same ship
+
+    The columns added are
+    - distPrevPoint: meters from the previous position
+    - secPrevPoint: seconds since the previous position
+    - calcSpeed: the speed that takes, in knots
+    - bearing: the direction from the previous position, in degrees
+    - turnRate: change of bearing since the previous position, in degrees per
+      minute, positive to starboard
+    - jump: the position needs more than max_speed knots both to get there and
+      to get to the next position. The first and last position of a ship only
+      have one leg, they are jumps when that leg is too fast and the leg after
+      it, or before it, is not. These are usually wrong positions.
+
+    The values are NaN for the first position of each ship, and turnRate also
+    for the second.
+
+    Args:
+        frame (pd.DataFrame): positions with mmsi, msgtime, longitude and
+            latitude columns, in any order
+        max_speed (float): the highest believable speed in knots. Defaults to
+            DEFAULT_MAX_SPEED.
+
+    Returns:
+        pd.DataFrame: a copy of the frame with the new columns, in the same order
+    """
+    mmsi = frame["mmsi"].to_numpy()
+    msgtime = frame["msgtime"].to_numpy(dtype="datetime64[ns]").view("int64")
+
+    order = np.lexsort((msgtime, mmsi))
+    mmsi = mmsi[order]
+    seconds = msgtime[order] / 1e9
+    lons = frame["longitude"].to_numpy(dtype="float64")[order]
+    lats = frame["latitude"].to_numpy(dtype="float64")[order]
+
+    # Whether the position before is from the same ship
+    same = np.zeros(len(mmsi), dtype=bool)
+    same[1:] = mmsi[1:] == mmsi[:-1]
+
+    distance = np.full(len(mmsi), np.nan)
+    distance[1:] = haversine(lons[:-1], lats[:-1], lons[1:], lats[1:])
+    distance[~same] = np.nan
+
+    elapsed = np.full(len(mmsi), np.nan)
+    elapsed[1:] = np.diff(seconds)
+    elapsed[~same] = np.nan
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        speed = np.where(distance > 0, distance / elapsed / KNOT, 0.0)
+    speed[~same] = np.nan
+
+    heading = np.full(len(mmsi), np.nan)
+    heading[1:] = bearing(lons[:-1], lats[:-1], lons[1:], lats[1:])
+    heading[~same] = np.nan
+
+    turn = np.full(len(mmsi), np.nan)
+    turn[1:] = (np.diff(heading) + 180) % 360 - 180
+    with np.errstate(divide="ignore", invalid="ignore"):
+        turn = turn / elapsed * 60
+
+    # Whether the leg to the position, and the leg from it, are too fast. The
+    # speed is NaN between ships, so the legs don't cross from one to the next
+    incoming = speed > max_speed
+    outgoing = np.append(incoming[1:], False)
+    first = ~same
+    last = ~np.append(same[1:], False)
+
+    # A spike has two fast legs. The position next to a spike at the start or
+    # end of a track has one fast leg too, but is kept as its other leg is fast
+    jump = incoming & outgoing
+    jump |= first & outgoing & ~np.append(outgoing[1:], False)
+    jump |= last & incoming & ~np.insert(incoming[:-1], 0, False)
+
+    # Back to the order of the frame
+    inverse = np.empty_like(order)
+    inverse[order] = np.arange(len(order))
+
+    frame = frame.copy()
+    frame["distPrevPoint"] = distance[inverse]
+    frame["secPrevPoint"] = elapsed[inverse]
+    frame["calcSpeed"] = speed[inverse]
+    frame["bearing"] = heading[inverse]
+    frame["turnRate"] = turn[inverse]
+    frame["jump"] = jump[inverse]
+
+    return frame
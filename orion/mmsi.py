@@ -1,8 +1,20 @@
 import re
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 import geopandas
+import numpy as np
+import numpy.typing as npt
+import pandas as pd
+
+# A ship MMSI is nine digits, starting with the three digit MID code
+SHIP_PATTERN = re.compile(r"([2-7]\d{2})\d{6}")
+
+# Returned as jurisdiction name when the MID code is unknown
+NOT_FOUND = "Not Found"
+
+# 10^0 .. 10^18, used to count the digits of MMSI numbers
+_POWERS_OF_TEN = 10 ** np.arange(19, dtype="int64")
 
 
 def make_jurisdictions() -> List["Jurisdiction"]:
@@ -324,6 +336,29 @@ class Mmsi:
     """
 
     jurisdictions: List[Jurisdiction] = field(default_factory=make_jurisdictions)
+    _by_mid: Dict[str, Jurisdiction] = field(init=False, repr=False, compare=False)
+    _names: np.ndarray = field(init=False, repr=False, compare=False)
+    _name_codes: np.ndarray = field(init=False, repr=False, compare=False)
+    _categories: pd.Index = field(  # type: ignore[no-any-unimported]
+        init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self) -> None:
+        # Index the jurisdictions by MID code, the first one listed wins
+        self._by_mid = {}
+        for jurisdiction in self.jurisdictions:
+            self._by_mid.setdefault(jurisdiction.midcode, jurisdiction)
+
+        # Jurisdiction name for every MID code 0-999, for array lookups
+        self._names = np.full(1000, NOT_FOUND, dtype=object)
+        for mid, jurisdiction in self._by_mid.items():
+            self._names[int(mid)] = jurisdiction.name
+
+        # Category code for every MID code, the last one is for MMSIs that are
+        # not ships
+        self._name_codes, self._categories = pd.factorize(
+            np.append(self._names, NOT_FOUND)
+        )
 
     def is_valid_ship_mmsi(self, mmsi: int) -> bool:
         """check if mmsi is a ship.
@@ -335,11 +370,7 @@ class Mmsi:
             bool: True if mmsi is a ship, False otherwise
         """
 
-        mmsi_str = str(mmsi)
-
-        ship_pattern = re.compile(r"([2-7]\d{2})\d{6}")
-
-        return bool(ship_pattern.match(mmsi_str))
+        return bool(SHIP_PATTERN.match(str(mmsi)))
 
     def get_mid(self, mmsi: int) -> str:
         """If MMSI is a ship, return the MID code.
@@ -353,11 +384,7 @@ class Mmsi:
         Returns:
             str: MID code
         """
-        mmsi_str = str(mmsi)
-
-        ship_pattern = re.compile(r"([2-7]\d{2})\d{6}")
-
-        if match := ship_pattern.match(mmsi_str):
+        if match := SHIP_PATTERN.match(str(mmsi)):
             return match[1]
         else:
             raise ValueError("MMSI is not a ship")
@@ -372,16 +399,7 @@ class Mmsi:
             str: Jurisdiction code
         """
 
-        mid = self.get_mid(mmsi)
-
-        return next(
-            (
-                jurisdiction
-                for jurisdiction in self.jurisdictions
-                if jurisdiction.midcode == mid
-            ),
-            None,
-        )
+        return self._by_mid.get(self.get_mid(mmsi))
 
     def get_jurisdiction_name(self, mmsi: int) -> str:
         """Get the jurisdiction name of a ship.
@@ -394,7 +412,7 @@ class Mmsi:
         """
         jurisdiction = self.get_jurisdiction(mmsi)
 
-        return jurisdiction.name if jurisdiction else "Not Found"
+        return jurisdiction.name if jurisdiction else NOT_FOUND
 
     def is_norwegian(self, mmsi: int) -> bool:
         """Check if a ship is Norwegian.
@@ -407,6 +425,93 @@ class Mmsi:
         """
         return self.get_jurisdiction_name(mmsi) == "NO"
 
+    def _as_int_array(self, mmsis: npt.ArrayLike) -> np.ndarray:
+        values = np.asarray(mmsis)
+        if values.dtype.kind in "iu":
+            return values.astype("int64", copy=False)
+
+        # Strings, floats and missing values. Anything that is not a number
+        # becomes -1, which is never a ship.
+        numbers = pd.to_numeric(pd.Series(values.ravel()), errors="coerce")
+        return numbers.fillna(-1).to_numpy("int64").reshape(values.shape)
+
+    def _digits(self, mmsis: np.ndarray) -> np.ndarray:
+        return np.searchsorted(_POWERS_OF_TEN, mmsis, side="right")
+
+    def valid_ship_mask(self, mmsis: npt.ArrayLike) -> np.ndarray:
+        """Check which MMSI numbers are ships, for a whole column at once.
+        Same rule as is_valid_ship_mmsi.
+
+        Args:
+            mmsis (ArrayLike): mmsi numbers, e.g. a pandas column
+
+        Returns:
+            np.ndarray: boolean mask, True for ships
+        """
+        values = self._as_int_array(mmsis)
+        digits = self._digits(values)
+        first_digit = values // _POWERS_OF_TEN[np.maximum(digits - 1, 0)]
+
+        return (digits >= 9) & (first_digit >= 2) & (first_digit <= 7)
+
+    def get_mids(self, mmsis: npt.ArrayLike) -> np.ndarray:
+        """Get the MID codes of many MMSI numbers at once.
+
+        Args:
+            mmsis (ArrayLike): mmsi numbers, e.g. a pandas column
+
+        Returns:
+            np.ndarray: MID codes as integers, -1 where the mmsi is not a ship
+        """
+        values = self._as_int_array(mmsis)
+        digits = self._digits(values)
+        mids = values // _POWERS_OF_TEN[np.maximum(digits - 3, 0)]
+
+        return np.where(self.valid_ship_mask(values), mids, -1)
+
+    def get_jurisdiction_names(self, mmsis: npt.ArrayLike) -> np.ndarray:
+        """Get the jurisdiction names of many MMSI numbers at once.
+
+        Args:
+            mmsis (ArrayLike): mmsi numbers, e.g. a pandas column
+
+        Returns:
+            np.ndarray: jurisdiction names, "Not Found" where the mmsi is not a
+                ship or the MID code is unknown
+        """
+        mids = self.get_mids(mmsis)
+
+        return np.where(mids >= 0, self._names[np.maximum(mids, 0)], NOT_FOUND)
+
+    def get_jurisdiction_categorical(  # type: ignore[no-any-unimported]
+        self, mmsis: npt.ArrayLike
+    ) -> pd.Categorical:
+        """Get the jurisdiction names of many MMSI numbers at once as a
+        categorical, so each name is only stored once.
+
+        Args:
+            mmsis (ArrayLike): mmsi numbers, e.g. a pandas column
+
+        Returns:
+            pd.Categorical: jurisdiction names, "Not Found" where the mmsi is not
+                a ship or the MID code is unknown
+        """
+        mids = self.get_mids(mmsis)
+        codes = self._name_codes[np.where(mids >= 0, mids, len(self._names))]
+
+        return pd.Categorical.from_codes(codes, categories=self._categories)
+
+    def norwegian_mask(self, mmsis: npt.ArrayLike) -> np.ndarray:
+        """Check which MMSI numbers are Norwegian ships, for a whole column at once.
+
+        Args:
+            mmsis (ArrayLike): mmsi numbers, e.g. a pandas column
+
+        Returns:
+            np.ndarray: boolean mask, True for Norwegian ships
+        """
+        return self.get_jurisdiction_names(mmsis) == "NO"
+
     def remove_norwegian_gdf(  # type: ignore[no-any-unimported]
         self, gdf: geopandas.GeoDataFrame
     ) -> geopandas.GeoDataFrame:
@@ -418,7 +523,7 @@ class Mmsi:
         Returns:
             _type_: _description_
         """
-        return gdf[~gdf.mmsi.apply(self.is_norwegian)]
+        return gdf[~self.norwegian_mask(gdf.mmsi)]
 
     def remove_norwegian_list(  # type: ignore[no-any-unimported]
         self, ships: List[int]
@@ -0,0 +1,132 @@
+"""
+Coordinate transformations between EPSG:4326 and metric projections.
+
+Making a pyproj Transformer is slow compared to using one, so they are made
+once per pair of coordinate systems and reused. Geometries can also be worked on
+in the UTM zone they are in, instead of one projection for everything.
+"""
+
+from functools import lru_cache
+from typing import Callable, Tuple
+
+import numpy as np
+import numpy.typing as npt
+import pyproj
+import shapely
+
+
+@lru_cache(maxsize=None)
+def get_transformer(  # type: ignore[no-any-unimported]
+    from_crs: int, to_crs: int
+) -> pyproj.Transformer:
+    """Get a transformer between two coordinate systems, made once and reused
+
+    Args:
+        from_crs (int): EPSG code of the coordinates
+        to_crs (int): EPSG code to transform to
+
+    Returns:
+        pyproj.Transformer: transformer with longitude/easting first
+    """
+    return pyproj.Transformer.from_crs(from_crs, to_crs, always_xy=True)
+
+
+def transform_xy(
+    x: npt.ArrayLike, y: npt.ArrayLike, from_crs: int, to_crs: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Transform coordinate arrays between two coordinate systems
+
+    Args:
+        x (ArrayLike): longitude or easting
+        y (ArrayLike): latitude or northing
+        from_crs (int): EPSG code of the coordinates
+        to_crs (int): EPSG code to transform to
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: the transformed x and y
+    """
+    tx, ty = get_transformer(from_crs, to_crs).transform(
+        np.asarray(x, dtype="float64"), np.asarray(y, dtype="float64")
+    )
+    return np.asarray(tx), np.asarray(ty)
+
+
+def transform_geometries(
+    geometries: npt.ArrayLike, from_crs: int, to_crs: int
+) -> np.ndarray:
+    """Transform shapely geometries between two coordinate systems
+
+    Args:
+        geometries (ArrayLike): shapely geometries
+        from_crs (int): EPSG code of the geometries
+        to_crs (int): EPSG code to transform to
+
+    Returns:
+        np.ndarray: the transformed geometries
+    """
+
+    def transform(coords: np.ndarray) -> np.ndarray:
+        x, y = transform_xy(coords[:, 0], coords[:, 1], from_crs, to_crs)
+        return np.column_stack([x, y])
+
+    return shapely.transform(np.asarray(geometries, dtype=object), transform)
+
+
+def utm_epsg(longitudes: npt.ArrayLike, latitudes: npt.ArrayLike) -> np.ndarray:
+    """Find the UTM zone of many points at once, with the exceptions for
+    south-western Norway and Svalbard
+
+    Args:
+        longitudes (ArrayLike): longitude of each point
+        latitudes (ArrayLike): latitude of each point
+
+    Returns:
+        np.ndarray: EPSG code of the WGS 84 / UTM zone of each point
+    """
+    lons = np.asarray(longitudes, dtype="float64")
+    lats = np.asarray(latitudes, dtype="float64")
+
+    zones = np.floor((lons + 180) / 6).astype("int64") % 60 + 1
+
+    # South-western Norway is in zone 32
+    zones = np.where((lats >= 56) & (lats < 64) & (lons >= 3) & (lons < 12), 32, zones)
+
+    # Svalbard uses the odd zones 31-37
+    svalbard = (lats >= 72) & (lats < 84) & (lons >= 0) & (lons < 42)
+    svalbard_zones = np.select(
+        [lons < 9, lons < 21, lons < 33], [31, 33, 35], default=37
+    )
+    zones = np.where(svalbard, svalbard_zones, zones)
+
+    return np.where(lats >= 0, 32600, 32700) + zones
+
+
+def apply_in_local_crs(
+    geometries: npt.ArrayLike,
+    function: Callable[[np.ndarray], np.ndarray],
+) -> np.ndarray:
+    """Run a function on geometries in the UTM zone of each geometry
+
+    The geometries are grouped by the UTM zone of their centroid, and each group
+    is transformed there and back once. This keeps distances in meters accurate
+    wherever the geometries are, also in the Arctic.
+
+    Args:
+        geometries (ArrayLike): shapely geometries in EPSG:4326
+        function (Callable): takes and returns an array of shapely geometries in
+            meters, e.g. lambda g: shapely.buffer(g, 100)
+
+    Returns:
+        np.ndarray: the result of the function in EPSG:4326, in the same order
+    """
+    geoms = np.asarray(geometries, dtype=object)
+    centroids = shapely.centroid(geoms)
+    zones = utm_epsg(shapely.get_x(centroids), shapely.get_y(centroids))
+
+    result = np.empty(len(geoms), dtype=object)
+    for zone in np.unique(zones):
+        group = zones == zone
+        projected = transform_geometries(geoms[group], 4326, int(zone))
+        result[group] = transform_geometries(function(projected), int(zone), 4326)
+
+    return result
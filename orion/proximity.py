@@ -0,0 +1,243 @@
+"""
+Ships near installations, e.g. the oil installations from
+orion.utils.get_data.get_oil_installations.
+
+The installations are projected and put in a spatial index once, and then all
+the positions are looked up in one call, without a loop per position or per
+installation. Positions that are too far from every installation are left out
+before any shapely objects are made for them.
+
+Example:
+from orion import HistoricOrion
+from orion.proximity import InstallationIndex
+from orion.utils.get_data import get_oil_rigs
+
+index = InstallationIndex(get_oil_rigs())
+gdf = HistoricOrion().get_mmsis_in_area_frame(area, from_date, to_date)
+visits = index.visits(gdf, max_distance=500)
+"""
+
+from datetime import timedelta
+from typing import Optional, Tuple
+
+import geopandas
+import numpy as np
+import numpy.typing as npt
+import pandas as pd
+import shapely
+
+from orion.kinematics import EARTH_RADIUS
+from orion.projection import transform_xy
+from orion.spatial import METRIC_CRS
+from orion.utils.dates import nanoseconds_to_datetimes
+
+# Meters per degree of latitude, on a sphere with the mean radius of the earth
+METERS_PER_DEGREE = EARTH_RADIUS * np.pi / 180
+
+# Extra margin around the installations when finding the positions to look up,
+# for the scale of the projection and the change of datum
+SLACK = 1.1
+
+# Smallest side of a grid cell in degrees, to keep the number of cells down
+MIN_CELL_SIZE = 0.01
+
+# Cells are numbered row by row, with room for this many cells per row
+_ROW = 1 << 31
+
+
+def _cell_keys(columns: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    return rows.astype("int64") * _ROW + columns.astype("int64")
+
+
+class InstallationIndex:
+    """
+    A spatial index of installations, to find the installation nearest to
+    many positions
+
+    Args:
+        installations (geopandas.GeoDataFrame): the installations, any
+            geometry type and crs. The index labels are used to tell which
+            installation a position is near.
+        crs (int): EPSG code of the metric projection distances are measured
+            in. Defaults to METRIC_CRS, which covers Norwegian waters.
+    """
+
+    def __init__(  # type: ignore[no-any-unimported]
+        self, installations: geopandas.GeoDataFrame, crs: int = METRIC_CRS
+    ) -> None:
+        self.installations = installations
+        self.crs = crs
+        self._labels = installations.index.to_numpy()
+        self._geometries = installations.geometry.to_crs(epsg=crs).to_numpy()
+        self._tree = shapely.STRtree(self._geometries)
+        self._lonlat_bounds = shapely.bounds(
+            installations.geometry.to_crs(epsg=4326).to_numpy()
+        )
+
+    def _candidates(
+        self, longitudes: np.ndarray, latitudes: np.ndarray, max_distance: float
+    ) -> np.ndarray:
+        """Index of the positions that are in a grid cell near an installation
+
+        The cells are marked from the bounds of the installations in degrees,
+        made larger by max_distance with a margin for the projection, so no
+        position near an installation is missed.
+        """
+        if not len(self._lonlat_bounds):
+            return np.zeros(0, dtype="int64")
+
+        margin_lat = SLACK * max_distance / METERS_PER_DEGREE
+        max_lat = min(np.abs(self._lonlat_bounds[:, [1, 3]]).max() + margin_lat, 89)
+        margin_lon = margin_lat / np.cos(np.radians(max_lat))
+        size = max(2 * margin_lat, MIN_CELL_SIZE)
+
+        min_x = np.floor((self._lonlat_bounds[:, 0] - margin_lon) / size)
+        min_y = np.floor((self._lonlat_bounds[:, 1] - margin_lat) / size)
+        max_x = np.floor((self._lonlat_bounds[:, 2] + margin_lon) / size)
+        max_y = np.floor((self._lonlat_bounds[:, 3] + margin_lat) / size)
+        widths = (max_x - min_x + 1).astype("int64")
+        counts = widths * (max_y - min_y + 1).astype("int64")
+
+        nth = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        widths = np.repeat(widths, counts)
+        cells = np.unique(
+            _cell_keys(
+                np.repeat(min_x, counts) + nth % widths,
+                np.repeat(min_y, counts) + nth // widths,
+            )
+        )
+
+        keys = _cell_keys(
+            np.floor(np.asarray(longitudes) / size),
+            np.floor(np.asarray(latitudes) / size),
+        )
+        found = np.minimum(np.searchsorted(cells, keys), len(cells) - 1)
+        return np.flatnonzero(cells[found] == keys)
+
+    def query_nearest(
+        self,
+        longitudes: npt.ArrayLike,
+        latitudes: npt.ArrayLike,
+        max_distance: float,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Find the nearest installation within max_distance of each position
+
+        Args:
+            longitudes (ArrayLike): longitude of each position
+            latitudes (ArrayLike): latitude of each position
+            max_distance (float): how near the installation must be, in meters
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: index of the positions
+                that are near an installation, position of the installation in
+                the installations, and the distance in meters
+        """
+        lons = np.asarray(longitudes, dtype="float64")
+        lats = np.asarray(latitudes, dtype="float64")
+
+        # Only positions in a cell near an installation are projected and
+        # looked up in the index
+        candidates = self._candidates(lons, lats, max_distance)
+        x, y = transform_xy(lons[candidates], lats[candidates], 4326, self.crs)
+
+        (points, installations), distances = self._tree.query_nearest(
+            shapely.points(x, y),
+            max_distance=max_distance,
+            return_distance=True,
+            all_matches=False,
+        )
+        return candidates[points], installations, distances
+
+    def nearest(  # type: ignore[no-any-unimported]
+        self, frame: pd.DataFrame, max_distance: float
+    ) -> pd.DataFrame:
+        """The nearest installation of each position that is near one
+
+        Args:
+            frame (pd.DataFrame): positions with longitude and latitude
+                columns, e.g. from json_to_gdf
+            max_distance (float): how near the installation must be, in meters
+
+        Returns:
+            pd.DataFrame: installation (its index label) and distance in meters,
+                indexed like the positions that are near an installation
+        """
+        positions, installations, distances = self.query_nearest(
+            frame["longitude"].to_numpy(), frame["latitude"].to_numpy(), max_distance
+        )
+        return pd.DataFrame(
+            {"installation": self._labels[installations], "distance": distances},
+            index=frame.index[positions],
+        )
+
+    def visits(  # type: ignore[no-any-unimported]
+        self,
+        frame: pd.DataFrame,
+        max_distance: float,
+        max_gap: Optional[timedelta] = None,
+    ) -> pd.DataFrame:
+        """When each ship was near each installation
+
+        A visit lasts as long as the positions of the ship are near the same
+        installation. It ends at the first position that is not, or when there
+        is more than max_gap between two positions.
+
+        Args:
+            frame (pd.DataFrame): positions with mmsi, msgtime, longitude and
+                latitude columns, in any order
+            max_distance (float): how near the installation must be, in meters
+            max_gap (Optional[timedelta]): end the visit when there is more
+                than max_gap between two positions. Defaults to None, no limit.
+
+        Returns:
+            pd.DataFrame: one row per visit with mmsi, installation, start, end,
+                points and the closest distance in meters, sorted by start
+        """
+        mmsi = frame["mmsi"].to_numpy()
+        msgtime = frame["msgtime"].to_numpy(dtype="datetime64[ns]").view("int64")
+        order = np.lexsort((msgtime, mmsi))
+        mmsi, msgtime = mmsi[order], msgtime[order]
+
+        positions, installations, distances = self.query_nearest(
+            frame["longitude"].to_numpy()[order],
+            frame["latitude"].to_numpy()[order],
+            max_distance,
+        )
+        nearest = np.full(len(mmsi), -1)
+        nearest[positions] = installations
+        distance = np.full(len(mmsi), np.nan)
+        distance[positions] = distances
+
+        # A visit starts where the ship comes near an installation, or a new one
+        starts = np.ones(len(mmsi), dtype=bool)
+        starts[1:] = (mmsi[1:] != mmsi[:-1]) | (nearest[1:] != nearest[:-1])
+        if max_gap is not None:
+            starts[1:] |= np.diff(msgtime) > pd.Timedelta(max_gap).value
+
+        near = nearest >= 0
+        visit_ids = (np.cumsum(starts) - 1)[near]
+        mmsi, msgtime = mmsi[near], msgtime[near]
+        nearest, distance = nearest[near], distance[near]
+
+        first = np.ones(len(visit_ids), dtype=bool)
+        first[1:] = visit_ids[1:] != visit_ids[:-1]
+        last = np.ones(len(visit_ids), dtype=bool)
+        last[:-1] = first[1:]
+        start_index = np.flatnonzero(first)
+
+        tz = frame["msgtime"].dt.tz
+        visits = pd.DataFrame(
+            {
+                "mmsi": mmsi[first],
+                "installation": self._labels[nearest[first]],
+                "start": nanoseconds_to_datetimes(msgtime[first], tz),
+                "end": nanoseconds_to_datetimes(msgtime[last], tz),
+                "points": np.diff(np.append(start_index, len(visit_ids))),
+                "distance": (
+                    np.minimum.reduceat(distance, start_index)
+                    if len(start_index)
+                    else np.zeros(0)
+                ),
+            }
+        )
+        return visits.sort_values(["start", "mmsi"], ignore_index=True)
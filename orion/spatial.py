@@ -0,0 +1,162 @@
+"""
+Helpers for working with geometries, used by the clients to prepare queries.
+"""
+
+import math
+from typing import Dict, List
+
+import geopandas
+import numpy as np
+import numpy.typing as npt
+import pyproj
+import shapely
+from shapely.geometry import mapping, shape
+
+from orion.projection import transform_geometries
+
+# Metric projection used when measuring and cutting geometries
+METRIC_CRS = 23032
+
+# Tiles are made a little smaller than the limit, as areas measured in different
+# projections differ slightly
+TILE_MARGIN = 0.95
+
+# Segments in a quarter circle when buffering, same as geopandas
+BUFFER_RESOLUTION = 16
+
+# Ellipsoid used for geodesic circles
+GEOD = pyproj.Geod(ellps="WGS84")
+
+
+def points_in_geometry(  # type: ignore[no-any-unimported]
+    geometry: Dict[str, object], longitudes: np.ndarray, latitudes: np.ndarray
+) -> np.ndarray:
+    """Check which points are inside a geometry
+
+    The geometry is prepared once and tested against the coordinate arrays
+    directly, without making a shapely object per point. Points on the edge of
+    the geometry count as inside.
+
+    Args:
+        geometry (Dict[str, object]): GeoJSON geometry in EPSG:4326
+        longitudes (np.ndarray): longitude of each point
+        latitudes (np.ndarray): latitude of each point
+
+    Returns:
+        np.ndarray: boolean mask, True for the points inside the geometry
+    """
+    geom = shape(geometry)
+    shapely.prepare(geom)
+
+    return shapely.intersects_xy(geom, longitudes, latitudes)
+
+
+def buffer_points(
+    longitudes: npt.ArrayLike,
+    latitudes: npt.ArrayLike,
+    distance: npt.ArrayLike,
+    geodesic: bool = False,
+    crs: int = METRIC_CRS,
+    resolution: int = BUFFER_RESOLUTION,
+) -> np.ndarray:
+    """Buffer many points at once
+
+    By default the points are buffered in a metric projection, the same way as
+    Orion.buffer_around_point. With geodesic=True the circles are computed on
+    the WGS84 ellipsoid instead, which needs no projection and is correct far
+    from the area the projection is made for.
+
+    Args:
+        longitudes (ArrayLike): longitude of each point
+        latitudes (ArrayLike): latitude of each point
+        distance (ArrayLike): distance in meters, one for all points or one per
+            point
+        geodesic (bool): make geodesic circles. Defaults to False.
+        crs (int): metric projection used when not geodesic. Defaults to
+            METRIC_CRS.
+        resolution (int): segments in a quarter circle. Defaults to
+            BUFFER_RESOLUTION.
+
+    Returns:
+        np.ndarray: shapely polygons in EPSG:4326
+    """
+    lons = np.asarray(longitudes, dtype="float64")
+    lats = np.asarray(latitudes, dtype="float64")
+    distances = np.broadcast_to(np.asarray(distance, dtype="float64"), lons.shape)
+
+    if geodesic:
+        return geodesic_circles(lons, lats, distances, 4 * resolution)
+
+    points = transform_geometries(shapely.points(lons, lats), 4326, crs)
+    buffers = shapely.buffer(points, distances, quad_segs=resolution)
+    return transform_geometries(buffers, crs, 4326)
+
+
+def geodesic_circles(
+    longitudes: np.ndarray,
+    latitudes: np.ndarray,
+    distances: np.ndarray,
+    segments: int = 4 * BUFFER_RESOLUTION,
+) -> np.ndarray:
+    """Circles on the WGS84 ellipsoid around many points at once
+
+    Args:
+        longitudes (np.ndarray): longitude of each center
+        latitudes (np.ndarray): latitude of each center
+        distances (np.ndarray): radius of each circle in meters
+        segments (int): segments in each circle. Defaults to 64.
+
+    Returns:
+        np.ndarray: shapely polygons in EPSG:4326
+    """
+    count = len(longitudes)
+    azimuths = np.linspace(0, -360, segments, endpoint=False)
+
+    lons, lats, _ = GEOD.fwd(
+        np.repeat(longitudes, segments),
+        np.repeat(latitudes, segments),
+        np.tile(azimuths, count),
+        np.repeat(distances, segments),
+    )
+
+    rings = np.stack([lons, lats], axis=-1).reshape(count, segments, 2)
+    rings = np.concatenate([rings, rings[:, :1]], axis=1)
+    return shapely.polygons(rings)
+
+
+def tile_geometry(
+    geometry: Dict[str, object], max_area: float, crs: int = METRIC_CRS
+) -> List[Dict[str, object]]:
+    """Split a GeoJSON geometry into tiles no larger than max_area
+
+    The geometry is cut by a grid of squares, so each tile is the part of the
+    geometry inside one square. Geometries that are small enough are returned
+    as they are.
+
+    Args:
+        geometry (Dict[str, object]): GeoJSON geometry in EPSG:4326
+        max_area (float): the largest area of a tile in km^2
+        crs (int): metric projection used to measure and cut the geometry.
+            Defaults to METRIC_CRS.
+
+    Returns:
+        List[Dict[str, object]]: GeoJSON polygons in EPSG:4326
+    """
+    projected = geopandas.GeoSeries([shape(geometry)], crs=4326).to_crs(epsg=crs)
+    geom = projected.iloc[0]
+
+    if geom.area <= max_area * 1_000_000:
+        return [geometry]
+
+    side = math.sqrt(max_area * 1_000_000 * TILE_MARGIN)
+    minx, miny, maxx, maxy = geom.bounds
+    xs, ys = np.meshgrid(np.arange(minx, maxx, side), np.arange(miny, maxy, side))
+    cells = shapely.box(xs.ravel(), ys.ravel(), xs.ravel() + side, ys.ravel() + side)
+
+    shapely.prepare(geom)
+    cells = cells[shapely.intersects(geom, cells)]
+    parts = shapely.get_parts(shapely.intersection(cells, geom))
+    tiles = parts[(shapely.get_type_id(parts) == 3) & (shapely.area(parts) > 0)]
+
+    tiles_4326 = geopandas.GeoSeries(tiles, crs=crs).to_crs(epsg=4326)
+    return [mapping(tile) for tile in tiles_4326]
@@ -0,0 +1,380 @@
+"""
+AisStream, a consumer of live AIS positions sent over HTTP.
+
+The feed can be server-sent events (SSE) or newline delimited JSON (NDJSON),
+told apart by the content type of the response. The connection is read by a
+background task into a bounded queue. When the queue is full the task stops
+reading, so a slow consumer slows down the connection instead of filling up
+memory. When the connection drops it is opened again, and for SSE the last
+event id is sent so the feed can continue where it stopped.
+
+Example:
+import asyncio
+from orion import AsyncOrion
+
+async def main():
+    async with AsyncOrion() as orion:
+        async with orion.stream_ais() as stream:
+            async for batch in stream.batches():
+                print(len(batch))
+
+asyncio.run(main())
+"""
+
+import asyncio
+import json
+import logging
+import os
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple, Type, Union
+
+import httpx
+
+from orion.token import AsyncTokenManager
+from orion.types.ais import Ais
+from orion.urls import URLS
+
+_log_fmt = "%(asctime)s - %(module)s - %(levelname)s - %(message)s"
+logging.basicConfig(level=os.environ.get("LOGLEVEL", "INFO"), format=_log_fmt)
+logger = logging.getLogger(__name__)
+
+LIVE_AIS_SSE = f"{URLS['LIVE_AIS']}/sse/combined"
+
+# Positions kept waiting for the consumer before the connection is paused
+DEFAULT_MAX_QUEUE = 10_000
+
+# Positions handed to the consumer at a time, and seconds to wait for them
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_BATCH_TIMEOUT = 1.0
+
+# Seconds to wait before connecting again, doubled after each failed attempt
+DEFAULT_RECONNECT_DELAY = 1.0
+DEFAULT_MAX_RECONNECT_DELAY = 60.0
+
+# Seconds without any data before the connection is taken as lost
+DEFAULT_READ_TIMEOUT = 120.0
+
+# Status codes that are worth connecting again after
+RETRY_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+AIS_FIELDS = set(Ais.__annotations__)
+
+# Put in the queue when the stream has ended
+_END = object()
+
+
+def decode_message(data: str) -> Optional[Ais]:
+    """Decode one message from the feed
+
+    Args:
+        data (str): the JSON of the message
+
+    Returns:
+        Optional[Ais]: the fields of the message that are in Ais, leaving out
+            null values. None if the message is not a position.
+    """
+    message = json.loads(data)
+    if not isinstance(message, dict):
+        return None
+    if any(message.get(key) is None for key in ("mmsi", "latitude", "longitude")):
+        return None
+
+    return Ais(  # type: ignore[misc]
+        **{k: v for k, v in message.items() if k in AIS_FIELDS and v is not None}
+    )
+
+
+class SseParser:
+    """
+    Turns lines of a server-sent event stream into events
+
+    Only the data, id and retry fields are used. Lines starting with a colon
+    are comments, often sent to keep the connection open.
+    """
+
+    def __init__(self) -> None:
+        self.last_event_id: Optional[str] = None
+        self.retry: Optional[float] = None
+        self._data: List[str] = []
+
+    def feed(self, line: str) -> Optional[str]:
+        """Read one line of the stream, without the line ending
+
+        Args:
+            line (str): the line
+
+        Returns:
+            Optional[str]: the data of the event, when the line ends one
+        """
+        if not line:
+            data = "\n".join(self._data) if self._data else None
+            self._data = []
+            return data
+        if line.startswith(":"):
+            return None
+
+        name, _, value = line.partition(":")
+        value = value[1:] if value.startswith(" ") else value
+        if name == "data":
+            self._data.append(value)
+        elif name == "id" and "\0" not in value:
+            self.last_event_id = value
+        elif name == "retry" and value.isdigit():
+            self.retry = int(value) / 1000
+
+        return None
+
+
+class AisStream:
+    """
+    Reads live AIS positions from a feed into a bounded queue, in the
+    background
+
+    async with AisStream(url, tokens=orion.tokens) as stream:
+        async for batch in stream.batches():
+            ...
+
+    Args:
+        url (str): the feed. Defaults to LIVE_AIS_SSE.
+        tokens (Optional[AsyncTokenManager]): send a token from here, and get a
+            new one when the feed answers unauthorized. Defaults to None, no
+            token.
+        body (Optional[Dict[str, object]]): POST this JSON, e.g. a filter,
+            instead of a GET. Defaults to None.
+        decorate (Optional[Callable]): called with each batch before it is
+            handed over, e.g. Orion.add_jurisdiction_and_ship_type. Defaults to
+            None.
+        max_queue (int): positions waiting for the consumer before reading
+            stops. Defaults to DEFAULT_MAX_QUEUE.
+        batch_size (int): most positions in a batch. Defaults to
+            DEFAULT_BATCH_SIZE.
+        batch_timeout (float): seconds to wait for a batch to fill up. Defaults
+            to DEFAULT_BATCH_TIMEOUT.
+        reconnect_delay (float): seconds before connecting again, doubled after
+            each failed attempt. Defaults to DEFAULT_RECONNECT_DELAY.
+        max_reconnect_delay (float): longest wait before connecting again.
+            Defaults to DEFAULT_MAX_RECONNECT_DELAY.
+        max_reconnects (Optional[int]): give up after this many attempts in a
+            row without receiving anything, also when each new token is
+            rejected. Defaults to None, never give up.
+        read_timeout (float): seconds without data before connecting again.
+            Defaults to DEFAULT_READ_TIMEOUT.
+    """
+
+    def __init__(
+        self,
+        url: str = LIVE_AIS_SSE,
+        tokens: Optional[AsyncTokenManager] = None,
+        body: Optional[Dict[str, object]] = None,
+        decorate: Optional[Callable[[List[Ais]], List[Ais]]] = None,
+        max_queue: int = DEFAULT_MAX_QUEUE,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        batch_timeout: float = DEFAULT_BATCH_TIMEOUT,
+        reconnect_delay: float = DEFAULT_RECONNECT_DELAY,
+        max_reconnect_delay: float = DEFAULT_MAX_RECONNECT_DELAY,
+        max_reconnects: Optional[int] = None,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+    ) -> None:
+        self.url = url
+        self.tokens = tokens
+        self.body = body
+        self.decorate = decorate
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.max_reconnects = max_reconnects
+
+        self.last_event_id: Optional[str] = None
+        # Connections opened and positions put in the queue so far
+        self.connections = 0
+        self.received = 0
+        self.queue: "asyncio.Queue[Union[Ais, object]]" = asyncio.Queue(max_queue)
+
+        self._session = httpx.AsyncClient(
+            timeout=httpx.Timeout(DEFAULT_READ_TIMEOUT, read=read_timeout)
+        )
+        self._task: Optional["asyncio.Task[None]"] = None
+        self._error: Optional[Exception] = None
+        self._ended = False
+
+    async def __aenter__(self) -> "AisStream":
+        self.start()
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        tb: object,
+    ) -> None:
+        await self.aclose()
+
+    def start(self) -> None:
+        """
+        Start reading the feed in the background
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def aclose(self) -> None:
+        """
+        Stop reading the feed and close the connection
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        await self._session.aclose()
+
+    def _headers(self, token: Optional[str]) -> Dict[str, str]:
+        headers = {"Accept": "text/event-stream, application/x-ndjson"}
+        if token is not None:
+            headers["Authorization"] = f"Bearer {token}"
+        if self.last_event_id is not None:
+            headers["Last-Event-ID"] = self.last_event_id
+        return headers
+
+    async def _consume(self) -> Tuple[int, Optional[float]]:
+        """Read the feed until the connection ends
+
+        Raises:
+            httpx.HTTPStatusError: the feed answered with an error, also when
+                the new token is rejected
+
+        Returns:
+            Tuple[int, Optional[float]]: positions received, and the reconnect
+                delay the server asked for
+        """
+        token = await self.tokens.get() if self.tokens is not None else None
+        method = "GET" if self.body is None else "POST"
+        async with self._session.stream(
+            method, self.url, headers=self._headers(token), json=self.body
+        ) as response:
+            if response.status_code != httpx.codes.UNAUTHORIZED or self.tokens is None:
+                return await self._read(response)
+            logger.info("Fetching new token as the previous token expired")
+            token = await self.tokens.refresh(token)
+
+        # Only one new token per attempt, if it is rejected too the attempt
+        # has failed
+        async with self._session.stream(
+            method, self.url, headers=self._headers(token), json=self.body
+        ) as response:
+            return await self._read(response)
+
+    async def _read(self, response: httpx.Response) -> Tuple[int, Optional[float]]:
+        """Put the positions of an open connection in the queue"""
+        response.raise_for_status()
+        self.connections += 1
+        received = 0
+
+        sse = "text/event-stream" in response.headers.get("content-type", "")
+        parser = SseParser()
+        parser.last_event_id = self.last_event_id
+
+        async for line in response.aiter_lines():
+            data = parser.feed(line.rstrip("\r\n")) if sse else line.strip()
+            if sse:
+                self.last_event_id = parser.last_event_id
+            if not data:
+                continue
+
+            try:
+                ais = decode_message(data)
+            except ValueError as err:
+                logger.warning(f"Skipping a message that is not valid JSON: {err}")
+                continue
+            if ais is not None:
+                # Waits while the queue is full, which stops the reading
+                await self.queue.put(ais)
+                received += 1
+                self.received += 1
+
+        return received, parser.retry if sse else None
+
+    async def _run(self) -> None:
+        delay = self.reconnect_delay
+        attempts = 0
+
+        try:
+            while True:
+                try:
+                    received, retry = await self._consume()
+                    logger.info("The AIS stream was closed, connecting again")
+                except httpx.HTTPStatusError as err:
+                    status = err.response.status_code
+                    # A rejected token is retried too, with a new token
+                    rejected = (
+                        status == httpx.codes.UNAUTHORIZED and self.tokens is not None
+                    )
+                    if status not in RETRY_STATUS and not rejected:
+                        raise
+                    received, retry = 0, None
+                    logger.warning(f"The AIS stream failed, connecting again: {err}")
+                except httpx.TransportError as err:
+                    received, retry = 0, None
+                    logger.warning(f"The AIS stream failed, connecting again: {err}")
+
+                if received:
+                    delay, attempts = self.reconnect_delay, 0
+                else:
+                    attempts += 1
+                if self.max_reconnects is not None and attempts > self.max_reconnects:
+                    raise ConnectionError(
+                        f"The AIS stream failed {attempts} times in a row"
+                    )
+
+                await asyncio.sleep(retry if retry is not None else delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+        except Exception as err:
+            self._error = err
+            await self.queue.put(_END)
+
+    async def _next(self, timeout: Optional[float] = None) -> Union[Ais, object]:
+        if self._ended:
+            return _END
+        item = await asyncio.wait_for(self.queue.get(), timeout)
+        if item is _END:
+            self._ended = True
+        return item
+
+    async def batches(self) -> AsyncIterator[List[Ais]]:
+        """Hand over the positions in batches
+
+        A batch is handed over when it has batch_size positions, or
+        batch_timeout seconds after its first position. Waits as long as it
+        takes for the first position.
+
+        Raises:
+            ConnectionError: the feed failed max_reconnects times in a row
+            httpx.HTTPStatusError: the feed answered with an error that won't
+                go away by connecting again
+
+        Yields:
+            List[Ais]: the positions in the order they were received
+        """
+        self.start()
+        loop = asyncio.get_running_loop()
+
+        while True:
+            item = await self._next()
+            if item is _END:
+                break
+
+            batch: List[Ais] = [item]  # type: ignore[list-item]
+            deadline = loop.time() + self.batch_timeout
+            while len(batch) < self.batch_size:
+                try:
+                    item = await self._next(max(deadline - loop.time(), 0))
+                except asyncio.TimeoutError:
+                    break
+                if item is _END:
+                    break
+                batch.append(item)  # type: ignore[arg-type]
+
+            yield self.decorate(batch) if self.decorate else batch
+
+        if self._error is not None:
+            raise self._error
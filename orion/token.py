@@ -0,0 +1,249 @@
+"""
+Token handling for the Barentswatch API.
+
+The token is refreshed a little before it expires, so requests don't fail
+with 401 when it runs out. Only one caller refreshes the token at a time, the
+others wait and use the new token. The token can be kept in a file, so short
+lived scripts can reuse it instead of asking for a new one on every run. The
+file holds one token per client id, so clients with different credentials can
+share it.
+"""
+
+import json
+import os
+import threading
+import time
+from asyncio import Lock
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Optional
+
+# Refresh the token this many seconds before it expires, at most half of the
+# lifetime of the token
+DEFAULT_MARGIN = 60
+
+# Used when the token response does not say when the token expires
+DEFAULT_EXPIRES_IN = 3600
+
+
+@dataclass
+class Token:
+    """
+    An access token, the time it expires and the time it was fetched, in
+    seconds since the epoch
+    """
+
+    access_token: str
+    expires_at: float
+    fetched_at: float = field(default_factory=time.time)
+
+    @classmethod
+    def from_response(cls, data: Dict[str, object]) -> "Token":
+        """Create a token from the response of the token endpoint
+
+        Args:
+            data (Dict[str, object]): json with access_token and expires_in
+
+        Returns:
+            Token: the token
+        """
+        expires_in = float(data.get("expires_in") or DEFAULT_EXPIRES_IN)  # type: ignore
+        now = time.time()
+        return cls(str(data["access_token"]), now + expires_in, now)
+
+    def expires_soon(self, margin: float = DEFAULT_MARGIN) -> bool:
+        """Check if the token expires within margin seconds
+
+        The margin is at most half of the lifetime of the token, so a token that
+        lives shorter than the margin can still be used for a while.
+
+        Args:
+            margin (float): seconds. Defaults to DEFAULT_MARGIN.
+
+        Returns:
+            bool: True if the token should be refreshed
+        """
+        margin = min(margin, (self.expires_at - self.fetched_at) / 2)
+        return time.time() + margin >= self.expires_at
+
+
+@dataclass
+class TokenStore:
+    """
+    Keeps tokens in a json file, readable only by the current user. The tokens
+    are kept per key, the client id, so clients with different credentials can
+    use the same file.
+    """
+
+    path: str
+    key: str = ""
+
+    def _read(self) -> Dict[str, Dict[str, object]]:
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict):
+            return {}
+        return {k: v for k, v in data.items() if isinstance(v, dict)}
+
+    def load(self) -> Optional[Token]:
+        """Load the token for the key from the file
+
+        Returns:
+            Optional[Token]: the token, or None if there is no usable token
+        """
+        try:
+            data = self._read()[self.key]
+            expires_at = float(data["expires_at"])  # type: ignore[arg-type]
+            fetched_at = float(data.get("fetched_at", 0))  # type: ignore[arg-type]
+            return Token(str(data["access_token"]), expires_at, fetched_at)
+        except (ValueError, KeyError, TypeError):
+            return None
+
+    def save(self, token: Token) -> None:
+        """Save the token for the key to the file, keeping the other tokens
+
+        Args:
+            token (Token): the token to save
+        """
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+
+        data = self._read()
+        data[self.key] = {
+            "access_token": token.access_token,
+            "expires_at": token.expires_at,
+            "fetched_at": token.fetched_at,
+        }
+
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+
+class _BaseTokenManager:
+    def __init__(
+        self, store: Optional[TokenStore] = None, margin: float = DEFAULT_MARGIN
+    ) -> None:
+        self.store = store
+        self.margin = margin
+        self.token = store.load() if store else None
+
+    @property
+    def access(self) -> str:
+        """The current token, without refreshing it"""
+        return self.token.access_token if self.token else ""
+
+    def _is_usable(self) -> bool:
+        return self.token is not None and not self.token.expires_soon(self.margin)
+
+    def _is_replaced(self, expired: Optional[str]) -> bool:
+        # Someone else fetched a new token while we waited for the lock
+        return expired is not None and self.access != expired
+
+    def _update(self, data: Dict[str, object]) -> str:
+        self.token = Token.from_response(data)
+        if self.store:
+            self.store.save(self.token)
+        return self.token.access_token
+
+
+class TokenManager(_BaseTokenManager):
+    """
+    Keeps a valid token for a client that is shared between threads
+
+    Args:
+        fetch (Callable): fetches a new token, returns the json from the
+            token endpoint with access_token and expires_in
+        store (Optional[TokenStore]): keep the token in a file. Defaults to None.
+        margin (float): refresh the token this many seconds before it expires.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[], Dict[str, object]],
+        store: Optional[TokenStore] = None,
+        margin: float = DEFAULT_MARGIN,
+    ) -> None:
+        super().__init__(store, margin)
+        self._fetch = fetch
+        self._lock = threading.Lock()
+
+    def get(self) -> str:
+        """Get a token, refreshing it first if it is about to expire
+
+        Returns:
+            str: the token
+        """
+        if self._is_usable():
+            return self.access
+        return self.refresh(self.access)
+
+    def refresh(self, expired: Optional[str] = None) -> str:
+        """Fetch a new token
+
+        Args:
+            expired (Optional[str]): the token that failed or is about to
+                expire. If another thread has already replaced it, the new token
+                is used instead of fetching one more. Defaults to None, always
+                fetch a new token.
+
+        Returns:
+            str: the new token
+        """
+        with self._lock:
+            if self._is_replaced(expired):
+                return self.access
+            return self._update(self._fetch())
+
+
+class AsyncTokenManager(_BaseTokenManager):
+    """
+    Keeps a valid token for a client that is shared between asyncio tasks
+
+    Args:
+        fetch (Callable): coroutine function that fetches a new token, returns
+            the json from the token endpoint with access_token and expires_in
+        store (Optional[TokenStore]): keep the token in a file. Defaults to None.
+        margin (float): refresh the token this many seconds before it expires.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[], Awaitable[Dict[str, object]]],
+        store: Optional[TokenStore] = None,
+        margin: float = DEFAULT_MARGIN,
+    ) -> None:
+        super().__init__(store, margin)
+        self._fetch = fetch
+        self._lock = Lock()
+
+    async def get(self) -> str:
+        """Get a token, refreshing it first if it is about to expire
+
+        Returns:
+            str: the token
+        """
+        if self._is_usable():
+            return self.access
+        return await self.refresh(self.access)
+
+    async def refresh(self, expired: Optional[str] = None) -> str:
+        """Fetch a new token
+
+        Args:
+            expired (Optional[str]): the token that failed or is about to
+                expire. If another task has already replaced it, the new token
+                is used instead of fetching one more. Defaults to None, always
+                fetch a new token.
+
+        Returns:
+            str: the new token
+        """
+        async with self._lock:
+            if self._is_replaced(expired):
+                return self.access
+            return self._update(await self._fetch())
@@ -0,0 +1,106 @@
+"""
+Lines from AIS positions, one line per ship.
+
+The positions are sorted by ship and time once, and all the lines are made in
+one call to shapely, so there is no Python loop per position or per ship.
+
+Example:
+from orion import Orion
+
+orion = Orion()
+gdf = orion.json_to_gdf(orion.get_multiple_ais(mmsis, from_date, to_date))
+tracks = orion.points_to_tracks(gdf, max_gap=timedelta(hours=1))
+"""
+
+from datetime import timedelta
+from typing import Optional
+
+import geopandas
+import numpy as np
+import pandas as pd
+import shapely
+
+from orion.projection import apply_in_local_crs
+from orion.spatial import METRIC_CRS
+from orion.utils.dates import nanoseconds_to_datetimes
+
+
+def points_to_tracks(  # type: ignore[no-any-unimported]
+    gdf: geopandas.GeoDataFrame,
+    max_gap: Optional[timedelta] = None,
+    simplify: Optional[float] = None,
+    local_crs: bool = False,
+) -> geopandas.GeoDataFrame:
+    """Make one line per ship from a GeoDataFrame of positions
+
+    Args:
+        gdf (GeoDataFrame): positions with mmsi and msgtime columns and point
+            geometries, in any order
+        max_gap (Optional[timedelta]): start a new line for the ship when there
+            is more than max_gap between two positions. Defaults to None, one
+            line per ship.
+        simplify (Optional[float]): simplify the lines, threshold given in
+            meter. Defaults to None.
+        local_crs (bool): simplify each line in its UTM zone instead of
+            METRIC_CRS, see orion.projection.apply_in_local_crs. Defaults to
+            False.
+
+    Returns:
+        GeoDataFrame: one row per line with mmsi, start, end, points and the
+            line geometry, sorted by mmsi and start. Lines need at least two
+            positions, single positions are left out.
+    """
+    mmsi = gdf["mmsi"].to_numpy()
+    msgtime = gdf["msgtime"].to_numpy(dtype="datetime64[ns]").view("int64")
+
+    order = np.lexsort((msgtime, mmsi))
+    mmsi = mmsi[order]
+    msgtime = msgtime[order]
+    geometry = gdf.geometry.to_numpy()[order]
+
+    # A new line starts at the first position, at every new ship and after gaps
+    starts = np.ones(len(mmsi), dtype=bool)
+    starts[1:] = mmsi[1:] != mmsi[:-1]
+    if max_gap is not None:
+        starts[1:] |= np.diff(msgtime) > pd.Timedelta(max_gap).value
+
+    line_ids = np.cumsum(starts) - 1
+    counts = np.bincount(line_ids) if len(line_ids) else np.zeros(0, dtype=int)
+
+    keep = counts[line_ids] >= 2
+    line_ids = line_ids[keep]
+    _, line_ids = np.unique(line_ids, return_inverse=True)
+    first = starts[keep]
+    last = np.append(first[1:], True) if len(first) else first
+
+    lines = shapely.linestrings(
+        shapely.get_x(geometry[keep]),
+        shapely.get_y(geometry[keep]),
+        indices=line_ids,
+    )
+
+    tz = gdf["msgtime"].dt.tz
+    tracks = geopandas.GeoDataFrame(
+        {
+            "mmsi": mmsi[keep][first],
+            "start": nanoseconds_to_datetimes(msgtime[keep][first], tz),
+            "end": nanoseconds_to_datetimes(msgtime[keep][last], tz),
+            "points": counts[counts >= 2],
+        },
+        geometry=lines,
+        crs=gdf.crs,
+    )
+
+    if simplify is not None and local_crs:
+        simplified = apply_in_local_crs(
+            tracks.geometry.to_crs(epsg=4326).to_numpy(),
+            lambda g: shapely.simplify(g, simplify),
+        )
+        tracks = tracks.set_geometry(
+            geopandas.GeoSeries(simplified, crs=4326).to_crs(gdf.crs)
+        )
+    elif simplify is not None:
+        metric = tracks.geometry.to_crs(epsg=METRIC_CRS)
+        tracks = tracks.set_geometry(metric.simplify(simplify).to_crs(gdf.crs))
+
+    return tracks
@@ -1,4 +1,5 @@
-from typing import TypedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, TypedDict
 
 
 class Ais(TypedDict):
@@ -14,3 +15,31 @@ class Ais(TypedDict):
     msgtime: str
     jurisdiction: str
     shipTypeTxt: str
+
+
+@dataclass
+class MultipleAisResult:
+    """
+    The result of fetching AIS for several ships. Tracks are kept per MMSI in the
+    order the MMSIs were requested, and MMSIs that failed are kept in `errors`
+    instead of aborting the whole batch. An MMSI requested twice is fetched and
+    kept once.
+    """
+
+    ais: Dict[int, List[Ais]] = field(default_factory=dict)
+    errors: Dict[int, Exception] = field(default_factory=dict)
+
+    def combined(self, mmsis: Optional[List[int]] = None) -> List[Ais]:
+        """Combine the tracks of all ships that were fetched successfully
+
+        Args:
+            mmsis (Optional[List[int]]): combine the tracks in this order, a ship
+                given twice is combined twice. Defaults to None, each ship once
+                in the order it was fetched.
+
+        Returns:
+            List[Ais]: the tracks, one ship after the other
+        """
+        if mmsis is None:
+            return [a for track in self.ais.values() for a in track]
+        return [a for mmsi in mmsis for a in self.ais.get(mmsi, [])]
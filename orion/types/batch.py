@@ -0,0 +1,249 @@
+from dataclasses import dataclass, fields
+from typing import Iterable, List, Optional
+
+import geopandas
+import numpy as np
+import pandas as pd
+
+from orion.types.ais import Ais
+from orion.utils.dates import format_msgtimes, parse_msgtimes
+
+# Used for shipType when the position has no ship type
+NO_SHIP_TYPE = -1
+
+
+def _column(ais: List[Ais], key: str, dtype: str, missing: object) -> np.ndarray:
+    values = (a.get(key, missing) for a in ais)  # type: ignore[misc]
+    return np.fromiter(
+        (missing if v is None else v for v in values), dtype=dtype, count=len(ais)
+    )
+
+
+@dataclass
+class AisBatch:
+    """
+    AIS positions kept as one NumPy array per field instead of one dict per
+    position. Positions without a heading or rate of turn get NaN, positions
+    without a ship type get NO_SHIP_TYPE, and positions without a name get None.
+    jurisdiction and shipTypeTxt are not kept, as they follow from mmsi and
+    shipType, see Orion.add_jurisdiction_and_ship_type.
+
+    msgtime is nanoseconds since the epoch in UTC, the way pandas stores
+    datetimes, so it can be turned into a datetime column without parsing.
+    """
+
+    mmsi: np.ndarray
+    msgtime: np.ndarray
+    latitude: np.ndarray
+    longitude: np.ndarray
+    speedOverGround: np.ndarray
+    courseOverGround: np.ndarray
+    trueHeading: np.ndarray
+    shipType: np.ndarray
+    rateOfTurn: np.ndarray
+    name: np.ndarray
+
+    def __post_init__(self) -> None:
+        self.mmsi = np.asarray(self.mmsi, dtype="int64")
+        self.msgtime = np.asarray(self.msgtime, dtype="int64")
+        self.latitude = np.asarray(self.latitude, dtype="float64")
+        self.longitude = np.asarray(self.longitude, dtype="float64")
+        self.speedOverGround = np.asarray(self.speedOverGround, dtype="float64")
+        self.courseOverGround = np.asarray(self.courseOverGround, dtype="float64")
+        self.trueHeading = np.asarray(self.trueHeading, dtype="float64")
+        self.shipType = np.asarray(self.shipType, dtype="int16")
+        self.rateOfTurn = np.asarray(self.rateOfTurn, dtype="float64")
+        self.name = np.asarray(self.name, dtype=object)
+
+    def __len__(self) -> int:
+        return len(self.mmsi)
+
+    @classmethod
+    def empty(cls) -> "AisBatch":
+        """A batch without positions"""
+        return cls(*(np.empty(0) for _ in fields(cls)))
+
+    @classmethod
+    def from_ais(cls, ais: List[Ais]) -> "AisBatch":
+        """Create a batch from positions as returned by the API
+
+        Args:
+            ais (List[Ais]): the positions
+
+        Returns:
+            AisBatch: the positions as columns
+        """
+        msgtime = parse_msgtimes([a["msgtime"] for a in ais])
+
+        return cls(
+            mmsi=_column(ais, "mmsi", "int64", 0),
+            msgtime=msgtime.to_numpy("datetime64[ns]").view("int64"),
+            latitude=_column(ais, "latitude", "float64", np.nan),
+            longitude=_column(ais, "longitude", "float64", np.nan),
+            speedOverGround=_column(ais, "speedOverGround", "float64", np.nan),
+            courseOverGround=_column(ais, "courseOverGround", "float64", np.nan),
+            trueHeading=_column(ais, "trueHeading", "float64", np.nan),
+            shipType=_column(ais, "shipType", "int16", NO_SHIP_TYPE),
+            rateOfTurn=_column(ais, "rateOfTurn", "float64", np.nan),
+            name=_column(ais, "name", "object", None),
+        )
+
+    @classmethod
+    def from_frame(  # type: ignore[no-any-unimported]
+        cls, frame: pd.DataFrame
+    ) -> "AisBatch":
+        """Create a batch from a dataframe of positions, e.g. from
+        HistoricOrion.get_ais_frame. Columns the frame does not have are left
+        empty, and missing ship types get NO_SHIP_TYPE.
+
+        Args:
+            frame (pd.DataFrame): positions with mmsi, msgtime, latitude and
+                longitude columns
+
+        Returns:
+            AisBatch: the positions as columns
+        """
+
+        def column(name: str, missing: object) -> np.ndarray:
+            if name not in frame:
+                return np.full(len(frame), missing)
+            values = frame[name].to_numpy(copy=True)
+            values[pd.isna(values)] = missing
+            return values
+
+        msgtime = pd.to_datetime(frame["msgtime"], utc=True)
+
+        return cls(
+            mmsi=frame["mmsi"].to_numpy(),
+            msgtime=msgtime.to_numpy("datetime64[ns]").view("int64"),
+            latitude=frame["latitude"].to_numpy(),
+            longitude=frame["longitude"].to_numpy(),
+            speedOverGround=column("speedOverGround", np.nan),
+            courseOverGround=column("courseOverGround", np.nan),
+            trueHeading=column("trueHeading", np.nan),
+            shipType=column("shipType", NO_SHIP_TYPE),
+            rateOfTurn=column("rateOfTurn", np.nan),
+            name=column("name", None),
+        )
+
+    @classmethod
+    def concat(cls, batches: Iterable["AisBatch"]) -> "AisBatch":
+        """Join batches into one, in the order given
+
+        Args:
+            batches (Iterable[AisBatch]): the batches
+
+        Returns:
+            AisBatch: all the positions
+        """
+        batches = list(batches)
+        if not batches:
+            return cls.empty()
+
+        return cls(
+            *(
+                np.concatenate([getattr(b, f.name) for b in batches])
+                for f in fields(cls)
+            )
+        )
+
+    def msgtime_index(  # type: ignore[no-any-unimported]
+        self, tz: Optional[str] = None
+    ) -> pd.DatetimeIndex:
+        """msgtime as datetimes, without parsing
+
+        Args:
+            tz (Optional[str]): convert to this timezone. Defaults to None, UTC.
+
+        Returns:
+            pd.DatetimeIndex: the time of each position
+        """
+        index = pd.DatetimeIndex(self.msgtime.view("datetime64[ns]")).tz_localize("UTC")
+        return index.tz_convert(tz) if tz else index
+
+    def to_frame(  # type: ignore[no-any-unimported]
+        self, tz: Optional[str] = None
+    ) -> pd.DataFrame:
+        """The positions as a dataframe, one column per field
+
+        Args:
+            tz (Optional[str]): convert msgtime to this timezone. Defaults to
+                None, UTC.
+
+        Returns:
+            pd.DataFrame: one row per position
+        """
+        columns = {f.name: getattr(self, f.name) for f in fields(self)}
+        columns["msgtime"] = self.msgtime_index(tz)
+
+        return pd.DataFrame(columns, copy=False)
+
+    def to_gdf(  # type: ignore[no-any-unimported]
+        self, tz: Optional[str] = None
+    ) -> geopandas.GeoDataFrame:
+        """The positions as a GeoDataFrame with point geometries in EPSG:4326
+
+        Args:
+            tz (Optional[str]): convert msgtime to this timezone. Defaults to
+                None, UTC.
+
+        Returns:
+            geopandas.GeoDataFrame: one row per position
+        """
+        geometry = geopandas.points_from_xy(self.longitude, self.latitude)
+        return geopandas.GeoDataFrame(self.to_frame(tz), geometry=geometry, crs=4326)
+
+    def to_ais(self) -> List[Ais]:
+        """The positions as dicts, the way the API returns them. Missing values
+        are None, and msgtime is in UTC as +00:00 with the precision it was
+        given in. jurisdiction and shipTypeTxt are not included, add them with
+        Orion.add_jurisdiction_and_ship_type.
+
+        Returns:
+            List[Ais]: one dict per position
+        """
+        msgtime = format_msgtimes(self.msgtime)
+        heading = self.trueHeading.astype(object)
+        heading[np.isnan(self.trueHeading)] = None
+        ship_type = self.shipType.astype(object)
+        ship_type[self.shipType == NO_SHIP_TYPE] = None
+        rate_of_turn = self.rateOfTurn.astype(object)
+        rate_of_turn[np.isnan(self.rateOfTurn)] = None
+
+        return [
+            Ais(  # type: ignore[typeddict-item]
+                mmsi=int(mmsi),
+                msgtime=str(time),
+                latitude=float(latitude),
+                longitude=float(longitude),
+                speedOverGround=float(sog),
+                courseOverGround=float(cog),
+                trueHeading=None if true_heading is None else int(true_heading),
+                shipType=None if type_ is None else int(type_),
+                rateOfTurn=None if rot is None else float(rot),
+                name=name,
+            )
+            for (
+                mmsi,
+                time,
+                latitude,
+                longitude,
+                sog,
+                cog,
+                true_heading,
+                type_,
+                rot,
+                name,
+            ) in zip(
+                self.mmsi,
+                msgtime,
+                self.latitude,
+                self.longitude,
+                self.speedOverGround,
+                self.courseOverGround,
+                heading,
+                ship_type,
+                rate_of_turn,
+                self.name,
+            )
+        ]
@@ -1,5 +1,6 @@
 URLS = {
     "TOKEN": "https://id.barentswatch.no/connect/token",
     "HISTORIC_AIS": "https://historic.ais.barentswatch.no/open/v1",
+    "LIVE_AIS": "https://live.ais.barentswatch.no/live/v1",
     "KYSTDATAHUSET": "https://kystdatahuset.no/ws/api",
 }
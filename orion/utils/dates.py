@@ -0,0 +1,139 @@
+import math
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+import numpy as np
+import numpy.typing as npt
+import pandas as pd
+
+# The format of msgtime in the responses from the APIs
+MSGTIME_FORMAT = "%Y-%m-%dT%H:%M:%S%z"
+
+
+def parse_date(date: str) -> datetime:
+    """Parse an ISO 8601 date. Dates without a timezone are taken to be in UTC
+
+    Args:
+        date (str): the date, example: 2021-07-21T00:00:00Z
+
+    Returns:
+        datetime: timezone aware datetime
+    """
+    dt = datetime.fromisoformat(date.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt
+
+
+def parse_msgtimes(  # type: ignore[no-any-unimported]
+    msgtimes: npt.ArrayLike,
+) -> pd.DatetimeIndex:
+    """Parse many msgtimes at once, in the format the APIs use. Other formats
+    are parsed too, only slower.
+
+    Args:
+        msgtimes (ArrayLike): the dates, example: 2023-02-08T02:53:25+00:00
+
+    Returns:
+        pd.DatetimeIndex: the dates in UTC
+    """
+    try:
+        return pd.DatetimeIndex(
+            pd.to_datetime(msgtimes, format=MSGTIME_FORMAT, utc=True)
+        )
+    except ValueError:
+        return pd.DatetimeIndex(pd.to_datetime(msgtimes, utc=True))
+
+
+def nanoseconds_to_datetimes(  # type: ignore[no-any-unimported]
+    nanoseconds: np.ndarray, tz: Optional[object] = None
+) -> pd.DatetimeIndex:
+    """Turn nanoseconds since the epoch in UTC into datetimes, without parsing
+
+    Args:
+        nanoseconds (np.ndarray): the times, as int64
+        tz (Optional[object]): convert to this timezone. Defaults to None,
+            naive datetimes in UTC.
+
+    Returns:
+        pd.DatetimeIndex: the times
+    """
+    times = pd.DatetimeIndex(nanoseconds.view("datetime64[ns]"))
+    return times.tz_localize("UTC").tz_convert(tz) if tz else times
+
+
+def format_msgtimes(nanoseconds: np.ndarray) -> np.ndarray:
+    """Format nanoseconds since the epoch in UTC the way the APIs send msgtime,
+    with as many decimals of the seconds as needed to keep the precision
+
+    Args:
+        nanoseconds (np.ndarray): the times, as int64
+
+    Returns:
+        np.ndarray: the dates, example: 2023-02-08T02:53:25+00:00
+    """
+    times = nanoseconds.view("datetime64[ns]")
+    formatted = np.datetime_as_string(times, "s").astype(object)
+    fraction = nanoseconds % 10**9 != 0
+    formatted[fraction] = np.datetime_as_string(times[fraction], "auto")
+    return formatted + "+00:00"
+
+
+def format_date(dt: datetime) -> str:
+    """Format a date the way the Barentswatch API likes them
+
+    Args:
+        dt (datetime): the date, naive dates are taken to be in UTC
+
+    Returns:
+        str: the date, example: 2021-07-21T00:00:00Z
+    """
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc)
+    return dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def split_time_range(
+    start: datetime, end: datetime, window: timedelta
+) -> List[Tuple[datetime, datetime]]:
+    """Split a timeframe into consecutive windows
+
+    Args:
+        start (datetime): start of the timeframe
+        end (datetime): end of the timeframe
+        window (timedelta): the length of each window, the last one may be shorter
+
+    Returns:
+        List[Tuple[datetime, datetime]]: start and end of each window
+    """
+    if window <= timedelta(0):
+        raise ValueError("The window must be longer than zero")
+
+    windows = []
+    while start < end:
+        windows.append((start, min(start + window, end)))
+        start += window
+    return windows
+
+
+def round_time_range(
+    start: datetime, end: datetime, resolution: timedelta
+) -> Tuple[datetime, datetime]:
+    """Widen a timeframe to whole steps of resolution, the start down and the end
+    up, so it can be sent to an API that only takes dates in such steps
+
+    Args:
+        start (datetime): start of the timeframe, timezone aware
+        end (datetime): end of the timeframe, timezone aware
+        resolution (timedelta): the step, example: timedelta(minutes=1)
+
+    Returns:
+        Tuple[datetime, datetime]: the widened timeframe, in UTC
+    """
+    step = resolution.total_seconds()
+    rounded_start = math.floor(start.timestamp() / step) * step
+    rounded_end = math.ceil(end.timestamp() / step) * step
+    return (
+        datetime.fromtimestamp(rounded_start, tz=timezone.utc),
+        datetime.fromtimestamp(rounded_end, tz=timezone.utc),
+    )
@@ -1,34 +1,207 @@
+"""
+Oil installations in Norwegian waters, from the NPD factpages.
+
+The factpages can be slow or out of reach, so the installations can be kept in
+a snapshot on disk and only downloaded again when the snapshot is older than
+max_age. The snapshot is a CSV file with the geometries as WKB, and a JSON file
+with when it was fetched.
+
+Example:
+from datetime import timedelta
+
+from orion.utils.get_data import get_oil_installations
+
+gdf = get_oil_installations(cache_dir="data", max_age=timedelta(days=30))
+gdf = get_oil_installations(cache_dir="data", offline=True)
+"""
+
+import json
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional, Tuple, Union
+
 import geopandas
 import pandas as pd
-from shapely import wkt
+import shapely
+
+logger = logging.getLogger(__name__)
+
+FACILITIES_URL = "https://factpages.npd.no/downloads/csv/fclPoint.zip"
+
+# Snapshots with another version are downloaded again
+SNAPSHOT_VERSION = 1
+SNAPSHOT_NAME = "oil_installations"
+DEFAULT_MAX_AGE = timedelta(days=7)
+
+
+def _snapshot_paths(cache_dir: Union[str, Path]) -> Tuple[Path, Path]:
+    directory = Path(cache_dir)
+    return directory / f"{SNAPSHOT_NAME}.csv", directory / f"{SNAPSHOT_NAME}.json"
+
+
+def _download_installations() -> pd.DataFrame:  # type: ignore[no-any-unimported]
+    df = pd.read_csv(FACILITIES_URL)
+    return df[
+        (df.fclPhase.isin(["IN SERVICE", "INSTALLATION", "FABRICATION"]))
+        & (df.fclPointGeometryWKT.notnull())
+    ]
+
+
+def _parse_installations(  # type: ignore[no-any-unimported]
+    df: pd.DataFrame,
+) -> geopandas.GeoDataFrame:
+    return _to_gdf(df, shapely.from_wkt(df.fclPointGeometryWKT.to_numpy()))
+
+
+def _to_gdf(  # type: ignore[no-any-unimported]
+    df: pd.DataFrame, geometry: object
+) -> geopandas.GeoDataFrame:
+    df = df.copy()
+    df["wkt"] = geometry
+    return geopandas.GeoDataFrame(df, geometry=df.wkt, crs="EPSG:4326")
+
+
+def fetched_at(cache_dir: Union[str, Path]) -> Optional[datetime]:
+    """When the snapshot in a directory was downloaded
+
+    Args:
+        cache_dir (Union[str, Path]): the directory of the snapshot
+
+    Returns:
+        Optional[datetime]: the time in UTC, None if there is no snapshot of
+            the current version
+    """
+    data_path, meta_path = _snapshot_paths(cache_dir)
+    if not data_path.exists() or not meta_path.exists():
+        return None
+
+    meta = json.loads(meta_path.read_text())
+    if meta.get("version") != SNAPSHOT_VERSION:
+        return None
+    return datetime.fromisoformat(meta["fetched_at"])
+
+
+def save_snapshot(  # type: ignore[no-any-unimported]
+    gdf: geopandas.GeoDataFrame, cache_dir: Union[str, Path]
+) -> None:
+    """Store installations in a snapshot, replacing the one in the directory
+
+    Args:
+        gdf (geopandas.GeoDataFrame): the installations, from
+            get_oil_installations
+        cache_dir (Union[str, Path]): the directory of the snapshot, created if
+            it does not exist
+    """
+    data_path, meta_path = _snapshot_paths(cache_dir)
+    data_path.parent.mkdir(parents=True, exist_ok=True)
+
+    df = pd.DataFrame(gdf.drop(columns=[gdf.geometry.name, "wkt"]))
+    df["wkb"] = shapely.to_wkb(gdf.geometry.to_numpy(), hex=True)
+    meta = {
+        "version": SNAPSHOT_VERSION,
+        "fetched_at": datetime.now(timezone.utc).isoformat(),
+        "url": FACILITIES_URL,
+    }
 
+    # Write to temporary files first, so a snapshot is never half written
+    df.to_csv(f"{data_path}.tmp")
+    Path(f"{meta_path}.tmp").write_text(json.dumps(meta))
+    os.replace(f"{data_path}.tmp", data_path)
+    os.replace(f"{meta_path}.tmp", meta_path)
 
-def get_oil_installations() -> geopandas.GeoDataFrame:  # type:ignore[no-any-unimported]
+
+def load_snapshot(  # type: ignore[no-any-unimported]
+    cache_dir: Union[str, Path]
+) -> geopandas.GeoDataFrame:
+    """Load installations from the snapshot in a directory
+
+    Args:
+        cache_dir (Union[str, Path]): the directory of the snapshot
+
+    Raises:
+        FileNotFoundError: there is no snapshot of the current version
+
+    Returns:
+        geopandas.GeoDataFrame: the installations, as get_oil_installations
+    """
+    if fetched_at(cache_dir) is None:
+        raise FileNotFoundError(f"No snapshot of the installations in {cache_dir}")
+
+    data_path, _ = _snapshot_paths(cache_dir)
+    df = pd.read_csv(data_path, index_col=0)
+    geometry = shapely.from_wkb(df.pop("wkb").to_numpy())
+
+    return _to_gdf(df, geometry)
+
+
+def get_oil_installations(  # type:ignore[no-any-unimported]
+    cache_dir: Optional[Union[str, Path]] = None,
+    max_age: timedelta = DEFAULT_MAX_AGE,
+    offline: bool = False,
+) -> geopandas.GeoDataFrame:
     """get all the oil installations in Norwegian waters
 
+    Args:
+        cache_dir (Optional[Union[str, Path]]): keep a snapshot in this
+            directory, and use it while it is newer than max_age. Defaults to
+            None, download every time.
+        max_age (timedelta): download again when the snapshot is older than
+            this. If the download fails, the old snapshot is used. Defaults to
+            DEFAULT_MAX_AGE.
+        offline (bool): only use the snapshot, never download. Defaults to
+            False.
+
+    Raises:
+        FileNotFoundError: offline is set and there is no snapshot
+
     Returns:
         geopandas.GeoDataFrame: geodataframe with all the oil installations
     """
-    df = pd.read_csv("https://factpages.npd.no/downloads/csv/fclPoint.zip")
-    df = df[
-        (df.fclPhase.isin(["IN SERVICE", "INSTALLATION", "FABRICATION"]))
-        & (df.fclPointGeometryWKT.notnull())
-    ]
-    df["wkt"] = df.fclPointGeometryWKT.apply(wkt.loads)
-    gdf = geopandas.GeoDataFrame(df, geometry=df.wkt)
-    gdf = gdf.set_crs("EPSG:4326")
+    if cache_dir is None:
+        if offline:
+            raise ValueError("cache_dir is needed to work offline")
+        return _parse_installations(_download_installations())
 
+    fetched = fetched_at(cache_dir)
+    if offline or (
+        fetched is not None and datetime.now(timezone.utc) - fetched < max_age
+    ):
+        return load_snapshot(cache_dir)
+
+    try:
+        gdf = _parse_installations(_download_installations())
+    except Exception:
+        if fetched is None:
+            raise
+        logger.warning("Could not download the installations, using the snapshot")
+        return load_snapshot(cache_dir)
+
+    save_snapshot(gdf, cache_dir)
     return gdf
 
 
-def get_oil_rigs() -> geopandas.GeoDataFrame:  # type: ignore[no-any-unimported]
+def get_oil_rigs(  # type: ignore[no-any-unimported]
+    cache_dir: Optional[Union[str, Path]] = None,
+    max_age: timedelta = DEFAULT_MAX_AGE,
+    offline: bool = False,
+) -> geopandas.GeoDataFrame:
     """
     Get all the oil rigs in Norwgian waters
 
+    Args:
+        cache_dir (Optional[Union[str, Path]]): keep a snapshot in this
+            directory, see get_oil_installations. Defaults to None.
+        max_age (timedelta): download again when the snapshot is older than
+            this. Defaults to DEFAULT_MAX_AGE.
+        offline (bool): only use the snapshot, never download. Defaults to
+            False.
+
     Returns:
         geopandas.GeoDataFrame: Gepandas dataframe with all the oil rigs
     """
-    gdf = get_oil_installations()
+    gdf = get_oil_installations(cache_dir, max_age, offline)
     gdf = gdf[
         ~gdf.fclKind.isin(
             ["LANDFALL", "LOADING SYSTEM", "OFFSHORE WIND", "ONSHORE FACILITY"]
@@ -1,6 +1,13 @@
 # Source: https://coast.noaa.gov/data/marinecadastre/ais/VesselTypeCodes2018.pdf
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import Dict, List, Optional
+
+import numpy as np
+import numpy.typing as npt
+import pandas as pd
+
+# Returned as name and description when the code is unknown
+NOT_FOUND = "Not Found"
 
 
 def make_vessel_codes() -> List["AisVesselCode"]:
@@ -599,6 +606,43 @@ class AisVesselCodes:
     """
 
     codes: List[AisVesselCode] = field(default_factory=make_vessel_codes)
+    _index: np.ndarray = field(init=False, repr=False, compare=False)
+    _names: np.ndarray = field(init=False, repr=False, compare=False)
+    _descriptions: np.ndarray = field(init=False, repr=False, compare=False)
+    _name_codes: np.ndarray = field(init=False, repr=False, compare=False)
+    _categories: pd.Index = field(  # type: ignore[no-any-unimported]
+        init=False, repr=False, compare=False
+    )
+    _by_name: Dict[str, List[int]] = field(init=False, repr=False, compare=False)
+    _by_description: Dict[str, List[int]] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        # Position in codes for every code from 0 to the highest code, -1 where
+        # no vessel type matches. The first vessel type listed wins.
+        size = max((c.toCode for c in self.codes), default=-1) + 1
+        self._index = np.full(size, -1, dtype="int64")
+        for position, c in reversed(list(enumerate(self.codes))):
+            self._index[c.fromCode : c.toCode + 1] = position
+
+        # The last entry is used for codes that are not found
+        self._names = np.array([c.name for c in self.codes] + [NOT_FOUND], object)
+        self._descriptions = np.array(
+            [c.description for c in self.codes] + [NOT_FOUND], object
+        )
+        self._name_codes, self._categories = pd.factorize(self._names)
+
+        self._by_name = {}
+        self._by_description = {}
+        for c in self.codes:
+            name = c.name.lower().strip()
+            description = c.description.lower().strip()
+            self._by_name.setdefault(name, []).append(c.fromCode)
+            self._by_description.setdefault(description, []).append(c.fromCode)
+
+    def _position(self, code: int) -> int:
+        if 0 <= code < len(self._index):
+            return int(self._index[code])
+        return -1
 
     def get_vessel_type(self, code: int) -> Optional[AisVesselCode]:
         """Find a vessel type by code
@@ -609,8 +653,9 @@ class AisVesselCodes:
         Returns:
             Optional[AisVesselCode]: the vessel type if found, otherwise None
         """
+        position = self._position(code)
 
-        return next((c for c in self.codes if c.fromCode <= code <= c.toCode), None)
+        return self.codes[position] if position >= 0 else None
 
     def get_vessel_type_name(self, code: int) -> str:
         """Find a vessel type by code
@@ -624,7 +669,7 @@ class AisVesselCodes:
 
         vessel_type = self.get_vessel_type(code)
 
-        return vessel_type.name if vessel_type else "Not Found"
+        return vessel_type.name if vessel_type else NOT_FOUND
 
     def get_vessel_type_description(self, code: int) -> str:
         """Find a vessel type by code
@@ -638,7 +683,7 @@ class AisVesselCodes:
 
         vessel_type = self.get_vessel_type(code)
 
-        return vessel_type.description if vessel_type else "Not Found"
+        return vessel_type.description if vessel_type else NOT_FOUND
 
     def get_vessel_codes(self, vessel_type: str) -> List[int]:
         """Find codes for a vessel type
@@ -649,8 +694,7 @@ class AisVesselCodes:
         Returns:
             List[AisVesselCode]: a list of codes for the vessel type
         """
-        vessel_type = vessel_type.lower().strip()
-        return [c.fromCode for c in self.codes if c.name.lower().strip() == vessel_type]
+        return list(self._by_name.get(vessel_type.lower().strip(), []))
 
     def get_vessel_codes_from_description(self, vessel_description: str) -> List[int]:
         """Find codes for a vessel type
@@ -662,12 +706,59 @@ class AisVesselCodes:
         Returns:
             List[AisVesselCode]: a list of codes for the vessel type
         """
-        vessel_description = vessel_description.lower().strip()
-        return [
-            c.fromCode
-            for c in self.codes
-            if c.description.lower().strip() == vessel_description
-        ]
+        description = vessel_description.lower().strip()
+        return list(self._by_description.get(description, []))
+
+    def _positions(self, codes: npt.ArrayLike) -> np.ndarray:
+        values = np.asarray(codes)
+        if values.dtype.kind not in "iu":
+            # Floats and missing values, anything that is not a number is unknown
+            numbers = pd.to_numeric(pd.Series(values.ravel()), errors="coerce")
+            values = numbers.fillna(-1).to_numpy("int64").reshape(values.shape)
+
+        inside = (values >= 0) & (values < len(self._index))
+        positions = self._index[np.where(inside, values, 0)]
+
+        return np.where(inside, positions, -1)
+
+    def get_vessel_type_names(self, codes: npt.ArrayLike) -> np.ndarray:
+        """Find the vessel type names of many codes at once, e.g. a shipType column
+
+        Args:
+            codes (ArrayLike): the vessel codes
+
+        Returns:
+            np.ndarray: the names, "Not Found" for unknown codes
+        """
+        return self._names[self._positions(codes)]
+
+    def get_vessel_type_descriptions(self, codes: npt.ArrayLike) -> np.ndarray:
+        """Find the vessel type descriptions of many codes at once, e.g. a
+        shipType column
+
+        Args:
+            codes (ArrayLike): the vessel codes
+
+        Returns:
+            np.ndarray: the descriptions, "Not Found" for unknown codes
+        """
+        return self._descriptions[self._positions(codes)]
+
+    def get_vessel_type_categorical(  # type: ignore[no-any-unimported]
+        self, codes: npt.ArrayLike
+    ) -> pd.Categorical:
+        """Find the vessel type names of many codes at once as a categorical, so
+        each name is only stored once.
+
+        Args:
+            codes (ArrayLike): the vessel codes
+
+        Returns:
+            pd.Categorical: the names, "Not Found" for unknown codes
+        """
+        codes = self._name_codes[self._positions(codes)]
+
+        return pd.Categorical.from_codes(codes, categories=self._categories)
 
 
 class VesselCodeMixin:
@@ -0,0 +1,31 @@
+import json
+import os
+from unittest import mock
+
+import pytest
+
+from orion import Orion
+
+project_dir = os.path.join(os.path.dirname(__file__), os.pardir)
+
+
+@pytest.fixture
+def gdf():
+    """The mock track of one ship, and three of its positions as another ship"""
+    orion = Orion(skip_auth=True)
+    with open(f"{project_dir}/tests/mocks/ais_last24h.json") as f:
+        ais = json.load(f)
+    other = [dict(a, mmsi=211210190) for a in ais[:3]]
+    return orion.json_to_gdf(ais + other)
+
+
+@pytest.fixture
+def kystdatahuset_response():
+    """Makes a stand-in for a successful response from Kystdatahuset"""
+
+    def make(data):
+        response = mock.Mock()
+        response.json.return_value = {"success": True, "data": data}
+        return response
+
+    return make
@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+
+from orion import HistoricOrion
+from orion.types.batch import NO_SHIP_TYPE, AisBatch
+
+AIS = [
+    {
+        "mmsi": 257055990,
+        "msgtime": "2022-03-08T05:53:43+00:00",
+        "latitude": 60.0,
+        "longitude": 5.0,
+        "speedOverGround": 10.5,
+        "courseOverGround": 180.0,
+        "trueHeading": None,
+        "shipType": 80,
+        "rateOfTurn": -2.0,
+        "name": "KYSTVAKT",
+    },
+    {
+        "mmsi": 257055930,
+        "msgtime": "2022-03-08T05:54:43Z",
+        "latitude": 61.0,
+        "longitude": 6.0,
+        "speedOverGround": 0.0,
+        "courseOverGround": 90.0,
+        "trueHeading": 90,
+        "shipType": None,
+    },
+]
+
+
+def test_from_ais():
+    batch = AisBatch.from_ais(AIS)
+
+    assert len(batch) == 2
+    assert batch.mmsi.dtype == np.int64
+    assert batch.msgtime[1] - batch.msgtime[0] == 60 * 10**9
+    assert np.isnan(batch.trueHeading[0])
+    assert batch.shipType.tolist() == [80, NO_SHIP_TYPE]
+
+
+def test_to_ais():
+    ais = AisBatch.from_ais(AIS).to_ais()
+
+    assert ais[0]["msgtime"] == "2022-03-08T05:53:43+00:00"
+    assert ais[1]["msgtime"] == "2022-03-08T05:54:43+00:00"
+    assert ais[0]["trueHeading"] is None
+    assert ais[1]["shipType"] is None
+    assert ais[1]["trueHeading"] == 90
+    assert ais[0]["rateOfTurn"] == -2.0
+    assert ais[0]["name"] == "KYSTVAKT"
+    assert ais[1]["rateOfTurn"] is None
+    assert ais[1]["name"] is None
+
+
+def test_to_ais_round_trip():
+    ais = [
+        dict(AIS[0]),
+        dict(AIS[0], msgtime="2022-03-08T05:53:43.250+00:00", trueHeading=180),
+        dict(AIS[0], msgtime="2022-03-08T05:53:44.000125+00:00", shipType=None),
+    ]
+
+    assert AisBatch.from_ais(ais).to_ais() == ais
+
+
+def test_from_frame():
+    frame = pd.DataFrame(AIS)
+    batch = AisBatch.from_frame(frame)
+
+    assert batch.shipType.tolist() == [80, NO_SHIP_TYPE]
+    assert batch.name.tolist() == ["KYSTVAKT", None]
+    assert AisBatch.from_frame(frame.drop(columns="shipType")).shipType.tolist() == [
+        NO_SHIP_TYPE,
+        NO_SHIP_TYPE,
+    ]
+
+
+def test_to_gdf():
+    gdf = AisBatch.from_ais(AIS).to_gdf(tz="Europe/Oslo")
+
+    assert gdf.crs.to_epsg() == 4326
+    assert gdf.geometry.x.tolist() == [5.0, 6.0]
+    assert gdf.msgtime[0] == pd.Timestamp("2022-03-08T06:53:43+01:00")
+
+
+def test_concat():
+    batch = AisBatch.from_ais(AIS)
+
+    assert len(AisBatch.concat([batch, batch])) == 4
+    assert len(AisBatch.concat([])) == 0
+
+
+def test_historic_get_ais_batch(monkeypatch, kystdatahuset_response):
+    orion = HistoricOrion()
+
+    def post(url, json):
+        data = [
+            [m, "2023-01-01T00:00:00", 5.0, 60.0, 0.0, 1.0] for m in json["MmsiIds"]
+        ]
+        return kystdatahuset_response(data)
+
+    monkeypatch.setattr(orion.session, "post", post)
+    mmsis = [257055990, 257055930, 257055910]
+    batch = orion.get_ais_batch(
+        mmsis, "2023-01-01T00:00:00Z", "2023-01-02T00:00:00Z", batch_size=2
+    )
+
+    assert batch.mmsi.tolist() == mmsis
+    assert batch.longitude.tolist() == [5.0, 5.0, 5.0]
+    assert batch.to_ais()[0]["msgtime"] == "2023-01-01T00:00:00+00:00"
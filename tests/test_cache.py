@@ -0,0 +1,90 @@
+from datetime import datetime, timezone
+
+from orion import HistoricOrion
+from orion.cache import TrackCache
+
+
+def utc(day, hour=0):
+    return datetime(2023, 1, day, hour, tzinfo=timezone.utc)
+
+
+def test_track_cache_missing():
+    cache = TrackCache(":memory:")
+    cache.add(257055990, utc(2), utc(3), [])
+    cache.add(257055990, utc(5), utc(6), [])
+
+    assert cache.missing(257055990, utc(1), utc(7)) == [
+        (utc(1), utc(2)),
+        (utc(3), utc(5)),
+        (utc(6), utc(7)),
+    ]
+    assert cache.missing(257055990, utc(2, 6), utc(2, 12)) == []
+    assert cache.missing(257055930, utc(2), utc(3)) == [(utc(2), utc(3))]
+
+    # touching intervals are merged
+    cache.add(257055990, utc(3), utc(5), [])
+    assert cache.missing(257055990, utc(2), utc(6)) == []
+
+
+def test_get_ais_fetches_only_missing(monkeypatch, tmp_path):
+    orion = HistoricOrion(cache=TrackCache(str(tmp_path / "tracks.sqlite")))
+    requests = []
+
+    def _get_ais(mmsi, fromDate, toDate):
+        requests.append((fromDate, toDate))
+        return [
+            {"mmsi": mmsi, "msgtime": fromDate, "latitude": 60.0},
+            {"mmsi": mmsi, "msgtime": toDate, "latitude": 61.0},
+        ]
+
+    monkeypatch.setattr(orion, "_get_ais", _get_ais)
+
+    ais = orion.get_ais(257055990, "2023-01-02T00:00:00Z", "2023-01-03T00:00:00Z")
+    assert len(ais) == 2
+
+    ais = orion.get_ais(257055990, "2023-01-01T00:00:00Z", "2023-01-03T00:00:00Z")
+    assert requests == [
+        ("2023-01-02T00:00:00Z", "2023-01-03T00:00:00Z"),
+        ("2023-01-01T00:00:00Z", "2023-01-02T00:00:00Z"),
+    ]
+    assert [a["msgtime"] for a in ais] == [
+        "2023-01-01T00:00:00Z",
+        "2023-01-02T00:00:00Z",
+        "2023-01-03T00:00:00Z",
+    ]
+
+    # a new client reads the same cache without asking the API
+    orion = HistoricOrion(cache=TrackCache(str(tmp_path / "tracks.sqlite")))
+    monkeypatch.setattr(orion, "_get_ais", _get_ais)
+    assert (
+        len(orion.get_ais(257055990, "2023-01-01T06:00:00Z", "2023-01-02T06:00:00Z"))
+        == 1
+    )
+    assert len(requests) == 2
+
+
+def test_get_ais_caches_what_was_fetched(monkeypatch):
+    cache = TrackCache(":memory:")
+    orion = HistoricOrion(cache=cache)
+    requests = []
+
+    def _get_ais(mmsi, fromDate, toDate):
+        requests.append((fromDate, toDate))
+        return [{"mmsi": mmsi, "msgtime": "2023-01-02T00:05:00Z", "latitude": 60.0}]
+
+    monkeypatch.setattr(orion, "_get_ais", _get_ais)
+    ais = orion.get_ais(257055990, "2023-01-02T00:00:30Z", "2023-01-02T00:10:30Z")
+
+    # Kystdatahuset takes whole minutes, so the request covers the whole timeframe
+    assert requests == [("2023-01-02T00:00:00Z", "2023-01-02T00:11:00Z")]
+    assert cache.missing(257055990, utc(2), utc(2).replace(minute=11)) == []
+
+    # the cache keeps the positions as they came from the API
+    assert "jurisdiction" in ais[0]
+    assert "jurisdiction" not in cache.get(257055990, utc(1), utc(3))[0]
+
+    orion = HistoricOrion(cache=cache, enrich=False)
+    monkeypatch.setattr(orion, "_get_ais", _get_ais)
+    ais = orion.get_ais(257055990, "2023-01-02T00:00:30Z", "2023-01-02T00:10:30Z")
+    assert "jurisdiction" not in ais[0]
+    assert len(requests) == 1
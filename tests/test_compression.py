@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+from orion.compression import METERS_PER_DEGREE, TrackCompressor, compress_track
+
+
+def sed(frame, kept):
+    """The largest distance in meters from a position to where the ship would
+    be between the kept positions around it"""
+    seconds = frame.msgtime.to_numpy(dtype="datetime64[ns]").view("int64") / 1e9
+    kept_seconds = kept.msgtime.to_numpy(dtype="datetime64[ns]").view("int64") / 1e9
+    lon = np.interp(seconds, kept_seconds, kept.longitude)
+    lat = np.interp(seconds, kept_seconds, kept.latitude)
+
+    dx = (frame.longitude - lon) * np.cos(np.radians(frame.latitude))
+    dy = frame.latitude - lat
+    return float(np.max(np.hypot(dx, dy)) * METERS_PER_DEGREE)
+
+
+def test_compress_straight_line():
+    frame = pd.DataFrame(
+        {
+            "mmsi": 257956000,
+            "msgtime": pd.date_range("2023-01-01", periods=100, freq="min", tz="UTC"),
+            "longitude": np.linspace(5, 6, 100),
+            "latitude": np.linspace(60, 61, 100),
+        }
+    )
+
+    kept = compress_track(frame, max_error=1)
+
+    assert kept.index.tolist() == [0, 99]
+
+
+def test_compress_track_max_error(gdf):
+    ship = gdf[gdf.mmsi == 257956000]
+
+    for max_error in [10, 100, 1000]:
+        kept = compress_track(gdf, max_error=max_error)
+        kept_ship = kept[kept.mmsi == 257956000]
+
+        assert len(kept_ship) < len(ship)
+        assert kept_ship.index[0] == ship.index[0]
+        assert kept_ship.index[-1] == ship.index[-1]
+        assert sed(ship, kept_ship) <= max_error
+
+    assert len(compress_track(gdf, max_error=0)) <= len(gdf)
+
+
+def test_compress_in_chunks(gdf):
+    whole = compress_track(gdf, max_error=100)
+
+    compressor = TrackCompressor(max_error=100)
+    chunks = [compressor.compress(gdf.iloc[i : i + 25]) for i in range(0, len(gdf), 25)]
+    chunked = pd.concat([*chunks, compressor.flush()])
+
+    assert sorted(chunked.index) == sorted(whole.index)
+    assert chunked.msgtime.tolist() == gdf.loc[chunked.index].msgtime.tolist()
+
+
+def test_compress_max_window(gdf):
+    kept = compress_track(gdf, max_error=10_000, max_window=10)
+
+    assert len(kept[kept.mmsi == 257956000]) >= 157 // 10
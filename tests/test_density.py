@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+import shapely
+
+from orion.density import DensityGrid, density
+from orion.enrich import VESSEL_CODES
+from orion.projection import transform_xy
+
+
+@pytest.mark.parametrize("shape", ["square", "hex"])
+def test_density_cells_contain_positions(shape, gdf):
+    grid = DensityGrid(cell_size=2000, shape=shape)
+
+    cells = grid.cells(gdf.longitude.to_numpy(), gdf.latitude.to_numpy())
+    polygons = grid.cell_polygons(cells)
+
+    x, y = transform_xy(gdf.longitude, gdf.latitude, 4326, grid.crs)
+    assert shapely.contains_xy(polygons, x, y).all()
+    if shape == "hex":
+        assert np.allclose(shapely.area(polygons), np.sqrt(3) / 2 * 2000**2)
+
+
+@pytest.mark.parametrize("shape", ["square", "hex"])
+def test_cells_do_not_overlap(shape):
+    grid = DensityGrid(cell_size=1000, shape=shape)
+    rng = np.random.default_rng(0)
+    lons, lats = rng.uniform(5, 5.2, 1000), rng.uniform(60, 60.1, 1000)
+
+    cells = grid.cells(lons, lats)
+    polygons = grid.cell_polygons(np.unique(cells))
+    x, y = transform_xy(lons, lats, 4326, grid.crs)
+
+    # Every position is in its own cell and no other
+    inside = shapely.contains_xy(polygons[:, None], x[None, :], y[None, :])
+    assert (inside.sum(axis=0) == 1).all()
+    assert (np.unique(cells)[inside.argmax(axis=0)] == cells).all()
+
+
+def test_density(gdf):
+    result = density(gdf, cell_size=5000)
+
+    assert result["count"].sum() == len(gdf)
+    assert result.crs == 23032
+    assert result.vessels.max() == 2
+    assert result.cell.is_monotonic_increasing
+
+    elapsed = gdf.groupby("mmsi").msgtime.agg(
+        lambda t: t.diff().clip(upper=pd.Timedelta(minutes=30)).sum()
+    )
+    assert np.isclose(result.seconds.sum(), elapsed.dt.total_seconds().sum())
+
+
+def test_density_in_chunks(gdf):
+    whole = density(gdf, cell_size=1000, shape="hex")
+
+    chunks = [gdf.iloc[i : i + 20] for i in range(0, len(gdf), 20)]
+    chunked = density(chunks, cell_size=1000, shape="hex")
+
+    pd.testing.assert_frame_equal(
+        pd.DataFrame(chunked.drop(columns="geometry")),
+        pd.DataFrame(whole.drop(columns="geometry")),
+    )
+
+
+def test_density_filters(gdf):
+    norwegian = density(gdf, cell_size=5000, jurisdictions=["NO"])
+    assert norwegian["count"].sum() == (gdf.mmsi == 257956000).sum()
+
+    ship_type = gdf.shipType.iloc[0]
+    type_name = VESSEL_CODES.get_vessel_type_name(int(ship_type))
+    typed = density(gdf, cell_size=5000, ship_types=[type_name])
+    assert typed["count"].sum() == (gdf.shipType == ship_type).sum()
+    assert len(density(gdf, cell_size=5000, ship_types=["No such type"])) == 0
+
+    with pytest.raises(ValueError):
+        density(gdf.drop(columns="shipType"), cell_size=5000, ship_types=["Cargo"])
+
+
+def test_density_without_coordinates(gdf):
+    missing = gdf.copy()
+    missing.loc[missing.index[:5], "longitude"] = np.nan
+    missing.loc[missing.index[5:10], "latitude"] = np.nan
+
+    result = density(missing, cell_size=5000)
+
+    assert result["count"].sum() == len(gdf) - 10
+    assert result.geometry.area.max() == 5000**2
@@ -0,0 +1,104 @@
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from orion.encounters import find_encounters
+from orion.kinematics import haversine
+
+
+def make_frame():
+    minutes = np.arange(0, 61, 5)
+    times = pd.Timestamp("2023-01-01", tz="UTC") + pd.to_timedelta(minutes, "min")
+    count = len(minutes)
+
+    # Ship 1 sails east along 60N, ship 2 lies still in its way, ship 3 follows
+    # ship 1 100 m north of it for the first half hour, ship 4 is far away
+    frames = [
+        (1, times, np.linspace(5.0, 5.2, count), np.full(count, 60.0)),
+        (2, times, np.full(count, 5.1), np.full(count, 60.0)),
+        (3, times[:7], np.linspace(5.0, 5.1, 7), np.full(7, 60.0009)),
+        (4, times, np.full(count, -179.9995), np.full(count, 70.0)),
+        (5, times, np.full(count, 179.9995), np.full(count, 70.0)),
+    ]
+    return pd.concat(
+        pd.DataFrame({"mmsi": mmsi, "msgtime": time, "longitude": lon, "latitude": lat})
+        for mmsi, time, lon, lat in frames
+    )
+
+
+def test_find_encounters():
+    frame = make_frame()
+
+    result = find_encounters(frame, distance=500)
+
+    pairs = list(zip(result.mmsi, result.otherMmsi))
+    assert sorted(pairs) == [(1, 2), (1, 3), (2, 3), (4, 5)]
+    assert result.start.is_monotonic_increasing
+
+    follow = result.iloc[pairs.index((1, 3))]
+    assert follow.start == pd.Timestamp("2023-01-01T00:00", tz="UTC")
+    assert follow.end == pd.Timestamp("2023-01-01T00:30", tz="UTC")
+    assert np.isclose(follow.distance, 100, atol=1)
+
+    crossing = result.iloc[pairs.index((1, 2))]
+    assert crossing.closestTime == pd.Timestamp("2023-01-01T00:30", tz="UTC")
+    assert crossing.distance < 1
+    assert np.isclose(crossing.geometry.x, 5.1)
+    assert crossing.end - crossing.start < timedelta(minutes=5)
+
+    antimeridian = result.iloc[pairs.index((4, 5))]
+    assert np.isclose(
+        antimeridian.distance, haversine(-179.9995, 70, 179.9995, 70), rtol=1e-3
+    )
+    assert antimeridian.end - antimeridian.start == timedelta(hours=1)
+
+
+def test_find_encounters_min_duration():
+    frame = make_frame()
+
+    result = find_encounters(frame, distance=500, min_duration=timedelta(minutes=30))
+
+    assert list(zip(result.mmsi, result.otherMmsi)) == [(1, 3), (4, 5)]
+    assert len(find_encounters(frame.iloc[:0], distance=500)) == 0
+
+
+def test_find_encounters_matches_brute_force():
+    rng = np.random.default_rng(0)
+    count = 300
+    frame = pd.DataFrame(
+        {
+            "mmsi": np.arange(count),
+            "msgtime": pd.Timestamp("2023-01-01", tz="UTC"),
+            "longitude": rng.uniform(5, 5.1, count),
+            "latitude": rng.uniform(60, 60.05, count),
+        }
+    )
+
+    result = find_encounters(frame, distance=300)
+
+    first, other = np.triu_indices(count, 1)
+    lons, lats = frame.longitude.to_numpy(), frame.latitude.to_numpy()
+    distances = haversine(lons[first], lats[first], lons[other], lats[other])
+    expected = {
+        (a, b) for a, b in zip(first[distances <= 300], other[distances <= 300])
+    }
+    assert set(zip(result.mmsi, result.otherMmsi)) == expected
+
+
+def test_find_encounters_short_distance():
+    frame = make_frame()
+
+    # Ship 6 lies 5 m south of ship 2 the whole hour
+    still = frame[frame.mmsi == 2].assign(mmsi=6, latitude=60.0 - 5 / 111_195)
+    frame = pd.concat([frame, still])
+
+    result = find_encounters(frame, distance=10)
+
+    assert sorted(zip(result.mmsi, result.otherMmsi)) == [(1, 2), (1, 6), (2, 6)]
+    assert (result["distance"] <= 10).all()
+
+    # Ship 1 sails right over ship 2, but not over ship 6
+    result = find_encounters(frame, distance=1)
+
+    assert list(zip(result.mmsi, result.otherMmsi)) == [(1, 2)]
@@ -0,0 +1,44 @@
+import pandas as pd
+import pytest
+
+from orion import HistoricOrion
+from orion.enrich import enrich_frame
+
+
+def test_enrich_frame():
+    frame = pd.DataFrame(
+        {"mmsi": [257956000, 211210190, 123456789], "shipType": [80, 70, None]}
+    )
+    enriched = enrich_frame(frame)
+
+    assert enriched.jurisdiction.dtype == "category"
+    assert enriched.jurisdiction.tolist() == ["NO", "DE", "Not Found"]
+    assert enriched.shipTypeTxt.tolist() == ["Tanker", "Cargo", "Not Found"]
+    assert "jurisdiction" not in frame
+
+
+def test_ais_accessor():
+    frame = pd.DataFrame({"mmsi": [257956000, 211210190]}, index=[5, 7])
+
+    assert frame.ais.jurisdiction.tolist() == ["NO", "DE"]
+    assert frame.ais.jurisdiction.index.tolist() == [5, 7]
+    assert list(frame.ais.enrich().columns) == ["mmsi", "jurisdiction"]
+    with pytest.raises(AttributeError):
+        frame.ais.ship_type
+
+    with pytest.raises(AttributeError):
+        pd.DataFrame({"a": [1]}).ais
+
+
+def test_skip_enrich(monkeypatch, kystdatahuset_response):
+    orion = HistoricOrion(enrich=False)
+
+    response = kystdatahuset_response(
+        [[257956000, "2023-01-01T00:00:00", 5.0, 60.0, 0.0, 0.0]]
+    )
+    monkeypatch.setattr(orion.session, "post", lambda url, json: response)
+    ais = orion.get_ais_for_mmsis(
+        [257956000], "2023-01-01T00:00:00Z", "2023-01-02T00:00:00Z"
+    )
+
+    assert "jurisdiction" not in ais[257956000][0]
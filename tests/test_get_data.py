@@ -0,0 +1,88 @@
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+import geopandas
+import pandas as pd
+import pytest
+import shapely
+
+from orion.utils import get_data
+
+project_dir = os.path.join(os.path.dirname(__file__), os.pardir)
+
+
+@pytest.fixture
+def factpages(tmp_path, monkeypatch):
+    """A local copy of the facilities CSV, in place of the factpages"""
+    gdf = geopandas.read_file(f"{project_dir}/tests/mocks/oil_installations.geojson")
+    df = pd.DataFrame(gdf.drop(columns="geometry"))
+    df["fclPointGeometryWKT"] = gdf.geometry.to_wkt()
+    df.loc[0, "fclPointGeometryWKT"] = None
+    df.loc[1, "fclPhase"] = "DECOMMISSIONED"
+    df.loc[2, "fclKind"] = "LANDFALL"
+
+    path = tmp_path / "fclPoint.csv"
+    df.to_csv(path, index=False)
+    monkeypatch.setattr(get_data, "FACILITIES_URL", str(path))
+    return path
+
+
+def test_get_oil_installations(factpages):
+    gdf = get_data.get_oil_installations()
+
+    assert len(gdf) == 617
+    assert gdf.crs == "EPSG:4326"
+    assert gdf.geometry.equals(geopandas.GeoSeries(gdf.wkt, crs=4326))
+    assert gdf.geometry.to_wkt().tolist() == gdf.fclPointGeometryWKT.tolist()
+
+
+def test_snapshot(factpages, tmp_path):
+    cache_dir = tmp_path / "cache"
+    downloaded = get_data.get_oil_installations(cache_dir=cache_dir)
+    factpages.unlink()
+
+    cached = get_data.get_oil_installations(cache_dir=cache_dir)
+    offline = get_data.get_oil_installations(cache_dir=cache_dir, offline=True)
+
+    for gdf in [cached, offline]:
+        pd.testing.assert_frame_equal(
+            gdf.drop(columns=["wkt", "geometry"]),
+            downloaded.drop(columns=["wkt", "geometry"]),
+        )
+        assert gdf.geometry.geom_equals(downloaded.geometry).all()
+        assert shapely.equals(gdf.wkt.values, downloaded.wkt.values).all()
+
+    rigs = get_data.get_oil_rigs(cache_dir=cache_dir, offline=True)
+    assert len(rigs) == len(cached) - 1
+
+
+def test_snapshot_max_age(factpages, tmp_path):
+    cache_dir = tmp_path / "cache"
+    get_data.get_oil_installations(cache_dir=cache_dir)
+    first = get_data.fetched_at(cache_dir)
+
+    get_data.get_oil_installations(cache_dir=cache_dir, max_age=timedelta(0))
+    assert get_data.fetched_at(cache_dir) > first
+
+    # An old snapshot is used when the download fails
+    factpages.unlink()
+    gdf = get_data.get_oil_installations(cache_dir=cache_dir, max_age=timedelta(0))
+    assert len(gdf) == 617
+
+
+def test_snapshot_missing(factpages, tmp_path):
+    cache_dir = tmp_path / "cache"
+
+    with pytest.raises(FileNotFoundError):
+        get_data.get_oil_installations(cache_dir=cache_dir, offline=True)
+
+    get_data.get_oil_installations(cache_dir=cache_dir)
+    meta_path = cache_dir / "oil_installations.json"
+    meta = json.loads(meta_path.read_text())
+    assert datetime.fromisoformat(meta["fetched_at"]) <= datetime.now(timezone.utc)
+
+    meta_path.write_text(json.dumps(dict(meta, version=0)))
+    assert get_data.fetched_at(cache_dir) is None
+    with pytest.raises(FileNotFoundError):
+        get_data.load_snapshot(cache_dir)
@@ -0,0 +1,102 @@
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from orion.interpolate import positions_at, resample, snapshot
+
+
+def make_frame():
+    return pd.DataFrame(
+        {
+            "mmsi": [2, 1, 1, 1, 2],
+            "msgtime": pd.to_datetime(
+                [
+                    "2023-01-01T00:00",
+                    "2023-01-01T00:10",
+                    "2023-01-01T00:00",
+                    "2023-01-01T01:00",
+                    "2023-01-01T00:20",
+                ],
+                utc=True,
+            ),
+            "longitude": [10.0, 6.0, 5.0, 7.0, 179.0],
+            "latitude": [60.0, 61.0, 60.0, 62.0, 70.0],
+        }
+    )
+
+
+def test_positions_at():
+    frame = make_frame()
+    times = pd.to_datetime(
+        [
+            "2023-01-01T00:05",
+            "2023-01-01T00:10",
+            "2023-01-01T00:30",
+            "2023-01-01T02:00",
+        ],
+        utc=True,
+    )
+
+    result = positions_at(frame, times)
+
+    assert result.mmsi.tolist() == [1, 1, 1, 2, 2]
+    assert result.msgtime.tolist() == [*times[:3], *times[:2]]
+    np.testing.assert_allclose(result.longitude, [5.5, 6, 6.4, 52.25, 94.5])
+    np.testing.assert_allclose(result.latitude, [60.5, 61, 61.4, 62.5, 65])
+    assert result.crs == 4326
+    assert result.geometry.x.tolist() == result.longitude.tolist()
+
+
+def test_positions_at_max_gap():
+    frame = make_frame()
+    times = pd.to_datetime(
+        ["2023-01-01T00:00", "2023-01-01T00:05", "2023-01-01T00:30"], utc=True
+    )
+
+    result = positions_at(frame, times, max_gap=timedelta(minutes=15))
+
+    assert list(zip(result.mmsi, result.msgtime)) == [
+        (1, times[0]),
+        (1, times[1]),
+        (2, times[0]),
+    ]
+
+
+def test_positions_at_antimeridian():
+    frame = make_frame()
+    frame.loc[0, "longitude"] = -179.0
+
+    result = snapshot(frame, "2023-01-01T00:10:00Z")
+
+    np.testing.assert_allclose(result.longitude, [6, -180])
+
+
+def test_resample(gdf):
+    ship = gdf[gdf.mmsi == 257956000]
+
+    result = resample(gdf, "10min")
+
+    resampled = result[result.mmsi == 257956000]
+    assert resampled.msgtime.min() >= ship.msgtime.min()
+    assert resampled.msgtime.max() <= ship.msgtime.max()
+    assert (resampled.msgtime.diff().dropna() == timedelta(minutes=10)).all()
+    assert (resampled.msgtime.dt.minute % 10 == 0).all()
+    assert resampled.msgtime.dt.tz == gdf.msgtime.dt.tz
+
+    at = positions_at(gdf, resampled.msgtime)
+    pd.testing.assert_frame_equal(
+        at[at.mmsi == 257956000].reset_index(drop=True),
+        resampled.reset_index(drop=True),
+    )
+
+
+def test_snapshot(gdf):
+    other = gdf[gdf.mmsi == 211210190]
+    time = other.msgtime.iloc[1]
+
+    result = snapshot(gdf, time)
+
+    assert result.mmsi.tolist() == [211210190, 257956000]
+    assert result.longitude.iloc[0] == other.longitude.iloc[1]
+    assert len(snapshot(gdf.iloc[:0], time)) == 0
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+
+from orion.kinematics import add_kinematics, bearing, haversine
+
+
+def test_haversine_and_bearing():
+    assert np.isclose(haversine(5, 60, 5, 61), 111_195, atol=1)
+    assert np.isclose(haversine(0, 0, 1, 0), 111_195, atol=1)
+    np.testing.assert_allclose(
+        bearing([5, 5, 5, 5], [60, 60, 60, 60], [5, 6, 5, 4], [61, 60, 59, 60]),
+        [0, 89.57, 180, 270.43],
+        atol=0.01,
+    )
+
+
+def test_add_kinematics():
+    frame = pd.DataFrame(
+        {
+            "mmsi": [1, 1, 1, 1, 2],
+            "msgtime": pd.to_datetime(
+                ["00:00", "00:01", "00:02", "00:03", "00:00"], utc=True
+            ),
+            "longitude": [5.0, 5.0, 5.01, 7.0, 5.0],
+            "latitude": [60.0, 60.01, 60.01, 60.01, 60.0],
+        }
+    )
+
+    result = add_kinematics(frame)
+
+    assert np.isnan(result.distPrevPoint[0])
+    assert np.isnan(result.distPrevPoint[4])
+    assert np.isclose(result.distPrevPoint[1], 1112, atol=1)
+    assert result.secPrevPoint[1:4].tolist() == [60, 60, 60]
+    assert np.isclose(result.calcSpeed[1], 1112 / 60 * 3600 / 1852, atol=0.1)
+    assert np.isclose(result.bearing[1], 0)
+    assert np.isclose(result.turnRate[2], 90, atol=0.1)
+    assert result.jump.tolist() == [False, False, False, True, False]
+
+
+def test_add_kinematics_order(gdf):
+    shuffled = gdf.sample(frac=1, random_state=1)
+
+    result = add_kinematics(shuffled)
+
+    assert result.index.tolist() == shuffled.index.tolist()
+    pd.testing.assert_frame_equal(result.loc[gdf.index], add_kinematics(gdf))
+
+    ship = result.loc[gdf.index][gdf.mmsi == 257956000]
+    assert ship.distPrevPoint.isna().sum() == 1
+    assert (ship.secPrevPoint.iloc[1:] >= 0).all()
+    assert not ship.jump.any()
+
+
+def test_add_kinematics_spike(gdf):
+    ship = gdf[gdf.mmsi == 257956000].copy()
+    ship.loc[ship.index[50], "latitude"] += 1
+
+    result = add_kinematics(ship)
+
+    assert result.index[result.jump].tolist() == [ship.index[50]]
+
+
+def test_add_kinematics_spike_at_ends(gdf):
+    ship = gdf[gdf.mmsi == 257956000].copy()
+    ship.loc[ship.index[1], "latitude"] += 1
+    ship.loc[ship.index[-2], "latitude"] += 1
+
+    result = add_kinematics(ship)
+
+    # only the spikes, not the first and last positions next to them
+    assert result.index[result.jump].tolist() == [ship.index[1], ship.index[-2]]
+
+    ship = gdf[gdf.mmsi == 257956000].copy()
+    ship.loc[ship.index[0], "latitude"] += 1
+    ship.loc[ship.index[-1], "latitude"] += 1
+
+    result = add_kinematics(ship)
+
+    assert result.index[result.jump].tolist() == [ship.index[0], ship.index[-1]]
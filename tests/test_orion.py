@@ -7,12 +7,14 @@ import pandas as pd
 import pytest
 import pytz
 import requests
+import shapely
 from deepdiff import DeepDiff
 from shapely.geometry import LineString, Point
 
 from orion import Orion
-from orion.utils.get_data import get_oil_installations, get_oil_rigs
 from orion.mmsi import Jurisdiction
+from orion.types.batch import AisBatch
+from orion.utils.get_data import get_oil_installations, get_oil_rigs
 
 project_dir = os.path.join(os.path.dirname(__file__), os.pardir)
 
@@ -65,6 +67,33 @@ def test_get_ais_error():
         ais = orion.get_ais(123, from_date, to_date)
 
 
+def test_get_ais_chunked(monkeypatch):
+    orion = Orion(skip_auth=True)
+    windows = []
+
+    def _get_ais(mmsi, fromDate, toDate):
+        windows.append((fromDate, toDate))
+        # positions on the edges of a window are returned by both windows
+        return [{"mmsi": mmsi, "msgtime": toDate}, {"mmsi": mmsi, "msgtime": fromDate}]
+
+    monkeypatch.setattr(orion, "_get_ais", _get_ais)
+    ais = orion.get_ais(
+        257055990, "2023-01-01T00:00:00Z", "2023-01-10T00:00:00Z", timedelta(days=4)
+    )
+
+    assert sorted(windows) == [
+        ("2023-01-01T00:00:00Z", "2023-01-05T00:00:00Z"),
+        ("2023-01-05T00:00:00Z", "2023-01-09T00:00:00Z"),
+        ("2023-01-09T00:00:00Z", "2023-01-10T00:00:00Z"),
+    ]
+    assert [a["msgtime"] for a in ais] == [
+        "2023-01-01T00:00:00Z",
+        "2023-01-05T00:00:00Z",
+        "2023-01-09T00:00:00Z",
+        "2023-01-10T00:00:00Z",
+    ]
+
+
 def test_get_multiple_ais_with_dates():
     _from_date = datetime.now() - timedelta(days=30)
     _to_date = datetime.now()
@@ -87,6 +116,26 @@ def test_get_multiple_ais_error():
         ais = orion.get_multiple_ais([123, 257055930, 257055910])
 
 
+def test_fetch_multiple_ais_concurrent(monkeypatch):
+    orion = Orion(skip_auth=True)
+
+    def get_ais(mmsi, fromDate, toDate):
+        if mmsi == 257055930:
+            raise requests.exceptions.HTTPError("500 Server Error")
+        return [{"mmsi": mmsi, "msgtime": fromDate}]
+
+    monkeypatch.setattr(orion, "get_ais", get_ais)
+    mmsis = [257055990, 257055930, 257055910]
+    result = orion.fetch_multiple_ais(mmsis, "2023-01-01", "2023-01-02", workers=3)
+
+    assert list(result.ais) == [257055990, 257055910]
+    assert list(result.errors) == [257055930]
+    assert [a["mmsi"] for a in result.combined()] == [257055990, 257055910]
+
+    ais = orion.get_multiple_ais(mmsis, "2023-01-01", "2023-01-02", workers=3)
+    assert len(ais) == 2
+
+
 def test_get_mmsis_in_area_timeframe():
     orion = Orion()
     _from_date = datetime.now() - timedelta(days=1)
@@ -140,6 +189,26 @@ def test_buffer_around_point():
         assert not DeepDiff(expected, buffer)
 
 
+def test_json_to_gdf():
+    orion = Orion(skip_auth=True)
+    with open(f"{project_dir}/tests/mocks/ais_last24h.json") as f:
+        ais = json.load(f)
+
+    gdf = orion.json_to_gdf(ais)
+    assert gdf.msgtime.is_monotonic_increasing
+    assert str(gdf.msgtime.dt.tz) == "Europe/Berlin"
+    assert gdf.crs.to_epsg() == 4326
+    assert list(gdf.columns) == list(ais[0]) + ["geometry"]
+
+    gdf_utc = orion.json_to_gdf(ais, tz=None)
+    assert str(gdf_utc.msgtime.dt.tz) == "UTC"
+    assert (gdf_utc.msgtime == gdf.msgtime).all()
+
+    gdf_batch = orion.json_to_gdf(AisBatch.from_ais(ais))
+    assert (gdf_batch.msgtime.to_numpy() == gdf.msgtime.to_numpy()).all()
+    assert gdf_batch.geometry.to_wkt().tolist() == gdf.geometry.to_wkt().tolist()
+
+
 def test_buffer_around_gdf():
     orion = Orion(skip_auth=True)
     gdf = geopandas.read_file(
@@ -209,6 +278,34 @@ def test_get_mid_error():
         mid = orion.mmsi.get_mid(157956000)
 
 
+def test_mmsi_arrays():
+    orion = Orion(skip_auth=True)
+    mmsis = pd.Series([257956000, 211210190, 123456789, 25795600, 999999999])
+
+    assert orion.mmsi.valid_ship_mask(mmsis).tolist() == [
+        True,
+        True,
+        False,
+        False,
+        False,
+    ]
+    assert orion.mmsi.get_mids(mmsis).tolist() == [257, 211, -1, -1, -1]
+    assert orion.mmsi.get_jurisdiction_names(mmsis).tolist() == [
+        "NO",
+        "DE",
+        "Not Found",
+        "Not Found",
+        "Not Found",
+    ]
+    assert orion.mmsi.norwegian_mask(mmsis).tolist() == [
+        True,
+        False,
+        False,
+        False,
+        False,
+    ]
+
+
 def test_is_norwegian():
     orion = Orion(skip_auth=True)
     norwegian = orion.mmsi.is_norwegian(257956000)
@@ -280,6 +377,17 @@ def test_get_vessel_codes_from_description():
     )
     assert vessel_codes == [1001]
 
+
+def test_get_vessel_type_names():
+    orion = Orion(skip_auth=True)
+    codes = pd.Series([80, 54, 2000, None])
+
+    names = orion.ais_vessel_codes.get_vessel_type_names(codes)
+    assert names.tolist() == ["Tanker", "Other", "Not Found", "Not Found"]
+
+    descriptions = orion.ais_vessel_codes.get_vessel_type_descriptions(codes)
+    assert descriptions[1] == "Anti-pollution equipment"
+
 def test_load_oil_installations():
     gdf = get_oil_installations()
     assert gdf is not None and len(gdf) > 0
@@ -287,3 +395,52 @@ def test_load_oil_installations():
 def test_get_oil_rigs():
     gdf = get_oil_rigs()
     assert gdf is not None and len(gdf) > 0
+
+
+def test_get_mmsis_in_area_tiled(monkeypatch):
+    orion = Orion(skip_auth=True)
+    polygons = []
+
+    class Session:
+        headers = {}
+
+        def post(self, url, json):
+            polygons.append(json["polygon"])
+            response = requests.models.Response()
+            response.status_code = 200
+            response._content = b"[257055990, 257055930]"
+            return response
+
+    orion.session = Session()
+    # roughly 55 x 111 km, too large for one request
+    area = {
+        "type": "Polygon",
+        "coordinates": [[[5, 60], [6, 60], [6, 61], [5, 61], [5, 60]]],
+    }
+    ais = orion.get_mmsis_in_area(area, "2023-01-01T00:00:00Z", "2023-01-02T00:00:00Z")
+
+    tiles = geopandas.GeoSeries(
+        [shapely.geometry.shape(p) for p in polygons], crs=4326
+    ).to_crs(epsg=23032)
+    whole = geopandas.GeoSeries([shapely.geometry.shape(area)], crs=4326).to_crs(
+        epsg=23032
+    )
+
+    assert len(polygons) > 1
+    assert tiles.area.max() <= 500_000_000
+    assert abs(tiles.area.sum() - whole.area.sum()) < 1_000_000
+    assert ais == [257055990, 257055930]
+
+
+def test_merge_area_responses():
+    orion = Orion(skip_auth=True)
+    first = [{"mmsi": 257055990, "msgtime": "2023-01-01T00:00:00Z", "speed": 1.0}]
+    second = [
+        {"mmsi": 257055990, "msgtime": "2023-01-01T00:05:00Z", "speed": 2.0},
+        {"mmsi": 257055930, "msgtime": "2023-01-01T00:05:00Z", "speed": 3.0},
+    ]
+
+    merged = orion.merge_area_responses([first, second])
+
+    assert merged == [first[0], second[1]]
+    assert orion.merge_area_responses([[1, 2], [2, 3]]) == [1, 2, 3]
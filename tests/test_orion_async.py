@@ -0,0 +1,171 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from orion import AsyncHistoricOrion, AsyncOrion, HistoricOrion, Orion
+from orion.cache import TrackCache
+from orion.client import BaseOrion
+
+
+def make_barentswatch(tokens):
+    """A stand-in for Barentswatch that hands out numbered tokens"""
+
+    def handler(request):
+        if request.url.path == "/connect/token":
+            tokens.append(f"token-{len(tokens)}")
+            return httpx.Response(200, json={"access_token": tokens[-1]})
+
+        if request.headers["Authorization"] != f"Bearer {tokens[-1]}":
+            return httpx.Response(401)
+
+        mmsi = int(request.url.path.split("/")[-1])
+        return httpx.Response(
+            200, json=[{"mmsi": mmsi, "shipType": 80, "msgtime": "2023-01-01"}]
+        )
+
+    return handler
+
+
+def test_async_get_multiple_ais():
+    async def run():
+        tokens = []
+        orion = AsyncOrion(client_id="id", client_secret="secret", max_concurrency=2)
+        orion.session = httpx.AsyncClient(
+            transport=httpx.MockTransport(make_barentswatch(tokens))
+        )
+        async with orion:
+            ais = await orion.get_multiple_ais([257055990, 257055930, 257055910])
+
+            # every request after the token expires should share one refresh
+            tokens.append("token-expired-elsewhere")
+            ais_refreshed = await orion.get_multiple_ais([257055990, 257055930])
+        return tokens, ais, ais_refreshed
+
+    tokens, ais, ais_refreshed = asyncio.run(run())
+
+    assert [a["mmsi"] for a in ais] == [257055990, 257055930, 257055910]
+    assert ais[0]["shipTypeTxt"] == "Tanker"
+    assert len(ais_refreshed) == 2
+    assert tokens == ["token-0", "token-expired-elsewhere", "token-2"]
+
+
+def test_async_get_ais_batch():
+    async def run():
+        tokens = []
+        orion = AsyncOrion(client_id="id", client_secret="secret")
+        orion.session = httpx.AsyncClient(
+            transport=httpx.MockTransport(make_barentswatch(tokens))
+        )
+        async with orion:
+            return await orion.get_ais_batch([257055990, 257055930])
+
+    batch = asyncio.run(run())
+
+    assert batch.mmsi.tolist() == [257055990, 257055930]
+    assert batch.shipType.tolist() == [80, 80]
+
+
+def test_async_get_multiple_ais_error():
+    orion = AsyncOrion(skip_auth=True)
+    with pytest.raises(ValueError):
+        asyncio.run(orion.get_multiple_ais([123, 257055930]))
+
+
+def test_async_historic_get_ais():
+    def handler(request):
+        return httpx.Response(
+            200,
+            json={
+                "success": True,
+                "data": [[257055990, "2023-01-01T00:00:00", 5.1, 60.1, 10.0, 5.0]],
+            },
+        )
+
+    async def run():
+        orion = AsyncHistoricOrion()
+        orion.session = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        async with orion:
+            return await orion.get_ais(
+                257055990, "2023-01-01T00:00:00Z", "2023-01-02T00:00:00Z"
+            )
+
+    ais = asyncio.run(run())
+    assert ais[0]["msgtime"] == "2023-01-01T00:00:00Z"
+    assert ais[0]["longitude"] == 5.1
+
+
+def make_kystdatahuset(bodies):
+    """A stand-in for Kystdatahuset that answers one position per MMSI"""
+
+    def handler(request):
+        body = json.loads(request.content)
+        bodies.append(body)
+        data = [
+            [m, "2023-01-01T00:00:00", 5.1, 60.1, 10.0, 5.0] for m in body["MmsiIds"]
+        ]
+        return httpx.Response(200, json={"success": True, "data": data})
+
+    return handler
+
+
+def test_async_historic_get_multiple_ais_batched():
+    bodies = []
+
+    async def run():
+        orion = AsyncHistoricOrion()
+        orion.session = httpx.AsyncClient(
+            transport=httpx.MockTransport(make_kystdatahuset(bodies))
+        )
+        async with orion:
+            ais = await orion.get_multiple_ais(
+                [257055990, 257055930, 257055910, 257055990],
+                "2023-01-01T00:00:00Z",
+                "2023-01-02T00:00:00Z",
+                batch_size=2,
+            )
+            batch = await orion.get_ais_batch(
+                [257055990, 257055930], "2023-01-01T00:00:00Z", "2023-01-02T00:00:00Z"
+            )
+        return ais, batch
+
+    ais, batch = asyncio.run(run())
+
+    assert sorted(b["MmsiIds"] for b in bodies[:2]) == [
+        [257055910],
+        [257055990, 257055930],
+    ]
+    assert [a["mmsi"] for a in ais] == [257055990, 257055930, 257055910, 257055990]
+    assert batch.mmsi.tolist() == [257055990, 257055930]
+
+
+def test_async_historic_cache(tmp_path):
+    bodies = []
+
+    async def run():
+        orion = AsyncHistoricOrion(cache=TrackCache(str(tmp_path / "tracks.sqlite")))
+        orion.session = httpx.AsyncClient(
+            transport=httpx.MockTransport(make_kystdatahuset(bodies))
+        )
+        async with orion:
+            first = await orion.get_ais(
+                257055990, "2023-01-01T00:00:00Z", "2023-01-02T00:00:00Z"
+            )
+            second = await orion.get_ais(
+                257055990, "2023-01-01T00:00:00Z", "2023-01-02T00:00:00Z"
+            )
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    assert len(bodies) == 1
+    assert first == second
+    assert first[0]["jurisdiction"] == "NO"
+
+
+def test_async_clients_are_not_blocking_clients():
+    # the async clients share the helpers, not the blocking methods
+    assert not issubclass(AsyncOrion, Orion)
+    assert not issubclass(AsyncHistoricOrion, HistoricOrion)
+    assert issubclass(AsyncHistoricOrion, BaseOrion)
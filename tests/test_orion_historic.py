@@ -11,8 +11,9 @@ from deepdiff import DeepDiff
 from shapely.geometry import LineString, Point
 
 from orion import HistoricOrion
-from orion.utils.get_data import get_oil_installations, get_oil_rigs
+from orion.historic import positions_to_frame
 from orion.mmsi import Jurisdiction
+from orion.utils.get_data import get_oil_installations, get_oil_rigs
 
 project_dir = os.path.join(os.path.dirname(__file__), os.pardir)
 
@@ -106,3 +107,107 @@ def test_get_mmsis_in_area_error():
         del area["features"][0]["geometry"]["coordinates"]
         with pytest.raises(ValueError):
             orion.get_mmsis_in_area(area)
+
+
+def test_get_multiple_ais_batched(monkeypatch, kystdatahuset_response):
+    orion = HistoricOrion()
+    bodies = []
+
+    def post(url, json):
+        bodies.append(json)
+        data = [
+            [m, "2023-01-01T00:00:00", 5.0, 60.0, 0.0, 0.0] for m in json["MmsiIds"]
+        ]
+        return kystdatahuset_response(data[::-1])
+
+    monkeypatch.setattr(orion.session, "post", post)
+    mmsis = [257055990, 257055930, 257055910]
+    ais = orion.get_multiple_ais(
+        mmsis, "2023-01-01T00:00:00Z", "2023-01-02T00:00:00Z", batch_size=2
+    )
+
+    assert [b["MmsiIds"] for b in bodies] == [[257055990, 257055930], [257055910]]
+    assert [a["mmsi"] for a in ais] == mmsis
+
+    result = orion.fetch_multiple_ais(
+        mmsis, "2023-01-01T00:00:00Z", "2023-01-02T00:00:00Z", batch_size=2
+    )
+    assert list(result.ais) == mmsis
+
+
+def test_get_multiple_ais_duplicates(monkeypatch, kystdatahuset_response):
+    orion = HistoricOrion()
+    bodies = []
+
+    def post(url, json):
+        bodies.append(json)
+        data = [
+            [m, "2023-01-01T00:00:00", 5.0, 60.0, 0.0, 0.0] for m in json["MmsiIds"]
+        ]
+        return kystdatahuset_response(data)
+
+    monkeypatch.setattr(orion.session, "post", post)
+    mmsis = [257055930, 257055990, 257055930]
+
+    # each ship is fetched once, and returned as often as it was given
+    for workers in (None, 2):
+        bodies.clear()
+        ais = orion.get_multiple_ais(
+            mmsis, "2023-01-01T00:00:00Z", "2023-01-02T00:00:00Z", workers=workers
+        )
+        assert [b["MmsiIds"] for b in bodies] == [[257055930, 257055990]]
+        assert [a["mmsi"] for a in ais] == mmsis
+
+
+def test_positions_to_frame():
+    data = [
+        [257055990, "2023-01-01T00:08:46", 60.1, 5.1, 10.0, 5.0, 1, 5.2, 60, 160],
+        [257055930, "2023-01-01T00:09:46", 60.2, 5.2, None, 0.0, 3, 0.0, 60, 0],
+    ]
+    frame = positions_to_frame(data, swap_lat_lon=True, extra=True)
+
+    assert list(frame.columns) == [
+        "mmsi",
+        "msgtime",
+        "longitude",
+        "latitude",
+        "courseOverGround",
+        "speedOverGround",
+        "calcSpeed",
+        "secPrevPoint",
+        "distPrevPoint",
+    ]
+    assert frame.longitude.tolist() == [5.1, 5.2]
+    assert frame.latitude.tolist() == [60.1, 60.2]
+    assert frame.msgtime[0] == pd.Timestamp("2023-01-01T00:08:46Z")
+    assert frame.courseOverGround.isna().tolist() == [False, True]
+
+    empty = positions_to_frame([])
+    assert len(empty) == 0 and len(empty.columns) == 6
+
+
+def test_get_mmsis_in_area_exact(monkeypatch, kystdatahuset_response):
+    orion = HistoricOrion()
+    triangle = {
+        "type": "Polygon",
+        "coordinates": [[[5.0, 60.0], [6.0, 60.0], [5.0, 61.0], [5.0, 60.0]]],
+    }
+
+    # latitude before longitude, as the bbox endpoint returns it
+    response = kystdatahuset_response(
+        [
+            [257055990, "2023-01-01T00:00:00", 60.2, 5.2, 0.0, 0.0, 0, 0.0, 0, 0],
+            [257055930, "2023-01-01T00:00:00", 60.9, 5.9, 0.0, 0.0, 0, 0.0, 0, 0],
+        ]
+    )
+    monkeypatch.setattr(orion.session, "post", lambda url, json: response)
+    dates = ("2023-01-01T00:00:00Z", "2023-01-02T00:00:00Z")
+
+    ais = orion.get_mmsis_in_area(triangle, *dates)
+    assert [a["mmsi"] for a in ais] == [257055990]
+
+    ais = orion.get_mmsis_in_area(triangle, *dates, exact=False)
+    assert [a["mmsi"] for a in ais] == [257055990, 257055930]
+
+    frame = orion.get_mmsis_in_area_frame(triangle, *dates)
+    assert frame.mmsi.tolist() == [257055990]
@@ -0,0 +1,110 @@
+import os
+from datetime import timedelta
+
+import geopandas
+import numpy as np
+import pandas as pd
+import shapely
+
+from orion.kinematics import haversine
+from orion.proximity import InstallationIndex
+
+project_dir = os.path.join(os.path.dirname(__file__), os.pardir)
+
+
+def load_installations():
+    return geopandas.read_file(f"{project_dir}/tests/mocks/oil_installations.geojson")
+
+
+def make_frame(installations):
+    armada = installations[installations.fclName == "ARMADA"].geometry.iloc[0]
+    times = pd.date_range("2023-01-01", periods=8, freq="10min", tz="UTC")
+
+    # Ship 1 comes within 200 m of Armada, leaves and comes back after a
+    # gap, ship 2 stays far away
+    offsets = np.array([0.1, 0.003, 0.001, 0.002, 0.05, 0.001, 0.001, 0.1])
+    return pd.DataFrame(
+        {
+            "mmsi": np.repeat([1, 2], 8),
+            "msgtime": np.tile(times, 2),
+            "longitude": np.append(np.full(8, armada.x), np.full(8, 10.0)),
+            "latitude": np.append(armada.y + offsets, np.full(8, 58.0)),
+        }
+    ).sample(frac=1, random_state=1)
+
+
+def test_nearest():
+    installations = load_installations()
+    index = InstallationIndex(installations)
+    frame = make_frame(installations)
+
+    result = index.nearest(frame, max_distance=500)
+
+    assert sorted(result.index) == [1, 2, 3, 5, 6]
+    assert (installations.fclName[result.installation] == "ARMADA").all()
+
+    near = frame.loc[result.index]
+    armada = installations.geometry[result.installation]
+    expected = haversine(
+        armada.x.values, armada.y.values, near.longitude.values, near.latitude.values
+    )
+    np.testing.assert_allclose(result.distance, expected, rtol=0.01)
+
+
+def test_nearest_many_installations():
+    installations = load_installations()
+    index = InstallationIndex(installations)
+    points = installations.geometry
+
+    result = index.nearest(
+        pd.DataFrame({"longitude": points.x, "latitude": points.y}), max_distance=1
+    )
+
+    # Installations can share a position, any of them is the nearest
+    same = shapely.equals(
+        points[result.index].values, points[result.installation].values
+    )
+    assert len(result) == len(installations)
+    assert same.all()
+
+
+def test_nearest_matches_all_positions():
+    installations = load_installations()
+    index = InstallationIndex(installations)
+    rng = np.random.default_rng(0)
+    points = installations.geometry.sample(10_000, replace=True, random_state=1)
+    longitudes = points.x.to_numpy() + rng.normal(0, 0.02, len(points))
+    latitudes = points.y.to_numpy() + rng.normal(0, 0.01, len(points))
+
+    positions, nearest, distances = index.query_nearest(longitudes, latitudes, 1000)
+
+    projected = geopandas.GeoSeries.from_xy(longitudes, latitudes, crs=4326)
+    (expected, _), _ = index._tree.query_nearest(
+        projected.to_crs(index.crs).to_numpy(),
+        max_distance=1000,
+        return_distance=True,
+        all_matches=False,
+    )
+    assert 0 < len(positions) < len(longitudes)
+    assert positions.tolist() == expected.tolist()
+    assert (distances <= 1000).all()
+
+
+def test_visits():
+    installations = load_installations()
+    index = InstallationIndex(installations)
+    frame = make_frame(installations)
+
+    result = index.visits(frame, max_distance=500)
+
+    assert result.mmsi.tolist() == [1, 1]
+    assert result.points.tolist() == [3, 2]
+    assert result.start[0] == pd.Timestamp("2023-01-01T00:10", tz="UTC")
+    assert result.end[0] == pd.Timestamp("2023-01-01T00:30", tz="UTC")
+    assert np.isclose(result.distance[0], 111, atol=1)
+
+    frame.loc[frame.msgtime >= "2023-01-01T00:30:00Z", "msgtime"] += timedelta(hours=1)
+    result = index.visits(frame, max_distance=500, max_gap=timedelta(minutes=30))
+
+    assert result.points.tolist() == [2, 1, 2]
+    assert len(index.visits(frame.iloc[:0], max_distance=500)) == 0
@@ -0,0 +1,83 @@
+import geopandas
+import numpy as np
+import pyproj
+import shapely
+
+from orion import Orion
+from orion.projection import (
+    apply_in_local_crs,
+    get_transformer,
+    transform_geometries,
+    utm_epsg,
+)
+from orion.spatial import buffer_points
+
+
+def test_get_transformer_is_cached():
+    assert get_transformer(4326, 23032) is get_transformer(4326, 23032)
+
+
+def test_transform_geometries():
+    points = shapely.points([4.5, 5.0], [61.0, 60.0])
+    projected = transform_geometries(points, 4326, 23032)
+    back = transform_geometries(projected, 23032, 4326)
+
+    assert shapely.get_x(projected)[0] > 100_000
+    assert np.allclose(shapely.get_coordinates(back), shapely.get_coordinates(points))
+
+
+def test_buffer_points_matches_buffer_around_point():
+    orion = Orion(skip_auth=True)
+    buffers = buffer_points([4.510167, 5.0], [61.036165, 60.0], 100)
+    single = shapely.geometry.shape(orion.buffer_around_point(61.036165, 4.510167, 100))
+
+    assert len(buffers) == 2
+    assert shapely.equals_exact(buffers[0], single, 1e-9)
+
+
+def test_buffer_points_geodesic():
+    buffers = buffer_points([4.5, 15.0], [61.0, 78.0], [1000, 2000], geodesic=True)
+    geod = pyproj.Geod(ellps="WGS84")
+
+    for buffer, distance in zip(buffers, [1000, 2000]):
+        area, _ = geod.geometry_area_perimeter(buffer)
+        assert buffer.is_valid
+        assert abs(area / (np.pi * distance**2) - 1) < 0.01
+
+
+def test_buffer_around_points():
+    orion = Orion(skip_auth=True)
+    buffers = orion.buffer_around_points([61.0, 60.0], [4.5, 5.0], 100)
+
+    assert buffers.crs.to_epsg() == 4326
+    assert shapely.contains_xy(buffers.to_numpy(), [4.5, 5.0], [61.0, 60.0]).all()
+
+
+def test_utm_epsg():
+    zones = utm_epsg(
+        [5.3, 10.0, 15.0, 25.0, 5.0, 30.0, -70.0],
+        [60.4, 59.9, 78.0, 70.0, 78.0, 78.0, -33.0],
+    )
+
+    assert zones.tolist() == [32632, 32632, 32633, 32635, 32631, 32635, 32719]
+
+
+def test_apply_in_local_crs():
+    points = shapely.points([5.0, 25.0, 15.0], [60.0, 70.0, 78.0])
+    buffers = apply_in_local_crs(points, lambda g: shapely.buffer(g, 1000))
+    geod = pyproj.Geod(ellps="WGS84")
+
+    for buffer in buffers:
+        area, _ = geod.geometry_area_perimeter(shapely.geometry.polygon.orient(buffer))
+        assert abs(area / (np.pi * 1000**2) - 1) < 0.01
+
+
+def test_buffer_around_gdf_local_crs():
+    orion = Orion(skip_auth=True)
+    gdf = geopandas.GeoDataFrame(
+        geometry=shapely.points([5.0, 15.0], [60.0, 78.0]), crs=4326
+    )
+    gdf = orion.buffer_around_gdf(gdf, 100, local_crs=True)
+
+    assert gdf.crs.to_epsg() == 4326
+    assert shapely.contains_xy(gdf.geometry.to_numpy(), [5.0, 15.0], [60.0, 78.0]).all()
@@ -0,0 +1,256 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from orion.stream import AisStream, SseParser, decode_message
+from orion.token import AsyncTokenManager
+
+
+def position(n):
+    return {
+        "mmsi": 257000000 + n,
+        "msgtime": f"2023-01-01T00:00:{n:02}+00:00",
+        "latitude": 60.0 + n / 100,
+        "longitude": 5.0,
+        "shipType": 30,
+        "trueHeading": None,
+        "messageType": 1,
+    }
+
+
+class Feed:
+    """A stand-in for the live AIS feed, on a local port
+
+    Sends the positions from the one after Last-Event-ID, at most per_connection
+    of them before closing the connection. Answers 503 when all are sent. With
+    broken, a message that is not valid JSON is sent after the first position.
+    """
+
+    def __init__(
+        self, count, per_connection=None, ndjson=False, token=None, broken=False
+    ):
+        self.positions = [position(n) for n in range(count)]
+        self.per_connection = per_connection or count
+        self.ndjson = ndjson
+        self.token = token
+        self.broken = broken
+        self.requests = []
+
+        feed = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                feed.handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/live"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def handle(self, request):
+        self.requests.append(dict(request.headers))
+        if self.token and request.headers["Authorization"] != f"Bearer {self.token}":
+            request.send_response(401)
+            request.end_headers()
+            return
+
+        start = int(request.headers.get("Last-Event-ID", -1)) + 1
+        positions = self.positions[start : start + self.per_connection]
+        if not positions:
+            request.send_response(503)
+            request.end_headers()
+            return
+
+        request.send_response(200)
+        if self.ndjson:
+            request.send_header("Content-Type", "application/x-ndjson")
+            request.end_headers()
+            lines = [json.dumps(p) + "\n" for p in positions]
+            lines.insert(1, "\n")
+            lines.insert(2, json.dumps({"mmsi": 1, "messageType": 5}) + "\n")
+            if self.broken:
+                lines.insert(1, '{"mmsi": 257\n')
+            for line in lines:
+                request.wfile.write(line.encode())
+            return
+
+        request.send_header("Content-Type", "text/event-stream")
+        request.end_headers()
+        request.wfile.write(b"retry: 0\n: keep alive\n\n")
+        for n, p in enumerate(positions, start):
+            request.wfile.write(f"id: {n}\ndata: {json.dumps(p)}\n\n".encode())
+            if self.broken and n == 0:
+                request.wfile.write(b'data: {"mmsi": 257\n\n')
+
+
+async def collect(stream, count):
+    """Positions from a slow consumer of the stream, until count have come"""
+    received, batches = [], []
+    async with stream:
+        async for batch in stream.batches():
+            batches.append((len(batch), stream.queue.qsize()))
+            received.extend(batch)
+            await asyncio.sleep(0.01)
+            if len(received) >= count:
+                break
+    return received, batches
+
+
+def test_decode_message():
+    ais = decode_message(json.dumps(position(1)))
+
+    assert ais == {
+        "mmsi": 257000001,
+        "msgtime": "2023-01-01T00:00:01+00:00",
+        "latitude": 60.01,
+        "longitude": 5.0,
+        "shipType": 30,
+    }
+    assert decode_message(json.dumps({"mmsi": 1, "messageType": 5})) is None
+    assert decode_message("[]") is None
+
+
+def test_sse_parser():
+    parser = SseParser()
+    lines = [": comment", "retry: 2500", "id: 7", "data: {", "data:}", ""]
+
+    assert [parser.feed(line) for line in lines] == [None] * 5 + ["{\n}"]
+    assert parser.last_event_id == "7"
+    assert parser.retry == 2.5
+    assert parser.feed("") is None
+
+
+def test_stream_sse_resumes():
+    received = []
+
+    async def run(stream):
+        async with stream:
+            async for batch in stream.batches():
+                received.extend(batch)
+
+    with Feed(10, per_connection=3) as feed:
+        stream = AisStream(
+            feed.url, reconnect_delay=0.01, max_reconnects=1, batch_timeout=0.05
+        )
+        with pytest.raises(ConnectionError):
+            asyncio.run(run(stream))
+
+    assert [a["mmsi"] - 257000000 for a in received] == list(range(10))
+    assert stream.connections == 4
+    assert [r.get("Last-Event-ID") for r in feed.requests] == [
+        None,
+        "2",
+        "5",
+        "8",
+        "9",
+        "9",
+    ]
+
+
+def test_stream_ndjson():
+    with Feed(5, ndjson=True) as feed:
+        stream = AisStream(feed.url, reconnect_delay=0.01, batch_timeout=0.05)
+        received, _ = asyncio.run(collect(stream, count=7))
+
+    # The feed starts over, as NDJSON has no event ids to resume from
+    assert [a["mmsi"] - 257000000 for a in received[:7]] == [0, 1, 2, 3, 4, 0, 1]
+    assert len(feed.requests) >= 2
+    assert all(r.get("Last-Event-ID") is None for r in feed.requests)
+
+
+@pytest.mark.parametrize("ndjson", [False, True])
+def test_stream_skips_broken_messages(ndjson):
+    with Feed(5, ndjson=ndjson, broken=True) as feed:
+        stream = AisStream(feed.url, reconnect_delay=0.01, batch_timeout=0.05)
+        received, _ = asyncio.run(collect(stream, count=5))
+
+    # The positions after the broken message come on the same connection
+    assert [a["mmsi"] - 257000000 for a in received[:5]] == list(range(5))
+
+
+def test_stream_backpressure():
+    async def run(stream):
+        async with stream:
+            batches = stream.batches()
+            received = list(await batches.__anext__())
+
+            # The consumer stalls, so the reader fills the queue and waits
+            await asyncio.sleep(0.2)
+            stalled = (stream.received, stream.queue.qsize())
+            await asyncio.sleep(0.2)
+            still = stream.received
+
+            async for batch in batches:
+                received.extend(batch)
+                if len(received) >= 50:
+                    break
+        return received, stalled, still
+
+    with Feed(50, ndjson=True) as feed:
+        stream = AisStream(feed.url, max_queue=5, batch_size=4, batch_timeout=0.05)
+        received, stalled, still = asyncio.run(run(stream))
+
+    # Only the first batch and a full queue are read while the consumer stalls
+    assert stalled == (4 + 5, 5)
+    assert still == stalled[0]
+    assert [a["mmsi"] - 257000000 for a in received] == list(range(50))
+
+
+def test_stream_rejected_token():
+    tokens = []
+
+    async def fetch():
+        tokens.append(f"token-{len(tokens)}")
+        return {"access_token": tokens[-1], "expires_in": 3600}
+
+    async def run(stream):
+        async with stream:
+            async for _ in stream.batches():
+                pass
+
+    with Feed(3, token="token-never") as feed:
+        stream = AisStream(
+            feed.url,
+            tokens=AsyncTokenManager(fetch),
+            reconnect_delay=0.01,
+            max_reconnects=2,
+        )
+        with pytest.raises(ConnectionError):
+            asyncio.run(run(stream))
+
+    # One new token per attempt, and the stream ends after max_reconnects
+    assert tokens == ["token-0", "token-1", "token-2", "token-3"]
+    assert len(feed.requests) == 6
+
+
+def test_stream_refreshes_token():
+    tokens = []
+
+    async def fetch():
+        tokens.append(f"token-{len(tokens)}")
+        return {"access_token": tokens[-1], "expires_in": 3600}
+
+    with Feed(3, token="token-1") as feed:
+        stream = AisStream(
+            feed.url,
+            tokens=AsyncTokenManager(fetch),
+            reconnect_delay=0.01,
+            batch_timeout=0.05,
+        )
+        received, _ = asyncio.run(collect(stream, count=3))
+
+    assert len(received) == 3
+    assert tokens == ["token-0", "token-1"]
+    assert feed.requests[0]["Authorization"] == "Bearer token-0"
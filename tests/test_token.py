@@ -0,0 +1,93 @@
+import threading
+import time
+
+from orion.token import Token, TokenManager, TokenStore
+
+
+def make_fetch(expires_in=3600):
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.01)
+        return {"access_token": f"token-{len(calls)}", "expires_in": expires_in}
+
+    return fetch, calls
+
+
+def test_token_refreshed_before_expiry():
+    fetch, calls = make_fetch(expires_in=3600)
+    tokens = TokenManager(fetch, margin=60)
+    assert tokens.get() == "token-1"
+
+    # the token expires within the margin, so it is refreshed up front
+    tokens.token = Token("token-1", time.time() + 30, time.time() - 3570)
+    assert tokens.get() == "token-2"
+
+
+def test_token_short_lived():
+    fetch, calls = make_fetch(expires_in=0.2)
+    tokens = TokenManager(fetch, margin=60)
+
+    # the margin is at most half of the lifetime, so the token is used until then
+    assert tokens.get() == "token-1"
+    assert tokens.get() == "token-1"
+
+    time.sleep(0.1)
+    assert tokens.get() == "token-2"
+
+
+def test_token_short_lived_single_flight():
+    fetch, calls = make_fetch(expires_in=30)
+    tokens = TokenManager(fetch, margin=60)
+
+    threads = [threading.Thread(target=tokens.get) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert tokens.get() == "token-1"
+
+
+def test_token_refresh_single_flight():
+    fetch, calls = make_fetch()
+    tokens = TokenManager(fetch)
+    expired = tokens.get()
+
+    threads = [
+        threading.Thread(target=tokens.refresh, args=(expired,)) for _ in range(8)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 2
+    assert tokens.get() == "token-2"
+
+
+def test_token_store(tmp_path):
+    path = str(tmp_path / "token.json")
+    fetch, calls = make_fetch()
+    TokenManager(fetch, TokenStore(path)).get()
+
+    # a new process reuses the stored token instead of fetching a new one
+    tokens = TokenManager(fetch, TokenStore(path))
+    assert tokens.get() == "token-1"
+    assert len(calls) == 1
+
+    TokenStore(path).save(Token("old", time.time() - 1))
+    assert TokenManager(fetch, TokenStore(path)).get() == "token-2"
+
+
+def test_token_store_per_client(tmp_path):
+    path = str(tmp_path / "token.json")
+    fetch, calls = make_fetch()
+    TokenManager(fetch, TokenStore(path, "first")).get()
+
+    # another client id does not get the token of the first one
+    assert TokenStore(path, "second").load() is None
+    assert TokenManager(fetch, TokenStore(path, "second")).get() == "token-2"
+    assert TokenStore(path, "first").load().access_token == "token-1"
@@ -0,0 +1,33 @@
+from datetime import timedelta
+
+from orion.tracks import points_to_tracks
+
+
+def test_points_to_tracks(gdf):
+    tracks = points_to_tracks(gdf)
+
+    assert tracks.mmsi.tolist() == [211210190, 257956000]
+    assert tracks.points.tolist() == [3, 157]
+    assert tracks.crs == gdf.crs
+
+    ship = gdf[gdf.mmsi == 257956000]
+    assert list(tracks.geometry[1].coords) == [(p.x, p.y) for p in ship.geometry]
+    assert tracks.start[1] == ship.msgtime.min()
+    assert tracks.end[1] == ship.msgtime.max()
+
+
+def test_points_to_tracks_max_gap(gdf):
+    ship = gdf.mmsi == 257956000
+    later = ship & (gdf.msgtime > gdf.msgtime[ship].median())
+    gdf.loc[later, "msgtime"] += timedelta(hours=2)
+
+    tracks = points_to_tracks(gdf, max_gap=timedelta(hours=1))
+
+    assert tracks.mmsi.tolist() == [211210190, 257956000, 257956000]
+    assert tracks.points.tolist() == [3, 79, 78]
+
+
+def test_points_to_tracks_single_points(gdf):
+    tracks = points_to_tracks(gdf.iloc[:1])
+
+    assert len(tracks) == 0